@@ -0,0 +1,8 @@
+"""Analysis package: analytics over stored COREP figures."""
+from .variance import OwnFundsPanel, VarianceAnalyzer, VarianceResult, Movement
+from .consolidation import EntityNode, IntraGroupHolding, EntityHierarchy, ConsolidationEngine
+
+__all__ = [
+    "OwnFundsPanel", "VarianceAnalyzer", "VarianceResult", "Movement",
+    "EntityNode", "IntraGroupHolding", "EntityHierarchy", "ConsolidationEngine",
+]
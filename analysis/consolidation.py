@@ -0,0 +1,289 @@
+"""
+Bottom-up consolidation of Own Funds across an entity hierarchy.
+
+Every entity has solo figures. The consolidated figures of a node are its
+own solo figures, less intra-group holdings eliminated at that node, plus
+each direct subsidiary's consolidated figures scaled by the share the
+group recognises:
+
+    recognised = ownership + (1 - ownership) * minority_recognition
+
+(minority_recognition is the fraction of third-party (minority) interest
+that counts towards group own funds; 0 recognises only the parent's share).
+
+An intra-group holding (one group entity holding capital instruments
+issued by another) is eliminated at the lowest common ancestor of the
+holder and the issuer, the first level at which both are consolidated,
+and so is absent from that node and every node above it. Only the part of
+the issuer's capital that reaches that node is eliminated: the amount is
+scaled by the recognised shares on the issuer's path up to it.
+
+Eliminations can push a node's figures below zero. ``own_funds()`` clamps
+such components to zero (Own Funds amounts are non-negative) and recomputes
+the total from them, so the result still passes the totals check;
+``warnings()`` reports them.
+
+All nodes are computed in one pass over tree levels, deepest first, each
+level being a single numpy scatter-add into the parents. A change to one
+entity's solo figures is applied by propagating the delta up its
+ancestors only.
+
+Leaf entities report on a solo basis, the root consolidated and every
+other node sub-consolidated.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from models.corep import OwnFunds
+from .variance import FIELDS
+import config
+
+
+SOLO = "solo"
+SUB_CONSOLIDATED = "sub-consolidated"
+CONSOLIDATED = "consolidated"
+
+
+@dataclass(frozen=True)
+class EntityNode:
+    """An entity, its parent in the group and the parent's ownership share."""
+
+    entity: str
+    parent: Optional[str] = None
+    ownership: float = 1.0
+
+
+@dataclass(frozen=True)
+class IntraGroupHolding:
+    """Capital instruments of ``issuer`` held by ``holder``, both in the group."""
+
+    holder: str
+    issuer: str
+    field: str
+    amount: float
+
+
+class EntityHierarchy:
+    """A forest of entities stored as parent/depth arrays."""
+
+    def __init__(self, nodes: Iterable[EntityNode], minority_recognition: float = None):
+        """
+        Index the hierarchy.
+
+        Raises:
+            ValueError: on duplicate entities, unknown parents, cycles or
+                ownership outside (0, 1]
+        """
+        nodes = list(nodes)
+        self.entities: List[str] = [node.entity for node in nodes]
+        self.index: Dict[str, int] = {entity: i for i, entity in enumerate(self.entities)}
+        if len(self.index) != len(nodes):
+            raise ValueError("Duplicate entities in hierarchy")
+
+        n = len(nodes)
+        self.parent = np.full(n, -1, dtype=np.int64)
+        ownership = np.ones(n)
+        for i, node in enumerate(nodes):
+            if node.parent is not None:
+                if node.parent not in self.index:
+                    raise ValueError(f"Unknown parent '{node.parent}' of '{node.entity}'")
+                self.parent[i] = self.index[node.parent]
+            if not 0 < node.ownership <= 1:
+                raise ValueError(f"Ownership of '{node.entity}' must be in (0, 1]")
+            ownership[i] = node.ownership
+
+        recognition = (
+            minority_recognition if minority_recognition is not None
+            else config.CONSOLIDATION_MINORITY_RECOGNITION
+        )
+        self.factor = ownership + (1 - ownership) * recognition
+
+        self.depth = self._depths()
+        order = np.argsort(-self.depth, kind="stable")
+        boundaries = np.flatnonzero(np.diff(self.depth[order])) + 1
+        # Non-root nodes grouped by depth, deepest level first
+        self.levels = [level for level in np.split(order, boundaries) if self.depth[level[0]] > 0]
+        self.has_children = np.zeros(n, dtype=bool)
+        self.has_children[self.parent[self.parent >= 0]] = True
+
+    def _depths(self) -> np.ndarray:
+        depth = np.where(self.parent < 0, 0, -1)
+        while (depth < 0).any():
+            pending = np.flatnonzero(depth < 0)
+            ready = pending[depth[self.parent[pending]] >= 0]
+            if not len(ready):
+                cyclic = [self.entities[i] for i in pending[:5]]
+                raise ValueError(f"Cycle in entity hierarchy involving: {', '.join(cyclic)}")
+            depth[ready] = depth[self.parent[ready]] + 1
+        return depth
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def ancestors(self, entity: str) -> List[int]:
+        """Indices of an entity's ancestors, nearest first."""
+        path = []
+        node = self.parent[self.index[entity]]
+        while node >= 0:
+            path.append(int(node))
+            node = self.parent[node]
+        return path
+
+    def lowest_common_ancestor(self, a: str, b: str) -> Optional[int]:
+        """Index of the lowest node whose consolidation includes both entities."""
+        i, j = self.index[a], self.index[b]
+        while self.depth[i] > self.depth[j]:
+            i = self.parent[i]
+        while self.depth[j] > self.depth[i]:
+            j = self.parent[j]
+        while i != j:
+            if i < 0 or j < 0:
+                return None
+            i, j = self.parent[i], self.parent[j]
+        return int(i) if i >= 0 else None
+
+    def basis(self, entity: str) -> str:
+        """Reporting basis of an entity's consolidated figures."""
+        i = self.index[entity]
+        if not self.has_children[i]:
+            return SOLO
+        return CONSOLIDATED if self.parent[i] < 0 else SUB_CONSOLIDATED
+
+
+class ConsolidationEngine:
+    """Rolls solo Own Funds up an EntityHierarchy, with incremental updates."""
+
+    def __init__(
+        self,
+        hierarchy: EntityHierarchy,
+        solo: Dict[str, OwnFunds],
+        holdings: Sequence[IntraGroupHolding] = ()
+    ):
+        """
+        Args:
+            hierarchy: Group structure
+            solo: Solo figures per entity (missing entities count as zero)
+            holdings: Intra-group holdings to eliminate
+        """
+        self.hierarchy = hierarchy
+        self.solo = np.zeros((len(hierarchy), len(FIELDS)))
+        for entity, own_funds in solo.items():
+            self.solo[hierarchy.index[entity]] = [getattr(own_funds, name) for name in FIELDS]
+
+        self.eliminations = np.zeros_like(self.solo)
+        self._add_eliminations(holdings)
+        self.consolidated = self._roll_up()
+
+    @classmethod
+    def from_run_store(
+        cls,
+        hierarchy: EntityHierarchy,
+        store,
+        period: str,
+        holdings: Sequence[IntraGroupHolding] = ()
+    ) -> "ConsolidationEngine":
+        """Use each entity's latest successful solo run for a period as its figures."""
+        solo = {
+            entity: OwnFunds(**dict(zip(FIELDS, figures)))
+            for entity, row_period, *figures in store.own_funds_history(hierarchy.entities)
+            if row_period == period
+        }
+        return cls(hierarchy, solo, holdings)
+
+    def _add_eliminations(self, holdings: Sequence[IntraGroupHolding]) -> None:
+        total = FIELDS.index("total_own_funds")
+        for holding in holdings:
+            if holding.field not in FIELDS or holding.field == "total_own_funds":
+                raise ValueError(f"Cannot eliminate holdings of '{holding.field}'")
+            node = self.hierarchy.lowest_common_ancestor(holding.holder, holding.issuer)
+            if node is None:
+                raise ValueError(
+                    f"'{holding.holder}' and '{holding.issuer}' are not in the same group"
+                )
+            field = FIELDS.index(holding.field)
+            amount = holding.amount * self._path_factor(self.hierarchy.index[holding.issuer], node)
+            np.add.at(self.eliminations, ([node, node], [field, total]), amount)
+
+    def _path_factor(self, node: int, ancestor: int) -> float:
+        """Share of ``node``'s figures recognised in ``ancestor``'s consolidated figures."""
+        hierarchy = self.hierarchy
+        scale = 1.0
+        while node != ancestor:
+            scale *= hierarchy.factor[node]
+            node = hierarchy.parent[node]
+        return float(scale)
+
+    def _roll_up(self) -> np.ndarray:
+        hierarchy = self.hierarchy
+        consolidated = self.solo - self.eliminations
+        for level in hierarchy.levels:
+            np.add.at(
+                consolidated,
+                hierarchy.parent[level],
+                consolidated[level] * hierarchy.factor[level, None]
+            )
+        return consolidated
+
+    def update(self, entity: str, own_funds: OwnFunds) -> List[str]:
+        """
+        Replace one entity's solo figures and propagate the change up its
+        ancestors only.
+
+        Returns:
+            Entities whose consolidated figures changed, bottom-up
+        """
+        hierarchy = self.hierarchy
+        i = hierarchy.index[entity]
+        new = np.array([getattr(own_funds, name) for name in FIELDS])
+        delta = new - self.solo[i]
+        self.solo[i] = new
+        if not delta.any():
+            return []
+
+        changed = [entity]
+        self.consolidated[i] += delta
+        node = i
+        while hierarchy.parent[node] >= 0:
+            delta = delta * hierarchy.factor[node]
+            node = hierarchy.parent[node]
+            self.consolidated[node] += delta
+            changed.append(hierarchy.entities[node])
+        return changed
+
+    def own_funds(self, entity: str) -> OwnFunds:
+        """
+        Consolidated Own Funds for an entity (solo figures for a leaf).
+
+        Components that eliminations push below zero are reported as zero
+        and total_own_funds is their sum; see warnings().
+        """
+        values = self.consolidated[self.hierarchy.index[entity]]
+        components = {
+            name: max(float(value), 0.0)
+            for name, value in zip(FIELDS, values) if name != "total_own_funds"
+        }
+        return OwnFunds(total_own_funds=sum(components.values()), **components)
+
+    def warnings(self, entity: str) -> List[str]:
+        """Consolidated figures of an entity that are negative (clamped by own_funds())."""
+        values = self.consolidated[self.hierarchy.index[entity]]
+        reported_as = {"total_own_funds": "the sum of the clamped components"}
+        return [
+            f"WARNING: Consolidated {name} of '{entity}' is negative ({value:,.2f}) "
+            f"after intra-group eliminations; reported as {reported_as.get(name, '0')}"
+            for name, value in zip(FIELDS, values)
+            if value < -1e-9
+        ]
+
+    def results(self) -> Dict[str, dict]:
+        """Basis, unclamped figures and warnings for every entity."""
+        return {
+            entity: {
+                "basis": self.hierarchy.basis(entity),
+                **{name: float(value) for name, value in zip(FIELDS, self.consolidated[i])},
+                "warnings": self.warnings(entity),
+            }
+            for i, entity in enumerate(self.hierarchy.entities)
+        }
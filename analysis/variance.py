@@ -0,0 +1,250 @@
+"""
+Period-over-period variance analysis of Own Funds figures.
+
+Historical figures for many entities are loaded into one dense array of
+shape (entities, periods, fields), with NaN where an entity did not
+report, and every statistic is computed with whole-array numpy
+operations:
+
+    absolute change     x[t] - x[t-1]
+    relative change     (x[t] - x[t-1]) / |x[t-1]|
+    threshold breach    |relative| > rel_threshold and |absolute| > abs_threshold
+    rolling statistics  mean/std of the previous `window` relative changes;
+                        a change more than z_threshold std from that mean
+                        is flagged as unusual for the entity
+
+A changed period is compared with the entity's previous *reported*
+period, so gaps in reporting do not produce spurious movements.
+"""
+import warnings
+from dataclasses import dataclass
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from models.corep import CorepOutput
+import config
+
+
+FIELDS = ("common_equity_tier_1", "additional_tier_1", "tier_2", "total_own_funds")
+FIELD_LABELS = {
+    "common_equity_tier_1": "CET1",
+    "additional_tier_1": "AT1",
+    "tier_2": "Tier 2",
+    "total_own_funds": "Total Own Funds",
+}
+
+
+@dataclass
+class OwnFundsPanel:
+    """Own Funds history as a dense (entities, periods, fields) array."""
+
+    entities: np.ndarray
+    periods: np.ndarray
+    values: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, str, float, float, float, float]]) -> "OwnFundsPanel":
+        """
+        Build a panel from (entity, period, cet1, at1, tier_2, total) rows.
+
+        Periods are ordered lexicographically, so use ISO dates. If an
+        (entity, period) appears more than once the last row wins.
+        """
+        rows = list(rows)
+        if not rows:
+            return cls(np.array([], dtype=object), np.array([], dtype=object),
+                       np.empty((0, 0, len(FIELDS))))
+
+        entity_col, period_col, *figures = zip(*rows)
+        entities, entity_idx = np.unique(np.array(entity_col, dtype=object), return_inverse=True)
+        periods, period_idx = np.unique(np.array(period_col, dtype=object), return_inverse=True)
+
+        values = np.full((len(entities), len(periods), len(FIELDS)), np.nan)
+        values[entity_idx, period_idx] = np.column_stack(figures).astype(float)
+        return cls(entities, periods, values)
+
+    @classmethod
+    def from_run_store(cls, store, entities: Sequence[str] = None) -> "OwnFundsPanel":
+        """Load the latest successful run per (entity, period) from a RunStore."""
+        return cls.from_rows(store.own_funds_history(entities))
+
+
+@dataclass
+class Movement:
+    """One flagged period-over-period movement."""
+
+    entity: str
+    field: str
+    period: str
+    previous_period: str
+    previous: float
+    current: float
+    absolute_change: float
+    relative_change: float
+    zscore: float
+
+    def to_warning(self) -> str:
+        label = FIELD_LABELS[self.field]
+        relative = f"{self.relative_change:+.1%}" if np.isfinite(self.relative_change) else "n/a"
+        message = (
+            f"VARIANCE WARNING: {label} moved {relative} ({self.absolute_change:+,.0f}) "
+            f"from {self.previous:,.0f} at {self.previous_period} to {self.current:,.0f} "
+            f"at {self.period}."
+        )
+        if np.isfinite(self.zscore):
+            message += f" This is {abs(self.zscore):.1f} std from the entity's recent movements."
+        return message + " Please provide an explanation for the supervisor."
+
+
+@dataclass
+class VarianceResult:
+    """Vectorized variance statistics for a panel; arrays are (entities, periods, fields)."""
+
+    panel: OwnFundsPanel
+    previous: np.ndarray
+    previous_period: np.ndarray
+    absolute_change: np.ndarray
+    relative_change: np.ndarray
+    rolling_mean: np.ndarray
+    rolling_std: np.ndarray
+    zscore: np.ndarray
+    flagged: np.ndarray
+
+    def movements(self, entity: str = None, period: str = None) -> List[Movement]:
+        """Flagged movements, optionally for one entity and/or period."""
+        mask = self.flagged.copy()
+        if entity is not None:
+            mask &= (self.panel.entities == entity)[:, None, None]
+        if period is not None:
+            mask &= (self.panel.periods == period)[None, :, None]
+
+        movements = []
+        for e, p, f in zip(*np.nonzero(mask)):
+            movements.append(Movement(
+                entity=self.panel.entities[e],
+                field=FIELDS[f],
+                period=self.panel.periods[p],
+                previous_period=self.panel.periods[self.previous_period[e, p]],
+                previous=float(self.previous[e, p, f]),
+                current=float(self.panel.values[e, p, f]),
+                absolute_change=float(self.absolute_change[e, p, f]),
+                relative_change=float(self.relative_change[e, p, f]),
+                zscore=float(self.zscore[e, p, f]),
+            ))
+        return movements
+
+    def warnings(self, entity: str, period: str) -> List[str]:
+        """Warning messages for one entity's movements into a period."""
+        return [movement.to_warning() for movement in self.movements(entity, period)]
+
+
+class VarianceAnalyzer:
+    """Flags large period-over-period movements in Own Funds."""
+
+    def __init__(
+        self,
+        rel_threshold: float = None,
+        abs_threshold: float = None,
+        window: int = None,
+        z_threshold: float = None
+    ):
+        """Initialize with thresholds (defaults from config)."""
+        self.rel_threshold = rel_threshold if rel_threshold is not None else config.VARIANCE_REL_THRESHOLD
+        self.abs_threshold = abs_threshold if abs_threshold is not None else config.VARIANCE_ABS_THRESHOLD
+        self.window = window or config.VARIANCE_ROLLING_WINDOW
+        self.z_threshold = z_threshold if z_threshold is not None else config.VARIANCE_Z_THRESHOLD
+
+    def analyse(self, panel: OwnFundsPanel) -> VarianceResult:
+        """
+        Compute changes, threshold breaches and rolling statistics for every
+        entity, period and field at once.
+
+        Args:
+            panel: Own Funds history
+
+        Returns:
+            VarianceResult with (entities, periods, fields) arrays
+        """
+        values = panel.values
+        n_entities, n_periods, _ = values.shape
+
+        # Carry the last reported value forward so each period is compared
+        # with the entity's previous reported period
+        reported = ~np.isnan(values[..., 0])
+        last_seen = np.where(reported, np.arange(n_periods)[None, :], -1)
+        np.maximum.accumulate(last_seen, axis=1, out=last_seen)
+        previous_period = np.full((n_entities, n_periods), -1)
+        previous_period[:, 1:] = last_seen[:, :-1]
+
+        has_previous = (previous_period >= 0) & reported
+        previous = np.full_like(values, np.nan)
+        rows, cols = np.nonzero(has_previous)
+        previous[rows, cols] = values[rows, previous_period[rows, cols]]
+
+        absolute = values - previous
+        with np.errstate(divide="ignore", invalid="ignore"):
+            relative = np.where(previous != 0, absolute / np.abs(previous),
+                                np.where(absolute != 0, np.inf, 0.0))
+        relative[np.isnan(absolute)] = np.nan
+
+        # Rolling mean/std of the previous `window` finite relative changes
+        finite = np.where(np.isfinite(relative), relative, np.nan)
+        padded = np.concatenate(
+            [np.full((n_entities, self.window, len(FIELDS)), np.nan), finite[:, :-1]], axis=1
+        )
+        windows = sliding_window_view(padded, self.window, axis=1)[:, :n_periods]
+        with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+            # All-NaN windows (no history yet) are expected
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            counts = np.sum(~np.isnan(windows), axis=-1)
+            rolling_mean = np.nanmean(windows, axis=-1)
+            rolling_std = np.nanstd(windows, axis=-1, ddof=1)
+            zscore = np.where(
+                (counts >= self.window) & (rolling_std > 0), (finite - rolling_mean) / rolling_std, np.nan
+            )
+
+        with np.errstate(invalid="ignore"):
+            breach = (np.abs(relative) > self.rel_threshold) & (np.abs(absolute) > self.abs_threshold)
+            unusual = np.abs(zscore) > self.z_threshold
+
+        return VarianceResult(
+            panel=panel,
+            previous=previous,
+            previous_period=previous_period,
+            absolute_change=absolute,
+            relative_change=relative,
+            rolling_mean=rolling_mean,
+            rolling_std=rolling_std,
+            zscore=zscore,
+            flagged=breach | unusual,
+        )
+
+    def annotate(
+        self,
+        output: CorepOutput,
+        entity: str,
+        period: str,
+        store
+    ) -> List[str]:
+        """
+        Compare an output with the entity's stored history and attach flagged
+        movements into ``period`` to ``output.warnings``.
+
+        Args:
+            output: Validated output for the entity and period
+            entity: Reporting entity
+            period: Reporting reference date of ``output``
+            store: RunStore holding earlier runs
+
+        Returns:
+            The warnings that were added
+        """
+        own_funds = output.own_funds
+        rows = [row for row in store.own_funds_history([entity]) if row[1] != period]
+        rows.append((entity, period) + tuple(getattr(own_funds, name) for name in FIELDS))
+
+        added = self.analyse(OwnFundsPanel.from_rows(rows)).warnings(entity, period)
+        output.warnings.extend(added)
+        return added
@@ -1,12 +1,19 @@
 """
 Streamlit Frontend for PRA COREP Reporting Assistant.
 """
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 import pandas as pd
 import json
 
-from pipeline import CorepPipeline
+from pipeline import CorepPipeline, PIPELINE_STAGES
 from models.corep import CorepOutput
+import config
 
 # Page Config
 st.set_page_config(
@@ -46,12 +53,71 @@ st.markdown("""
 def get_pipeline():
     return CorepPipeline()
 
+
+class WarmUp:
+    """Loads the embedding model and builds the index in a background thread."""
+    
+    def __init__(self, pipeline: CorepPipeline):
+        self.error = None
+        self.thread = threading.Thread(
+            target=self._run, args=(pipeline,), name="corep-warmup", daemon=True
+        )
+        self.thread.start()
+    
+    def _run(self, pipeline: CorepPipeline):
+        try:
+            pipeline.warm_up()
+        except Exception as e:
+            self.error = str(e)
+
+
+class RunProgress:
+    """Thread-safe per-stage status written by the worker, read by the script."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {stage: "pending" for stage, _ in PIPELINE_STAGES}
+    
+    def update(self, stage: str, status: str):
+        with self._lock:
+            self._stages[stage] = status
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._stages)
+
+
+# Shared across sessions: warm-up starts once per process, runs share a pool
+@st.cache_resource
+def start_warm_up(_pipeline: CorepPipeline) -> WarmUp:
+    return WarmUp(_pipeline)
+
+
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=config.APP_RUN_WORKERS, thread_name_prefix="corep-run")
+
+
 try:
     pipeline = get_pipeline()
 except Exception as e:
     st.error(f"Failed to initialize pipeline: {e}")
     st.stop()
 
+warm_up = start_warm_up(pipeline)
+executor = get_executor()
+
+# Per-session state: finished results (the most recent few) and in-flight
+# runs, keyed by scenario
+if "results" not in st.session_state:
+    st.session_state.results = OrderedDict()
+if "jobs" not in st.session_state:
+    st.session_state.jobs = {}
+# Edits to the scenario re-run incrementally against this session's last run
+if "scenario_session" not in st.session_state:
+    st.session_state.scenario_session = pipeline.start_session()
+scenario_session = st.session_state.scenario_session
+
 
 # Sidebar
 with st.sidebar:
@@ -61,6 +127,13 @@ with st.sidebar:
     st.markdown("### ⚙️ Settings")
     model_name = st.text_input("Model Name", value="gemini-2.5-flash", disabled=True)
     
+    if warm_up.error:
+        st.error(f"Warm-up failed: {warm_up.error}")
+    elif pipeline.is_ready:
+        st.success("Embedding model and index loaded")
+    else:
+        st.warning("Loading embedding model and index in the background...")
+    
     st.markdown("---")
     st.markdown("### ℹ️ About")
     st.info(
@@ -68,10 +141,6 @@ with st.sidebar:
         "and generates compliant data structures based on your input."
     )
 
-# Helper: Rule Text Map
-from knowledge_base.corpus import REGULATORY_CORPUS
-CORPUS_MAP = {chunk["id"]: f"{chunk['source']} {chunk['paragraph']}: {chunk['text']}" for chunk in REGULATORY_CORPUS}
-
 # Main Content
 st.markdown('<div class="main-header">🏦 PRA COREP Reporting Assistant</div>', unsafe_allow_html=True)
 st.markdown(
@@ -87,50 +156,116 @@ query = st.text_area(
     help="Enter details about your capital instruments, reserves, and deductions."
 )
 
+
+def scenario_key(text: str) -> str:
+    """Cache key for a scenario: identical up to surrounding whitespace."""
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+
+def render_progress(placeholder, progress: RunProgress):
+    icons = {"pending": "⏸️", "running": "⏳", "done": "✅"}
+    stages = progress.snapshot()
+    placeholder.markdown("  \n".join(
+        f"{icons.get(stages[stage], '⏸️')} {label}" for stage, label in PIPELINE_STAGES
+    ))
+
+
+def remember_result(results: OrderedDict, key: str, output: CorepOutput) -> None:
+    """Keep a finished result, dropping the least recently viewed beyond the limit."""
+    results[key] = output
+    results.move_to_end(key)
+    while len(results) > config.APP_MAX_SESSION_RESULTS:
+        results.popitem(last=False)
+
+
+key = scenario_key(query)
+results = st.session_state.results
+jobs = st.session_state.jobs
+
+# Collect runs that finished while another scenario was shown, so their
+# futures do not pile up in the session (failures are dropped; clicking
+# the scenario again retries it)
+for done_key in [job_key for job_key, (future, _) in jobs.items() if job_key != key and future.done()]:
+    future, _ = jobs.pop(done_key)
+    if not future.cancelled() and future.exception() is None:
+        remember_result(results, done_key, future.result())
+
 if st.button("Generate Report", type="primary"):
-    with st.spinner("🔍 Analysing regulations and generating data..."):
-        try:
-            # Run Pipeline
-            output: CorepOutput = pipeline.run(query)
-            
-            # --- High Level Summary Metrics ---
-            st.markdown("### 📊 Regulatory Capital Position")
-            c1, c2, c3, c4 = st.columns(4)
-            c1.metric("CET1 Capital", f"£{output.own_funds.common_equity_tier_1:,.2f}m")
-            c2.metric("AT1 Capital", f"£{output.own_funds.additional_tier_1:,.2f}m")
-            c3.metric("Tier 2 Capital", f"£{output.own_funds.tier_2:,.2f}m")
-            c4.metric("Total Own Funds", f"£{output.own_funds.total_own_funds:,.2f}m")
-            
-            st.markdown("---")
-            
-            # --- Detailed Breakdown & Reasoning ---
-            st.subheader("📝 Regulatory Analysis & Reasoning")
-            
-            # Sort audit log by specific order if possible
-            # We want CET1 -> AT1 -> T2 -> Total
+    # Only start work that is neither done nor already running for this scenario
+    if key not in results and key not in jobs:
+        progress = RunProgress()
+        jobs[key] = (executor.submit(scenario_session.run, query, progress.update), progress)
+
+# Follow an in-flight run without blocking it: the pipeline runs on the pool,
+# this loop only polls. A rerun interrupts the loop, not the run.
+if key in jobs:
+    future, progress = jobs[key]
+    st.markdown("#### 🔍 Analysing regulations and generating data...")
+    placeholder = st.empty()
+    while not future.done():
+        render_progress(placeholder, progress)
+        time.sleep(0.25)
+    render_progress(placeholder, progress)
+    del jobs[key]
+    placeholder.empty()
+    try:
+        remember_result(results, key, future.result())
+    except Exception as e:
+        # Not cached, so clicking again retries
+        st.error(f"An error occurred during processing: {str(e)}")
+
+if key in results:
+    results.move_to_end(key)
+    output: CorepOutput = results[key]
+    
+    # --- High Level Summary Metrics ---
+    st.markdown("### 📊 Regulatory Capital Position")
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("CET1 Capital", f"£{output.own_funds.common_equity_tier_1:,.2f}m")
+    c2.metric("AT1 Capital", f"£{output.own_funds.additional_tier_1:,.2f}m")
+    c3.metric("Tier 2 Capital", f"£{output.own_funds.tier_2:,.2f}m")
+    c4.metric("Total Own Funds", f"£{output.own_funds.total_own_funds:,.2f}m")
+    
+    update = scenario_session.last_update
+    if scenario_session.question == query and update.get("mode") in ("partial", "local"):
+        reasked = ", ".join(update["reasked_fields"]) or "none"
+        st.caption(
+            f"♻️ Updated incrementally from the previous version in {update['seconds']:.1f}s "
+            f"(re-asked: {reasked}; retrieval {'redone' if update['retrieved'] else 'reused'})"
+        )
+    
+    st.markdown("---")
+    
+    # --- Detailed Breakdown & Reasoning ---
+    st.subheader("📝 Regulatory Analysis & Reasoning")
+    
+    # Sort audit log by specific order if possible
+    # We want CET1 -> AT1 -> T2 -> Total
+    
+    for item in output.audit_log:
+        # Create a readable card for each item
+        with st.expander(f"🔹 {item.field.replace('_', ' ').title()} = £{item.value:,.2f}m", expanded=True):
+            st.markdown(f"**Reasoning:** {item.explanation}")
             
-            for item in output.audit_log:
-                # Create a readable card for each item
-                with st.expander(f"🔹 {item.field.replace('_', ' ').title()} = £{item.value:,.2f}m", expanded=True):
-                    st.markdown(f"**Reasoning:** {item.explanation}")
-                    
-                    if item.rule_ids:
-                        st.markdown("**📜 Applied Regulatory Rules:**")
-                        for rule_id in item.rule_ids:
-                            rule_text = CORPUS_MAP.get(rule_id, "Rule text not found.")
-                            st.info(f"**{rule_id}**: {rule_text}")
-
-            # --- Validation Section ---
-            if output.warnings:
-                st.error("⚠️ Compliance Warnings Detected")
-                for warning in output.warnings:
-                    st.markdown(f"- {warning}")
-            else:
-                st.success("✅ All data passes basic validation checks.")
-
-            # --- Raw Data Tab ---
-            with st.expander("🔍 View Raw API Output (JSON)"):
-                st.json(output.model_dump())
-                
-        except Exception as e:
-            st.error(f"An error occurred during processing: {str(e)}")
+            if item.rule_ids:
+                st.markdown("**📜 Applied Regulatory Rules:**")
+                for rule_id in item.rule_ids:
+                    # O(1) lookup in the memory-mapped chunk store
+                    rule = pipeline.get_chunk(rule_id)
+                    rule_text = (
+                        f"{rule.source} {rule.paragraph}: {rule.text}" if rule
+                        else "Rule text not found."
+                    )
+                    st.info(f"**{rule_id}**: {rule_text}")
+
+    # --- Validation Section ---
+    if output.warnings:
+        st.error("⚠️ Compliance Warnings Detected")
+        for warning in output.warnings:
+            st.markdown(f"- {warning}")
+    else:
+        st.success("✅ All data passes basic validation checks.")
+
+    # --- Raw Data Tab ---
+    with st.expander("🔍 View Raw API Output (JSON)"):
+        st.json(output.model_dump())
@@ -2,6 +2,7 @@
 Configuration module for PRA COREP Reporting Assistant.
 """
 import os
+import tempfile
 
 # Gemini API Configuration
 def get_gemini_key():
@@ -24,11 +25,167 @@ GEMINI_API_KEY = get_gemini_key()
 # GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 
+# Model Cascade Configuration
+# When enabled, each request is tried on the cheapest tier first and only
+# escalated to the next tier if the response fails to parse or validate.
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "false").lower() == "true"
+CASCADE_TIERS = [
+    {
+        "name": "fast",
+        "model": os.getenv("GEMINI_FAST_MODEL", "gemini-2.5-flash-lite"),
+        "cost_per_1k_input_tokens": 0.0001,
+        "cost_per_1k_output_tokens": 0.0004,
+    },
+    {
+        "name": "strong",
+        "model": os.getenv("GEMINI_STRONG_MODEL", GEMINI_MODEL),
+        "cost_per_1k_input_tokens": 0.0003,
+        "cost_per_1k_output_tokens": 0.0025,
+    },
+]
+
+# LLM Rate Limiting Configuration
+# Shared client-side limits across all sessions in a process (0 = unlimited)
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "250000"))
+LLM_EXPECTED_OUTPUT_TOKENS = 1000
+LLM_MAX_RETRIES = 5
+LLM_BACKOFF_BASE = 1.0
+LLM_BACKOFF_MAX = 30.0
+
+# LLM Hedging Configuration
+# Opt-in: issue a duplicate request when the first is slower than the
+# given latency percentile, capped at LLM_HEDGE_BUDGET extra requests per request.
+LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_DELAY = 2.0
+LLM_HEDGE_INITIAL_DELAY = 20.0
+LLM_HEDGE_MIN_SAMPLES = 20
+LLM_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.1"))
+LLM_HEDGE_MAX_WORKERS = 16
+
 # Embedding Configuration
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 
+# Shared Embedding Server (optional)
+# When set, EmbeddingGenerator sends encode requests to the server on this
+# Unix socket instead of loading the model in every worker process.
+EMBEDDING_SERVER_SOCKET = os.getenv("EMBEDDING_SERVER_SOCKET", "")
+EMBEDDING_SERVER_MAX_BATCH = 64
+EMBEDDING_SERVER_MAX_WAIT_MS = 5.0
+
+# Concurrency Configuration
+# Concurrent encodes share the cores: EMBEDDING_MAX_CONCURRENCY encodes may run
+# at once, each with EMBEDDING_INTRA_OP_THREADS torch threads. Single-query
+# FAISS searches are fastest single-threaded.
+CPU_COUNT = os.cpu_count() or 1
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "2"))
+EMBEDDING_INTRA_OP_THREADS = int(os.getenv(
+    "EMBEDDING_INTRA_OP_THREADS",
+    str(max(1, CPU_COUNT // EMBEDDING_MAX_CONCURRENCY))
+))
+FAISS_OMP_THREADS = int(os.getenv("FAISS_OMP_THREADS", "1"))
+
 # Retrieval Configuration
 TOP_K_CHUNKS = 3
 
+# Reranking Configuration
+# Second stage: FAISS returns RERANK_CANDIDATES chunks, a cross-encoder
+# rescores them and only the best RERANK_TOP_N go into the prompt.
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = 20
+RERANK_TOP_N = 3
+RERANK_CACHE_SIZE = 10000
+
+# Incremental Re-run Configuration
+# Cosine distance between the edited and previous query embeddings above
+# which a ScenarioSession redoes retrieval instead of reusing its chunks
+INCREMENTAL_RETRIEVAL_DRIFT = 0.05
+
+# Template Sharding Configuration
+# Comma-separated COREP templates this process serves, e.g. "C 01.00,C 03.00".
+# Empty means all registered templates. Shards are built on first use.
+SERVED_TEMPLATES = [t.strip() for t in os.getenv("SERVED_TEMPLATES", "").split(",") if t.strip()]
+ROUTER_MAX_SHARDS = 2
+
+# Chunk Store Configuration
+# Memory-mapped chunk stores are written here and shared by worker processes
+CHUNK_STORE_DIR = os.getenv(
+    "CHUNK_STORE_DIR", os.path.join(tempfile.gettempdir(), "corep-chunk-store")
+)
+# Columns with at most this many distinct values get precomputed filter bitsets
+FILTER_BITSET_MAX_VALUES = 256
+
+# Vector Compression Configuration
+# FAISS index-factory string: "Flat" (uncompressed), "SQfp16", "SQ8",
+# "PQ48", "PCA128,SQ8", ... See retrieval/index_factory.py.
+VECTOR_INDEX_FACTORY = os.getenv("VECTOR_INDEX_FACTORY", "Flat")
+
+# Run History Configuration
+# SQLite file recording every pipeline run; empty disables the run store
+RUN_STORE_PATH = os.getenv("RUN_STORE_PATH", "")
+# Runs written per transaction by batch and queue-worker runs (interactive
+# runs are written one at a time)
+RUN_STORE_BATCH_SIZE = 50
+
+# Variance Analysis Configuration
+# Period-over-period movements are flagged when both thresholds are
+# exceeded, or when a movement is VARIANCE_Z_THRESHOLD standard deviations
+# from the entity's previous VARIANCE_ROLLING_WINDOW movements.
+VARIANCE_REL_THRESHOLD = 0.10
+VARIANCE_ABS_THRESHOLD = 0.0
+VARIANCE_ROLLING_WINDOW = 8
+VARIANCE_Z_THRESHOLD = 3.0
+
+# Consolidation Configuration
+# Fraction of minority (third-party) interest in a subsidiary's own funds
+# recognised in the parent's consolidated own funds
+CONSOLIDATION_MINORITY_RECOGNITION = 0.0
+
+# Batch CLI Configuration
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+# Scenarios submitted ahead of completion, per worker
+BATCH_MAX_IN_FLIGHT_PER_WORKER = 2
+# Latencies sampled for the end-of-batch percentiles (memory stays flat)
+BATCH_LATENCY_SAMPLES = 10000
+
+# Job Queue Configuration
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "corep_jobs.db")
+# A worker that stops heartbeating loses its jobs after this many seconds
+JOB_LEASE_SECONDS = 300.0
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_BACKOFF = 30.0
+JOB_BATCH_SIZE = 8
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+JOB_POLL_INTERVAL = 1.0
+
+# Export Configuration
+EXPORT_CURRENCY = os.getenv("EXPORT_CURRENCY", "GBP")
+EXPORT_DECIMALS = 2
+# Write buffer per exported table file
+EXPORT_BUFFER_BYTES = 1 << 20
+# Rows buffered per Parquet row group
+EXPORT_PARQUET_BATCH_ROWS = 65536
+EXPORT_PARQUET_COMPRESSION = "zstd"
+
+# Profiling Configuration (enabled with main.py --profile)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Functions and allocation sites listed per stage in summary.txt
+PROFILE_TOP_N = 15
+# Stack depth recorded by tracemalloc per allocation
+PROFILE_TRACEMALLOC_FRAMES = 1
+
 # Validation Tolerance (for floating point comparisons)
 VALIDATION_TOLERANCE = 0.01
+
+# API Server Configuration
+SERVER_MAX_CONCURRENCY = int(os.getenv("SERVER_MAX_CONCURRENCY", "4"))
+SERVER_MAX_QUEUE = int(os.getenv("SERVER_MAX_QUEUE", "16"))
+SERVER_RETRY_AFTER_SECONDS = 5
+
+# Streamlit App Configuration
+# Pipeline runs executing at once, shared by all browser sessions
+APP_RUN_WORKERS = int(os.getenv("APP_RUN_WORKERS", "4"))
+# Finished scenario results kept per browser session (least recently viewed dropped first)
+APP_MAX_SESSION_RESULTS = 10
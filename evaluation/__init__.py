@@ -0,0 +1,4 @@
+"""Evaluation package: retrieval quality and latency against a golden question set."""
+from .harness import GoldenQuestion, RetrievalReport, load_golden_set, evaluate_retrieval
+
+__all__ = ["GoldenQuestion", "RetrievalReport", "load_golden_set", "evaluate_retrieval"]
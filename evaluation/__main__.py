@@ -0,0 +1,96 @@
+"""
+Compare retrieval configurations on the golden question set.
+
+Every combination of --embedding-model and --index-factory is built and
+scored side by side.
+
+Run with:
+    python -m evaluation -k 1 3 5 --index-factory Flat --index-factory SQ8
+    python -m evaluation --queries 5000 --batch-size 256
+"""
+import argparse
+import itertools
+import json
+import sys
+
+from tabulate import tabulate
+
+from knowledge_base import TEMPLATES
+from retrieval import CrossEncoderReranker, EmbeddingGenerator, ShardedVectorStore, TwoStageRetriever
+from .harness import evaluate_retrieval, load_golden_set
+import config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency")
+    parser.add_argument("--golden", help="Golden set JSONL (default: bundled set)")
+    parser.add_argument("-k", type=int, nargs="+", default=[1, config.TOP_K_CHUNKS, 5],
+                        help="Cut-offs for recall@k")
+    parser.add_argument("--embedding-model", action="append",
+                        help="Embedding model to compare (repeatable, default from config)")
+    parser.add_argument("--index-factory", action="append",
+                        help="FAISS index-factory string to compare (repeatable, default from config)")
+    parser.add_argument("--rerank", type=int, nargs="?", const=config.RERANK_CANDIDATES, default=0,
+                        metavar="CANDIDATES",
+                        help="Also score each config with cross-encoder reranking of N candidates")
+    parser.add_argument("--all-shards", action="store_true",
+                        help="Search every template shard instead of routing each question")
+    parser.add_argument("--queries", type=int, default=0,
+                        help="Cycle the golden set up to N queries (load testing)")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Queries per retrieve_batch call (1 = one retrieve per query)")
+    parser.add_argument("--json", dest="json_path", help="Also write the reports to this JSON file")
+    args = parser.parse_args()
+
+    golden = load_golden_set(args.golden)
+    if args.queries:
+        golden = list(itertools.islice(itertools.cycle(golden), args.queries))
+
+    models = args.embedding_model or [config.EMBEDDING_MODEL]
+    factories = args.index_factory or [config.VECTOR_INDEX_FACTORY]
+
+    reports = []
+    # Cache disabled so every rerank row times the cross-encoder itself, not
+    # score-cache hits from earlier configs or repeated --queries cycles;
+    # evaluate_retrieval resets the counters before each timed run
+    reranker = CrossEncoderReranker(cache_size=0) if args.rerank else None
+    rerank_metrics = []
+    for model, factory in itertools.product(models, factories):
+        name = f"{model} / {factory}"
+        print(f"🔍 Evaluating {name} on {len(golden):,} queries...", file=sys.stderr)
+        store = ShardedVectorStore(
+            EmbeddingGenerator(model),
+            templates=list(TEMPLATES),
+            index_factory=factory
+        )
+        templates = store.templates if args.all_shards else None
+        reports.append(evaluate_retrieval(
+            store, golden, args.k, args.batch_size, name, templates=templates
+        ))
+        if reranker is not None:
+            reports.append(evaluate_retrieval(
+                TwoStageRetriever(store, reranker, args.rerank), golden, args.k,
+                args.batch_size, f"{name} + rerank@{args.rerank}", templates=templates
+            ))
+            rerank_metrics.append((name, reranker.get_metrics()))
+
+    ks = sorted(set(args.k))
+    print()
+    print(tabulate(
+        [report.to_row() for report in reports],
+        headers=["Config"] + [f"R@{k}" for k in ks] + ["MRR", "p50 ms", "p95 ms", "p99 ms", "q/s"],
+        tablefmt="simple"
+    ))
+
+    for name, metrics in rerank_metrics:
+        print(f"\n🔁 Rerank ({name}): {metrics['avg_rerank_ms']} ms/query, "
+              f"{metrics['pairs_scored']:,} pairs scored")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump([report.to_dict() for report in reports], f, indent=2)
+        print(f"\n✅ Wrote {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
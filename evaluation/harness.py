@@ -0,0 +1,174 @@
+"""
+Retrieval evaluation: recall@k, MRR and latency percentiles over a golden set.
+
+Each golden question lists the RegulatoryChunk IDs a correct retrieval
+must return. The harness runs the questions through a store's
+``retrieve`` (one query at a time, for realistic latency) or
+``retrieve_batch`` (batched embedding and search, for thousands of
+queries) and scores the ranked chunk IDs.
+"""
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+GOLDEN_SET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden_questions.jsonl")
+
+
+@dataclass(frozen=True)
+class GoldenQuestion:
+    """A question and the chunk IDs a correct retrieval returns."""
+
+    question: str
+    expected_ids: Tuple[str, ...]
+
+
+def load_golden_set(path: str = None) -> List[GoldenQuestion]:
+    """Load golden questions from a JSONL file (default: the bundled set)."""
+    questions = []
+    with open(path or GOLDEN_SET_PATH, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not record.get("expected_ids"):
+                raise ValueError(f"Golden question on line {line_number} has no expected_ids")
+            questions.append(GoldenQuestion(record["question"], tuple(record["expected_ids"])))
+    return questions
+
+
+@dataclass
+class RetrievalReport:
+    """Quality and latency of one retrieval configuration."""
+
+    name: str
+    queries: int
+    recall_at_k: Dict[int, float]
+    mrr: float
+    latency_ms: List[float] = field(repr=False)
+    elapsed_seconds: float
+
+    def latency_percentile(self, q: float) -> float:
+        """Per-query latency percentile in milliseconds."""
+        return float(np.percentile(self.latency_ms, q)) if self.latency_ms else 0.0
+
+    @property
+    def queries_per_second(self) -> float:
+        return self.queries / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "queries": self.queries,
+            "recall_at_k": {str(k): round(v, 4) for k, v in self.recall_at_k.items()},
+            "mrr": round(self.mrr, 4),
+            "latency_ms": {
+                "p50": round(self.latency_percentile(50), 3),
+                "p95": round(self.latency_percentile(95), 3),
+                "p99": round(self.latency_percentile(99), 3),
+            },
+            "queries_per_second": round(self.queries_per_second, 1),
+        }
+
+    def to_row(self) -> List[str]:
+        return (
+            [self.name]
+            + [f"{self.recall_at_k[k]:.3f}" for k in sorted(self.recall_at_k)]
+            + [
+                f"{self.mrr:.3f}",
+                f"{self.latency_percentile(50):.2f}",
+                f"{self.latency_percentile(95):.2f}",
+                f"{self.latency_percentile(99):.2f}",
+                f"{self.queries_per_second:,.1f}",
+            ]
+        )
+
+
+def _score(ranked_ids: List[str], expected: Tuple[str, ...], ks: Sequence[int]) -> Tuple[Dict[int, float], float]:
+    expected_set = set(expected)
+    recall = {k: len(expected_set.intersection(ranked_ids[:k])) / len(expected_set) for k in ks}
+    reciprocal_rank = next(
+        (1.0 / rank for rank, chunk_id in enumerate(ranked_ids, 1) if chunk_id in expected_set), 0.0
+    )
+    return recall, reciprocal_rank
+
+
+def evaluate_retrieval(
+    store,
+    golden: Sequence[GoldenQuestion],
+    ks: Sequence[int] = (1, 3, 5),
+    batch_size: int = 1,
+    name: str = "default",
+    **retrieve_kwargs
+) -> RetrievalReport:
+    """
+    Run the golden set through a store and score the results.
+
+    Args:
+        store: VectorStore, ShardedVectorStore or TwoStageRetriever
+            (needs retrieve/retrieve_batch)
+        golden: Questions to run; repeat entries to scale up the load
+        ks: Cut-offs for recall@k; retrieval runs once at max(ks)
+        batch_size: 1 times each retrieve() call; larger values use
+            retrieve_batch() and attribute each batch's time evenly to
+            its queries
+        name: Label for the report
+        **retrieve_kwargs: Passed through to retrieve/retrieve_batch
+            (e.g. filters, or templates for a ShardedVectorStore)
+
+    Returns:
+        RetrievalReport with mean recall@k, MRR and latency percentiles
+    """
+    ks = sorted(set(ks))
+    top_k = ks[-1]
+    questions = [item.question for item in golden]
+
+    # Build lazily loaded shards and load models before timing
+    if hasattr(store, "load"):
+        store.load()
+    store.retrieve(questions[0], top_k, **retrieve_kwargs)
+    # Keep the warm-up query out of a reranker's score cache and latency counters
+    reranker = getattr(store, "reranker", None)
+    if reranker is not None:
+        reranker.reset()
+
+    ranked: List[List[str]] = []
+    latency_ms: List[float] = []
+    started = time.perf_counter()
+    if batch_size <= 1:
+        for question in questions:
+            t0 = time.perf_counter()
+            hits = store.retrieve(question, top_k, **retrieve_kwargs)
+            latency_ms.append((time.perf_counter() - t0) * 1000)
+            ranked.append([chunk.id for chunk, _ in hits])
+    else:
+        for start in range(0, len(questions), batch_size):
+            batch = questions[start:start + batch_size]
+            t0 = time.perf_counter()
+            batch_hits = store.retrieve_batch(batch, top_k, **retrieve_kwargs)
+            per_query = (time.perf_counter() - t0) * 1000 / len(batch)
+            latency_ms.extend([per_query] * len(batch))
+            ranked.extend([chunk.id for chunk, _ in hits] for hits in batch_hits)
+    elapsed = time.perf_counter() - started
+
+    recall_sums = {k: 0.0 for k in ks}
+    rr_sum = 0.0
+    for item, ids in zip(golden, ranked):
+        recall, reciprocal_rank = _score(ids, item.expected_ids, ks)
+        for k in ks:
+            recall_sums[k] += recall[k]
+        rr_sum += reciprocal_rank
+
+    count = len(golden)
+    return RetrievalReport(
+        name=name,
+        queries=count,
+        recall_at_k={k: recall_sums[k] / count for k in ks},
+        mrr=rr_sum / count,
+        latency_ms=latency_ms,
+        elapsed_seconds=elapsed,
+    )
@@ -0,0 +1,5 @@
+"""Jobs package: durable SQLite job queue and pipeline workers."""
+from .queue import Job, JobQueue, QUEUED, LEASED, DONE, DEAD
+from .worker import Worker
+
+__all__ = ["Job", "JobQueue", "QUEUED", "LEASED", "DONE", "DEAD", "Worker"]
@@ -0,0 +1,123 @@
+"""
+Job queue CLI.
+
+    python -m jobs enqueue scenarios.jsonl      # one job per line: {"question": ..., "entity": ..., "period": ..., "id": ...}
+    python -m jobs work --concurrency 4         # run a worker (start one per core group / machine)
+    python -m jobs stats
+    python -m jobs dead
+    python -m jobs requeue [JOB_ID ...]
+    python -m jobs result JOB_ID
+"""
+import argparse
+import json
+import signal
+import sys
+
+from .queue import JobQueue
+from .worker import Worker
+import config
+
+
+def _parse_job(line: str) -> dict:
+    """One job from a JSONL line; ValueError if it cannot be queued."""
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Malformed JSON: {e}") from None
+    if not isinstance(record, dict):
+        raise ValueError(f"Expected a JSON object, got {type(record).__name__}")
+    if not record.get("question"):
+        raise ValueError("Job has no question")
+    return record
+
+
+def _enqueue(queue: JobQueue, args: argparse.Namespace) -> None:
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    total = added = rejected = 0
+    with source:
+        batch, keys = [], []
+        for line_number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            # A bad line is reported and skipped; it must not strand the
+            # batches already committed before it
+            try:
+                record = _parse_job(line)
+            except ValueError as e:
+                print(f"⚠️  Input line {line_number}: {e}", file=sys.stderr)
+                rejected += 1
+                continue
+            batch.append(record)
+            keys.append(str(record["id"]) if record.get("id") is not None else None)
+            if len(batch) >= 1000:
+                added += sum(job_id is not None for job_id in queue.enqueue_many(batch, args.priority, keys))
+                total += len(batch)
+                batch, keys = [], []
+        if batch:
+            added += sum(job_id is not None for job_id in queue.enqueue_many(batch, args.priority, keys))
+            total += len(batch)
+    print(f"✅ Enqueued {added} job(s) ({total - added} already queued)")
+    if rejected:
+        raise SystemExit(f"❌ Skipped {rejected} invalid input line(s); fix and enqueue them again")
+
+
+def _work(queue: JobQueue, args: argparse.Namespace) -> None:
+    from pipeline import CorepPipeline
+    from reasoning import BATCH
+
+    pipeline = CorepPipeline(priority=BATCH, record_batch_size=config.RUN_STORE_BATCH_SIZE)
+    pipeline.warm_up()
+
+    worker = Worker(queue, pipeline, batch_size=args.batch_size, concurrency=args.concurrency)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    print(f"👷 Worker {worker.worker_id} started ({worker.concurrency} concurrent, "
+          f"batches of {worker.batch_size})")
+    try:
+        worker.run(max_jobs=args.max_jobs, exit_when_empty=args.exit_when_empty)
+    except KeyboardInterrupt:
+        worker.stop()
+    print(f"👋 Worker stopped: {json.dumps(worker.get_metrics())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="COREP report job queue")
+    parser.add_argument("--queue", default=None, help=f"Queue file (default: {config.JOB_QUEUE_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Add jobs from a JSONL file ('-' for stdin)")
+    enqueue.add_argument("input")
+    enqueue.add_argument("--priority", type=int, default=0, help="Lower runs first")
+
+    work = commands.add_parser("work", help="Run a worker")
+    work.add_argument("--concurrency", type=int, help="Jobs run in parallel")
+    work.add_argument("--batch-size", type=int, help="Jobs leased per round trip")
+    work.add_argument("--max-jobs", type=int, help="Exit after this many jobs")
+    work.add_argument("--exit-when-empty", action="store_true", help="Exit once the queue is drained")
+
+    commands.add_parser("stats", help="Job counts by status")
+    commands.add_parser("dead", help="List dead-lettered jobs")
+    requeue = commands.add_parser("requeue", help="Retry dead-lettered jobs")
+    requeue.add_argument("job_ids", type=int, nargs="*", help="Jobs to retry (default: all)")
+    result = commands.add_parser("result", help="Show a job's status and result")
+    result.add_argument("job_id", type=int)
+
+    args = parser.parse_args()
+    queue = JobQueue(args.queue)
+
+    if args.command == "enqueue":
+        _enqueue(queue, args)
+    elif args.command == "work":
+        _work(queue, args)
+    elif args.command == "stats":
+        print(json.dumps(queue.stats(), indent=2))
+    elif args.command == "dead":
+        for job in queue.dead_letters():
+            print(json.dumps(job))
+    elif args.command == "requeue":
+        print(f"🔁 Requeued {queue.requeue_dead(args.job_ids or None)} job(s)")
+    elif args.command == "result":
+        print(json.dumps(queue.result(args.job_id), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Durable job queue in a SQLite file (no external broker).
+
+Jobs move through:
+
+    queued --lease--> leased --complete--> done
+                        |
+                        +--fail / lease expired--> queued (after backoff)
+                        |                          or dead (attempts exhausted)
+
+A lease is held by one worker until ``lease_expires``; workers extend it
+with heartbeats while a job runs. If a worker crashes its heartbeats stop,
+the lease expires and the next ``lease`` call by any worker picks the job
+up again. Leasing is done in an IMMEDIATE transaction, so concurrent
+workers (threads or processes sharing the file) never receive the same job.
+
+Several machines can share one queue file on a filesystem with working
+POSIX locks; the database runs in WAL mode.
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import config
+
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            INTEGER PRIMARY KEY,
+    job_key       TEXT UNIQUE,
+    payload       TEXT NOT NULL,
+    status        TEXT NOT NULL,
+    priority      INTEGER NOT NULL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL,
+    available_at  REAL NOT NULL,
+    lease_owner   TEXT,
+    lease_expires REAL,
+    created_at    REAL NOT NULL,
+    updated_at    REAL NOT NULL,
+    result        TEXT,
+    last_error    TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, priority, available_at, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs (status, lease_expires);
+"""
+
+
+@dataclass
+class Job:
+    """A leased job."""
+
+    id: int
+    payload: dict
+    attempts: int
+    max_attempts: int
+
+
+class JobQueue:
+    """SQLite-backed job queue with leases, heartbeats, retries and a dead-letter state."""
+
+    def __init__(
+        self,
+        path: str = None,
+        max_attempts: int = None,
+        retry_backoff: float = None,
+        clock=time.time
+    ):
+        """
+        Open (and create if needed) the queue at ``path`` (default from config).
+
+        ``clock`` returns wall-clock seconds; it must agree across every
+        process sharing the queue file.
+        """
+        self.path = path or config.JOB_QUEUE_PATH
+        self._clock = clock
+        self.max_attempts = max_attempts or config.JOB_MAX_ATTEMPTS
+        self.retry_backoff = retry_backoff if retry_backoff is not None else config.JOB_RETRY_BACKOFF
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        conn = self._connection()
+        with conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection, in autocommit mode for explicit transactions."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        """An IMMEDIATE transaction: takes the write lock up front."""
+        return _Immediate(self._connection())
+
+    def enqueue(
+        self,
+        payload: dict,
+        priority: int = 0,
+        job_key: str = None,
+        delay: float = 0.0
+    ) -> Optional[int]:
+        """
+        Add a job.
+
+        Args:
+            payload: JSON-serialisable job data
+            priority: Lower values are leased first
+            job_key: Optional idempotency key; a second job with the same
+                key is ignored
+            delay: Seconds before the job becomes available
+
+        Returns:
+            The job ID, or None if ``job_key`` was already enqueued
+        """
+        ids = self.enqueue_many([payload], priority, [job_key] if job_key else None, delay)
+        return ids[0]
+
+    def enqueue_many(
+        self,
+        payloads: Iterable[dict],
+        priority: int = 0,
+        job_keys: Iterable[Optional[str]] = None,
+        delay: float = 0.0
+    ) -> List[Optional[int]]:
+        """Add many jobs in one transaction (see enqueue)."""
+        now = self._clock()
+        keys = iter(job_keys) if job_keys is not None else None
+        ids = []
+        with self._transaction() as conn:
+            for payload in payloads:
+                key = next(keys) if keys is not None else None
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO jobs (job_key, payload, status, priority, max_attempts, "
+                    "available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, json.dumps(payload), QUEUED, priority, self.max_attempts,
+                     now + delay, now, now)
+                )
+                ids.append(cursor.lastrowid if cursor.rowcount else None)
+        return ids
+
+    def lease(self, worker_id: str, limit: int = 1, lease_seconds: float = None) -> List[Job]:
+        """
+        Lease up to ``limit`` ready jobs for a worker.
+
+        Jobs whose lease has expired (their worker stopped heartbeating) are
+        returned to the queue first, or dead-lettered if out of attempts.
+        """
+        lease_seconds = lease_seconds or config.JOB_LEASE_SECONDS
+        now = self._clock()
+        with self._transaction() as conn:
+            self._reclaim_expired(conn, now)
+            rows = conn.execute(
+                "SELECT id, payload, attempts, max_attempts FROM jobs "
+                "WHERE status = ? AND available_at <= ? ORDER BY priority, available_at, id LIMIT ?",
+                (QUEUED, now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                [(LEASED, worker_id, now + lease_seconds, now, row[0]) for row in rows]
+            )
+        return [
+            Job(id=job_id, payload=json.loads(payload), attempts=attempts + 1, max_attempts=max_attempts)
+            for job_id, payload, attempts, max_attempts in rows
+        ]
+
+    @staticmethod
+    def _reclaim_expired(conn: sqlite3.Connection, now: float) -> None:
+        conn.execute(
+            "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL, "
+            "last_error = 'Lease expired (worker lost)', updated_at = ? "
+            "WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts",
+            (DEAD, now, LEASED, now)
+        )
+        conn.execute(
+            "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL, "
+            "last_error = 'Lease expired (worker lost)', available_at = ?, updated_at = ? "
+            "WHERE status = ? AND lease_expires < ?",
+            (QUEUED, now, now, LEASED, now)
+        )
+
+    def heartbeat(self, worker_id: str, job_ids: Iterable[int], lease_seconds: float = None) -> List[int]:
+        """
+        Extend the leases a worker still holds.
+
+        Returns:
+            IDs whose lease was extended (a job missing here was lost, e.g.
+            after a long pause, and may be running elsewhere)
+        """
+        job_ids = list(job_ids)
+        if not job_ids:
+            return []
+        lease_seconds = lease_seconds or config.JOB_LEASE_SECONDS
+        now = self._clock()
+        placeholders = ",".join("?" * len(job_ids))
+        with self._transaction() as conn:
+            conn.execute(
+                f"UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                f"WHERE status = ? AND lease_owner = ? AND id IN ({placeholders})",
+                [now + lease_seconds, now, LEASED, worker_id] + job_ids
+            )
+            return [row[0] for row in conn.execute(
+                f"SELECT id FROM jobs WHERE status = ? AND lease_owner = ? AND id IN ({placeholders})",
+                [LEASED, worker_id] + job_ids
+            )]
+
+    def complete(self, job_id: int, worker_id: str, result: dict = None) -> bool:
+        """Mark a leased job done. Returns False if the worker no longer held the lease."""
+        now = self._clock()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, lease_owner = NULL, lease_expires = NULL, "
+                "updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (DONE, json.dumps(result) if result is not None else None, now, job_id, LEASED, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> Optional[str]:
+        """
+        Record a failed attempt: retry with exponential backoff and jitter,
+        or dead-letter the job once attempts are exhausted.
+
+        Returns:
+            The job's new status, or None if the worker no longer held the lease
+        """
+        now = self._clock()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = ? AND lease_owner = ?",
+                (job_id, LEASED, worker_id)
+            ).fetchone()
+            if row is None:
+                return None
+            attempts, max_attempts = row
+            if attempts >= max_attempts:
+                status, available_at = DEAD, now
+            else:
+                backoff = self.retry_backoff * (2 ** (attempts - 1))
+                status, available_at = QUEUED, now + random.uniform(0.5, 1.0) * backoff
+            conn.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, last_error = ?, lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE id = ?",
+                (status, available_at, error, now, job_id)
+            )
+            return status
+
+    def requeue_dead(self, job_ids: Iterable[int] = None) -> int:
+        """Give dead-lettered jobs (default: all) a fresh set of attempts."""
+        now = self._clock()
+        sql = "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE status = ?"
+        params: list = [QUEUED, now, now, DEAD]
+        if job_ids is not None:
+            job_ids = list(job_ids)
+            if not job_ids:
+                return 0
+            sql += f" AND id IN ({','.join('?' * len(job_ids))})"
+            params += job_ids
+        with self._transaction() as conn:
+            return conn.execute(sql, params).rowcount
+
+    def dead_letters(self, limit: int = 100) -> List[dict]:
+        """Dead-lettered jobs with their last error, newest first."""
+        rows = self._connection().execute(
+            "SELECT id, payload, attempts, last_error, updated_at FROM jobs "
+            "WHERE status = ? ORDER BY updated_at DESC LIMIT ?",
+            (DEAD, limit)
+        ).fetchall()
+        return [
+            {"id": job_id, "payload": json.loads(payload), "attempts": attempts,
+             "last_error": last_error, "updated_at": updated_at}
+            for job_id, payload, attempts, last_error, updated_at in rows
+        ]
+
+    def result(self, job_id: int) -> Optional[dict]:
+        """Status and result of a job."""
+        row = self._connection().execute(
+            "SELECT status, attempts, result, last_error FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, attempts, result, last_error = row
+        return {
+            "id": job_id, "status": status, "attempts": attempts,
+            "result": json.loads(result) if result else None, "last_error": last_error,
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, DEAD: 0}
+        for status, count in self._connection().execute(
+            "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+        ):
+            counts[status] = count
+        return counts
+
+
+class _Immediate:
+    """Context manager for BEGIN IMMEDIATE ... COMMIT/ROLLBACK."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
@@ -0,0 +1,150 @@
+"""
+Queue worker: runs a warmed CorepPipeline on leased jobs.
+
+A worker leases jobs in batches of up to ``batch_size`` whenever it has
+free slots, runs them on ``concurrency`` threads and heartbeats every
+held lease. Throughput scales by starting more worker processes (on this
+or other machines sharing the queue file); each leases its own batches.
+
+A pipeline built with ``record_batch_size`` buffers its run records; the
+worker flushes them whenever the queue runs dry and before it returns.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict
+
+from .queue import Job, JobQueue
+import config
+
+
+class Worker:
+    """Leases jobs from a JobQueue and runs them through a pipeline."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        pipeline,
+        worker_id: str = None,
+        batch_size: int = None,
+        concurrency: int = None,
+        lease_seconds: float = None,
+        poll_interval: float = None
+    ):
+        """
+        Args:
+            queue: Job queue to pull from
+            pipeline: Warmed CorepPipeline (shared by the worker threads);
+                its buffered runs are flushed with flush_runs()
+            worker_id: Lease owner name (default: host:pid:random)
+            batch_size: Maximum jobs leased per round trip
+            concurrency: Jobs run in parallel
+            lease_seconds: Lease length; heartbeats renew at a third of it
+            poll_interval: Sleep when the queue is empty
+        """
+        self.queue = queue
+        self.pipeline = pipeline
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.batch_size = batch_size or config.JOB_BATCH_SIZE
+        self.concurrency = concurrency or config.JOB_WORKER_CONCURRENCY
+        self.lease_seconds = lease_seconds or config.JOB_LEASE_SECONDS
+        self.poll_interval = poll_interval if poll_interval is not None else config.JOB_POLL_INTERVAL
+
+        self._held: Dict[int, Future] = {}
+        self._held_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self.completed = 0
+        self.failed = 0
+        self.lost = 0
+
+    def stop(self) -> None:
+        """Stop leasing new jobs; run() returns once held jobs finish."""
+        self._stop.set()
+
+    def _run_job(self, job: Job) -> None:
+        payload = job.payload
+        try:
+            record = self.pipeline.run_traced(
+                payload["question"], entity=payload.get("entity"), period=payload.get("period")
+            )
+            result = {"run_id": record.run_id, "output": record.output.model_dump()}
+            outcome = "completed" if self.queue.complete(job.id, self.worker_id, result) else "lost"
+        except Exception as e:
+            status = self.queue.fail(job.id, self.worker_id, f"{type(e).__name__}: {e}")
+            outcome = "lost" if status is None else "failed"
+        finally:
+            with self._held_lock:
+                self._held.pop(job.id, None)
+        with self._held_lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.is_set() or self._held:
+            time.sleep(self.lease_seconds / 3)
+            with self._held_lock:
+                held = list(self._held)
+            if held:
+                kept = set(self.queue.heartbeat(self.worker_id, held, self.lease_seconds))
+                lost = [job_id for job_id in held if job_id not in kept]
+                if lost:
+                    print(f"⚠️  Lost lease on job(s) {lost}; they may be re-run elsewhere")
+
+    def run(self, max_jobs: int = None, exit_when_empty: bool = False) -> int:
+        """
+        Process jobs until stopped.
+
+        Args:
+            max_jobs: Stop leasing after this many jobs (default: unlimited)
+            exit_when_empty: Return once the queue has no ready jobs
+
+        Returns:
+            Number of jobs leased
+        """
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        leased = 0
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="job-worker") as pool:
+            while not self._stop.is_set():
+                with self._held_lock:
+                    free = self.concurrency - len(self._held)
+                if max_jobs is not None:
+                    free = min(free, max_jobs - leased)
+                    if free <= 0 and not self._held:
+                        break
+                if free <= 0:
+                    time.sleep(0.05)
+                    continue
+
+                jobs = self.queue.lease(
+                    self.worker_id, min(self.batch_size, free), self.lease_seconds
+                )
+                if not jobs:
+                    with self._held_lock:
+                        idle = not self._held
+                    if idle:
+                        self.pipeline.flush_runs()
+                    if exit_when_empty and idle:
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+
+                leased += len(jobs)
+                with self._held_lock:
+                    for job in jobs:
+                        self._held[job.id] = pool.submit(self._run_job, job)
+        self._stop.set()
+        self.pipeline.flush_runs()
+        return leased
+
+    def get_metrics(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "in_flight": len(self._held),
+            "completed": self.completed,
+            "failed": self.failed,
+            "lost": self.lost,
+        }
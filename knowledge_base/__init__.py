@@ -1,4 +1,8 @@
 """Knowledge base package."""
 from .corpus import REGULATORY_CORPUS, get_all_chunks
+from .templates import TEMPLATES, DEFAULT_TEMPLATE, TemplateSpec, get_template_chunks
 
-__all__ = ["REGULATORY_CORPUS", "get_all_chunks"]
+__all__ = [
+    "REGULATORY_CORPUS", "get_all_chunks",
+    "TEMPLATES", "DEFAULT_TEMPLATE", "TemplateSpec", "get_template_chunks",
+]
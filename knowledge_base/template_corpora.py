@@ -0,0 +1,94 @@
+"""
+Mock regulatory knowledge base for COREP templates beyond C 01.00.
+Covers own funds requirements (C 02.00), capital ratios (C 03.00),
+leverage (C 47.00) and large exposures (C 28.00).
+"""
+from typing import List
+
+
+OWN_FUNDS_REQUIREMENTS_CORPUS: List[dict] = [
+    {
+        "id": "PRA_OFR_001",
+        "source": "PRA Rulebook",
+        "paragraph": "Article 92(3)",
+        "text": "The total risk exposure amount shall be calculated as the sum of: (a) the risk-weighted exposure amounts for credit risk and dilution risk; (b) the own funds requirements for position risk, foreign exchange risk and commodity risk multiplied by 12.5; (c) the own funds requirements for settlement risk multiplied by 12.5; (d) the own funds requirements for credit valuation adjustment risk multiplied by 12.5; (e) the own funds requirements for operational risk multiplied by 12.5."
+    },
+    {
+        "id": "PRA_OFR_002",
+        "source": "PRA Rulebook",
+        "paragraph": "Article 92(4)",
+        "text": "Own funds requirements for market risk, settlement risk, credit valuation adjustment risk and operational risk shall be converted into risk exposure amounts by multiplying them by 12.5, so that all components of the total risk exposure amount are expressed on a common risk-weighted basis."
+    },
+    {
+        "id": "PRA_OFR_003",
+        "source": "PRA SS3/21",
+        "paragraph": "Section 3.1",
+        "text": "UK institutions should report the total risk exposure amount and its breakdown by risk type in COREP template C 02.00 (Own Funds Requirements). Credit risk exposures calculated under the Standardised Approach and the IRB Approach are reported separately, together with market risk, settlement risk, CVA risk and operational risk."
+    },
+]
+
+
+CAPITAL_RATIOS_CORPUS: List[dict] = [
+    {
+        "id": "PRA_RATIOS_001",
+        "source": "PRA Rulebook",
+        "paragraph": "Article 92(1)",
+        "text": "Institutions shall at all times satisfy the following own funds requirements: (a) a Common Equity Tier 1 capital ratio of 4.5%; (b) a Tier 1 capital ratio of 6%; (c) a total capital ratio of 8%."
+    },
+    {
+        "id": "PRA_RATIOS_002",
+        "source": "PRA Rulebook",
+        "paragraph": "Article 92(2)",
+        "text": "The Common Equity Tier 1 capital ratio is the Common Equity Tier 1 capital of the institution expressed as a percentage of the total risk exposure amount. The Tier 1 capital ratio and the total capital ratio are Tier 1 capital and own funds respectively, expressed as a percentage of the total risk exposure amount."
+    },
+    {
+        "id": "PRA_RATIOS_003",
+        "source": "PRA Rulebook",
+        "paragraph": "Capital Buffers 2.1",
+        "text": "In addition to the Pillar 1 minimum ratios, firms must hold Common Equity Tier 1 capital to meet the combined buffer requirement, comprising the capital conservation buffer of 2.5% of the total risk exposure amount, the institution-specific countercyclical capital buffer and, where applicable, systemic buffers. Capital ratios are reported in COREP template C 03.00."
+    },
+]
+
+
+LEVERAGE_CORPUS: List[dict] = [
+    {
+        "id": "PRA_LEVERAGE_001",
+        "source": "PRA Rulebook",
+        "paragraph": "Leverage Ratio 3.1",
+        "text": "The leverage ratio is calculated as an institution's Tier 1 capital divided by its total exposure measure, expressed as a percentage. Firms in scope of the UK leverage ratio framework must maintain a leverage ratio of at least 3.25% at all times."
+    },
+    {
+        "id": "PRA_LEVERAGE_002",
+        "source": "PRA Rulebook",
+        "paragraph": "Leverage Ratio 1.1",
+        "text": "The minimum leverage ratio requirement applies to firms with retail deposits equal to or greater than £50 billion, or non-UK assets equal to or greater than £10 billion. In calculating the total exposure measure, firms may exclude claims on central banks where they are matched by deposits in the same currency."
+    },
+    {
+        "id": "PRA_LEVERAGE_003",
+        "source": "PRA SS3/21",
+        "paragraph": "Section 4.1",
+        "text": "UK institutions should report the leverage ratio, its Tier 1 capital numerator and the total exposure measure, including on-balance sheet exposures, derivative exposures, securities financing transactions and off-balance sheet items, in COREP template C 47.00."
+    },
+]
+
+
+LARGE_EXPOSURES_CORPUS: List[dict] = [
+    {
+        "id": "PRA_LE_001",
+        "source": "PRA Rulebook",
+        "paragraph": "Article 392",
+        "text": "An institution's exposure to a client or group of connected clients shall be considered a large exposure where its value is equal to or exceeds 10% of its Tier 1 capital."
+    },
+    {
+        "id": "PRA_LE_002",
+        "source": "PRA Rulebook",
+        "paragraph": "Article 395",
+        "text": "An institution shall not incur an exposure, after taking into account the effect of credit risk mitigation, to a client or group of connected clients the value of which exceeds 25% of its Tier 1 capital. Where the client is a G-SII, the limit is 15% of Tier 1 capital for exposures of one G-SII to another."
+    },
+    {
+        "id": "PRA_LE_003",
+        "source": "PRA SS3/21",
+        "paragraph": "Section 5.1",
+        "text": "UK institutions should report every large exposure, and every exposure of at least EUR 300 million, to a client or group of connected clients in COREP templates C 28.00 and C 29.00, showing the exposure value before and after exemptions and credit risk mitigation."
+    },
+]
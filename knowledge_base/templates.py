@@ -0,0 +1,89 @@
+"""
+Registry of COREP templates and their regulatory corpora.
+
+Each template is indexed as its own shard, so a process only loads the
+templates it serves.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from models.regulatory import RegulatoryChunk
+from .corpus import REGULATORY_CORPUS
+from .template_corpora import (
+    OWN_FUNDS_REQUIREMENTS_CORPUS,
+    CAPITAL_RATIOS_CORPUS,
+    LEVERAGE_CORPUS,
+    LARGE_EXPOSURES_CORPUS,
+)
+
+
+@dataclass(frozen=True)
+class TemplateSpec:
+    """A COREP template, its routing keywords and its regulatory corpus."""
+
+    code: str
+    name: str
+    keywords: Tuple[str, ...]
+    corpus: Tuple[dict, ...]
+
+
+TEMPLATES: Dict[str, TemplateSpec] = {
+    spec.code: spec for spec in [
+        TemplateSpec(
+            code="C 01.00",
+            name="Own Funds",
+            keywords=(
+                "c 01.00", "own funds", "cet1", "common equity", "additional tier 1", "at1",
+                "tier 2", "retained earnings", "share", "intangible", "deduction", "perpetual",
+                "capital instrument", "reserves",
+            ),
+            corpus=tuple(REGULATORY_CORPUS),
+        ),
+        TemplateSpec(
+            code="C 02.00",
+            name="Own Funds Requirements",
+            keywords=(
+                "c 02.00", "own funds requirement", "risk exposure amount", "risk-weighted",
+                "rwa", "rwea", "credit risk", "market risk", "operational risk", "cva",
+                "settlement risk",
+            ),
+            corpus=tuple(OWN_FUNDS_REQUIREMENTS_CORPUS),
+        ),
+        TemplateSpec(
+            code="C 03.00",
+            name="Capital Ratios",
+            keywords=(
+                "c 03.00", "capital ratio", "cet1 ratio", "tier 1 ratio", "total capital ratio",
+                "buffer", "conservation", "countercyclical", "4.5%", "8%",
+            ),
+            corpus=tuple(CAPITAL_RATIOS_CORPUS),
+        ),
+        TemplateSpec(
+            code="C 47.00",
+            name="Leverage Ratio",
+            keywords=(
+                "c 47.00", "leverage", "exposure measure", "3.25%", "central bank claims",
+                "securities financing", "off-balance",
+            ),
+            corpus=tuple(LEVERAGE_CORPUS),
+        ),
+        TemplateSpec(
+            code="C 28.00",
+            name="Large Exposures",
+            keywords=(
+                "c 28.00", "c 29.00", "large exposure", "connected clients", "counterparty",
+                "concentration", "g-sii", "25% of", "10% of",
+            ),
+            corpus=tuple(LARGE_EXPOSURES_CORPUS),
+        ),
+    ]
+}
+
+DEFAULT_TEMPLATE = "C 01.00"
+
+
+def get_template_chunks(code: str) -> List[RegulatoryChunk]:
+    """Return the regulatory chunks for one template as RegulatoryChunk objects."""
+    if code not in TEMPLATES:
+        raise ValueError(f"Unknown COREP template '{code}'. Known: {', '.join(TEMPLATES)}")
+    return [RegulatoryChunk(template=code, **chunk) for chunk in TEMPLATES[code].corpus]
@@ -1,14 +1,44 @@
 """
 CLI entry point for PRA COREP Reporting Assistant.
+
+Single question:
+    python main.py "How should a UK bank report its CET1 capital?"
+    python main.py -- "-5% CET1 after a £50m loss: how is it reported?"
+
+(Put a question that starts with "-" after "--" so it is not read as an option.)
+
+Batch mode (JSONL or CSV with a "question" column; "-" reads stdin):
+    python main.py --batch scenarios.jsonl --output results.jsonl --workers 8
+
+Batch results are written as one JSON line per scenario as each one
+completes. IDs of successful scenarios are appended to a checkpoint file,
+so re-running the same command after an interruption skips finished work
+and retries failures (their new result is appended after the old one).
+
+Either mode accepts --profile to write per-stage cProfile data and a
+CPU/memory summary (see profiling/profiler.py) to --profile-dir
+(default: profiles).
 """
-import sys
+import argparse
+import contextlib
+import csv
+import io
+import json
 import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator, Optional, Set, Tuple
 
 # Add project root to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from pipeline import CorepPipeline
+from profiling import disable_profiling, enable_profiling
+from reasoning import BATCH
 from reporting import ReportGenerator
+import config
 
 
 # Default example question
@@ -18,29 +48,23 @@ DEFAULT_QUESTION = (
 )
 
 
-def main():
-    """Main entry point."""
-    # Get question from command line or use default
-    if len(sys.argv) > 1:
-        question = " ".join(sys.argv[1:])
-    else:
-        question = DEFAULT_QUESTION
-    
+def run_single(question: str) -> None:
+    """Answer one question and print the full text report."""
     print()
     print("╔══════════════════════════════════════════════════════════════╗")
     print("║     PRA COREP REPORTING ASSISTANT - PROTOTYPE v0.1          ║")
     print("╚══════════════════════════════════════════════════════════════╝")
     print()
-    
+
     try:
         # Initialize and run pipeline
         pipeline = CorepPipeline()
         output = pipeline.run(question)
-        
+
         # Generate and print full report
         report = ReportGenerator.generate_full_report(output)
         print(report)
-        
+
     except ValueError as e:
         print(f"\n❌ Error: {e}")
         sys.exit(1)
@@ -50,5 +74,285 @@ def main():
         sys.exit(1)
 
 
+def read_scenarios(path: str, question_field: str, id_field: str) -> Iterator[dict]:
+    """
+    Stream scenarios from a JSONL or CSV file ("-" for JSONL on stdin).
+
+    Each scenario is a dict with at least "id" and "question"; optional
+    "entity" and "period" are passed through to the pipeline. Scenarios
+    without an ID are numbered by their position in the input.
+
+    A malformed line or row does not stop the stream: it is yielded as a
+    scenario with "line" and "error" set, which run_scenario records as a
+    failed result.
+    """
+    is_csv = path.lower().endswith(".csv")
+    with contextlib.ExitStack() as stack:
+        if path == "-":
+            source = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+        else:
+            source = stack.enter_context(open(path, encoding="utf-8", newline=""))
+
+        records = _csv_records(source) if is_csv else _jsonl_records(source)
+        for position, (line_number, record, error) in enumerate(records, 1):
+            if error is not None:
+                yield {
+                    "id": str(position), "question": "", "entity": None, "period": None,
+                    "line": line_number, "error": error,
+                }
+                continue
+            question = (record.get(question_field) or "").strip()
+            scenario_id = record.get(id_field)
+            yield {
+                "id": str(scenario_id if scenario_id not in (None, "") else position),
+                "question": question,
+                "entity": record.get("entity") or None,
+                "period": record.get("period") or None,
+            }
+
+
+def _jsonl_records(source) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """(line number, record, error) for each non-blank JSONL line."""
+    for line_number, line in enumerate(source, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, f"Malformed JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, f"Expected a JSON object, got {type(record).__name__}"
+            continue
+        yield line_number, record, None
+
+
+def _csv_records(source) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """(line number, record, error) for each CSV row after the header."""
+    reader = csv.DictReader(source)
+    line_number = 0
+    while True:
+        try:
+            record = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            # line_num is not advanced for a row that fails to parse
+            line_number = max(line_number, reader.line_num) + 1
+            yield line_number, None, f"Malformed CSV row: {e}"
+            continue
+        line_number = reader.line_num
+        yield line_number, record, None
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    """IDs of scenarios completed by earlier runs."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def run_scenario(pipeline: CorepPipeline, scenario: dict) -> dict:
+    """Run one scenario; failures become error results rather than exceptions."""
+    started = time.perf_counter()
+    result = {"id": scenario["id"], "entity": scenario["entity"], "period": scenario["period"]}
+    if "line" in scenario:
+        result["line"] = scenario["line"]
+    try:
+        if "error" in scenario:
+            raise ValueError(f"Line {scenario['line']}: {scenario['error']}")
+        if not scenario["question"]:
+            raise ValueError("Scenario has no question")
+        record = pipeline.run_traced(
+            scenario["question"], entity=scenario["entity"], period=scenario["period"]
+        )
+        result.update(
+            status="ok",
+            run_id=record.run_id,
+            output=record.output.model_dump(),
+            stage_timings=record.stage_timings,
+        )
+    except Exception as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+    result["latency_s"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class LatencyReservoir:
+    """Uniform random sample of at most ``size`` latencies (reservoir sampling)."""
+
+    def __init__(self, size: int = None, seed: int = None):
+        self.size = size or config.BATCH_LATENCY_SAMPLES
+        self.samples = []
+        self.seen = 0
+        self._rng = random.Random(seed)
+
+    def add(self, value: float) -> None:
+        self.seen += 1
+        if len(self.samples) < self.size:
+            self.samples.append(value)
+            return
+        slot = self._rng.randrange(self.seen)
+        if slot < self.size:
+            self.samples[slot] = value
+
+    def percentile(self, q: float) -> float:
+        return _percentile(self.samples, q)
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    """
+    Run scenarios in parallel, streaming results and checkpointing progress.
+
+    Returns:
+        Process exit code (0 if every scenario succeeded)
+    """
+    to_file = args.output != "-"
+    checkpoint_path = args.checkpoint or (args.output + ".checkpoint" if to_file else None)
+    completed = load_checkpoint(checkpoint_path) if checkpoint_path else set()
+
+    workers = args.workers or config.BATCH_WORKERS
+    max_in_flight = workers * config.BATCH_MAX_IN_FLIGHT_PER_WORKER
+
+    latencies = LatencyReservoir()
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+
+    started = time.perf_counter()
+    interrupted = False
+    with contextlib.ExitStack() as stack:
+        out = stack.enter_context(open(args.output, "a", encoding="utf-8")) if to_file else sys.stdout
+        checkpoint = (
+            stack.enter_context(open(checkpoint_path, "a", encoding="utf-8")) if checkpoint_path else None
+        )
+        # Pipeline progress logs go to stderr (or nowhere) so stdout stays pure JSONL
+        log = sys.stderr if args.verbose else stack.enter_context(open(os.devnull, "w"))
+        stack.enter_context(contextlib.redirect_stdout(log))
+
+        # IDs currently running; finished successes join ``completed``, so
+        # duplicates are skipped (or failures retried) exactly as on resume
+        submitted: Set[str] = set()
+
+        def write(result: dict) -> None:
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            submitted.discard(result["id"])
+            if result["status"] == "ok":
+                completed.add(result["id"])
+                if checkpoint is not None:
+                    checkpoint.write(result["id"] + "\n")
+                    checkpoint.flush()
+            counts[result["status"]] += 1
+            latencies.add(result["latency_s"])
+
+        # Runs are committed to the run store in batches, not one transaction each
+        pipeline = CorepPipeline(priority=BATCH, record_batch_size=config.RUN_STORE_BATCH_SIZE)
+        pipeline.warm_up()
+
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="corep-batch")
+        pending = set()
+        try:
+            for scenario in read_scenarios(args.batch, args.question_field, args.id_field):
+                if scenario["id"] in completed or scenario["id"] in submitted:
+                    counts["skipped"] += 1
+                    continue
+                # Bounded in-flight work keeps memory flat for any input size
+                while len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write(future.result())
+                submitted.add(scenario["id"])
+                pending.add(pool.submit(run_scenario, pipeline, scenario))
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(future.result())
+        except KeyboardInterrupt:
+            interrupted = True
+            for future in pending:
+                future.cancel()
+        finally:
+            pool.shutdown(wait=not interrupted, cancel_futures=True)
+            pipeline.flush_runs()
+
+    elapsed = time.perf_counter() - started
+    processed = counts["ok"] + counts["error"]
+    print(
+        f"\n{'⏸️  Interrupted' if interrupted else '✅ Batch complete'}: "
+        f"{processed} processed ({counts['ok']} ok, {counts['error']} failed), "
+        f"{counts['skipped']} skipped\n"
+        f"   Throughput: {processed / elapsed if elapsed else 0:.2f} scenarios/s "
+        f"over {elapsed:.1f}s with {workers} workers\n"
+        f"   Latency: p50 {latencies.percentile(50):.2f}s, "
+        f"p95 {latencies.percentile(95):.2f}s, p99 {latencies.percentile(99):.2f}s",
+        file=sys.stderr
+    )
+    if interrupted:
+        if checkpoint_path:
+            print(f"   Re-run the same command to resume (checkpoint: {checkpoint_path})",
+                  file=sys.stderr)
+        return 130
+    return 1 if counts["error"] else 0
+
+
+def write_profile() -> None:
+    """Dump the active profiler's results and point the user at them."""
+    profiler = disable_profiling()
+    if profiler is None or not profiler.stages:
+        return
+    paths = profiler.dump()
+    print(f"\n📊 Profile written to {profiler.output_dir}/ ({len(paths)} files)", file=sys.stderr)
+    for name, stats in sorted(profiler.stages.items(), key=lambda item: -item[1].wall_seconds):
+        print(
+            f"   {name:<28} {stats.calls:>6} call(s) {stats.wall_seconds:>9.3f}s "
+            f"{stats.memory_delta_bytes / 1e6:+9.2f} MB",
+            file=sys.stderr
+        )
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="PRA COREP Reporting Assistant")
+    parser.add_argument("question", nargs="*",
+                        help="Question to answer (single mode); put it after -- if it starts with '-'")
+    parser.add_argument("--batch", metavar="INPUT",
+                        help="Run scenarios from a JSONL/CSV file, or '-' for JSONL on stdin")
+    parser.add_argument("--output", default="-",
+                        help="Batch results JSONL (default: stdout); appended to on resume")
+    parser.add_argument("--workers", type=int, help="Parallel batch workers (default from config)")
+    parser.add_argument("--checkpoint",
+                        help="Completed-ID checkpoint file (default: OUTPUT.checkpoint)")
+    parser.add_argument("--question-field", default="question", help="Input field with the question")
+    parser.add_argument("--id-field", default="id", help="Input field with the scenario ID")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline logs on stderr")
+    parser.add_argument("--profile", action="store_true", help="Profile each pipeline stage")
+    parser.add_argument("--profile-dir", default=config.PROFILE_DIR, metavar="DIR",
+                        help=f"Where --profile writes its results (default: {config.PROFILE_DIR})")
+    args = parser.parse_args()
+
+    if args.profile:
+        enable_profiling(args.profile_dir)
+
+    try:
+        if args.batch:
+            exit_code = run_batch(args)
+        else:
+            # Get question from command line or use default
+            run_single(" ".join(args.question) if args.question else DEFAULT_QUESTION)
+            exit_code = 0
+    finally:
+        if args.profile:
+            write_profile()
+    sys.exit(exit_code)
+
+
 if __name__ == "__main__":
     main()
@@ -1,5 +1,6 @@
 """Models package for COREP reporting assistant."""
 from .regulatory import RegulatoryChunk
 from .corep import OwnFunds, FieldJustification, CorepOutput
+from .run import RunRecord
 
-__all__ = ["RegulatoryChunk", "OwnFunds", "FieldJustification", "CorepOutput"]
+__all__ = ["RegulatoryChunk", "OwnFunds", "FieldJustification", "CorepOutput", "RunRecord"]
@@ -1,7 +1,7 @@
 """
 COREP Own Funds schema models.
 """
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -49,6 +49,10 @@ class FieldJustification(BaseModel):
         ..., 
         description="Reasoning for why this value was assigned"
     )
+    input_facts: Optional[List[str]] = Field(
+        None,
+        description="IDs of scenario facts (F1, F2, ...) the value depends on; None if not tracked"
+    )
 
 
 class CorepOutput(BaseModel):
@@ -19,6 +19,9 @@ class RegulatoryChunk(BaseModel):
     text: str
     """Full regulatory text content"""
     
+    template: str = "C 01.00"
+    """COREP template this chunk belongs to, e.g., 'C 01.00'"""
+    
     def to_context_string(self) -> str:
         """Format chunk for LLM context."""
         return f"[{self.id}] {self.source}, {self.paragraph}:\n{self.text}"
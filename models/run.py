@@ -0,0 +1,63 @@
+"""
+Pipeline run record model.
+"""
+import time
+import uuid
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+from .corep import CorepOutput
+
+
+class RunRecord(BaseModel):
+    """One pipeline run: inputs, intermediate results, output and timings."""
+    
+    run_id: str = Field(
+        default_factory=lambda: uuid.uuid4().hex,
+        description="Unique run identifier"
+    )
+    created_at: float = Field(
+        default_factory=time.time,
+        description="Run start time (Unix seconds)"
+    )
+    entity: Optional[str] = Field(
+        None,
+        description="Reporting entity, e.g. an LEI or firm reference number"
+    )
+    period: Optional[str] = Field(
+        None,
+        description="Reporting reference date, e.g. '2024-12-31'"
+    )
+    template: str = Field(
+        "C 01.00",
+        description="COREP template reported"
+    )
+    question: str = Field(
+        ...,
+        description="Scenario or question the run answered"
+    )
+    chunk_ids: List[str] = Field(
+        default_factory=list,
+        description="IDs of retrieved regulatory chunks, in rank order"
+    )
+    raw_output: Optional[dict] = Field(
+        None,
+        description="Parsed LLM JSON before validation"
+    )
+    output: Optional[CorepOutput] = Field(
+        None,
+        description="Validated output (None if the run failed)"
+    )
+    stage_timings: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Seconds spent in each pipeline stage"
+    )
+    error: Optional[str] = Field(
+        None,
+        description="Error message if the run failed"
+    )
+    
+    @property
+    def status(self) -> str:
+        """'ok' if the run produced an output, otherwise 'failed'."""
+        return "ok" if self.output is not None else "failed"
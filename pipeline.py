@@ -1,56 +1,129 @@
 """
 End-to-end pipeline orchestration for COREP reporting.
 """
-from typing import List, Optional
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+import numpy as np
 
 from models.regulatory import RegulatoryChunk
 from models.corep import CorepOutput, OwnFunds, FieldJustification
-from knowledge_base import get_all_chunks
-from retrieval import EmbeddingGenerator, VectorStore
-from reasoning import LLMClient, build_system_prompt, build_user_prompt
+from models.run import RunRecord
+from analysis import VarianceAnalyzer
+from knowledge_base import DEFAULT_TEMPLATE
+from retrieval import ChunkFilter, CrossEncoderReranker, EmbeddingGenerator, ShardedVectorStore
+from reasoning import (
+    LLMClient, ModelCascade, INTERACTIVE, build_system_prompt, build_user_prompt,
+    build_partial_user_prompt, estimate_tokens, Fact, extract_facts, changed_facts
+)
+from profiling import profile_stage
+from storage import RunStore
 from validation import Validator
 import config
 
 
+# Pipeline stages reported to progress callbacks, in execution order
+PIPELINE_STAGES = [
+    ("retrieve", "Retrieving regulatory text"),
+    ("reason", "Interpreting rules with the LLM"),
+    ("validate", "Validating output"),
+]
+
+StageCallback = Callable[[str, str], None]
+
+# Own Funds fields the LLM derives; total_own_funds is always their sum
+OWN_FUNDS_COMPONENTS = ("common_equity_tier_1", "additional_tier_1", "tier_2")
+
+
 class CorepPipeline:
     """Orchestrates the full COREP reporting pipeline."""
     
-    def __init__(self):
-        """Initialize pipeline components."""
+    def __init__(
+        self,
+        priority: int = INTERACTIVE,
+        run_store: RunStore = None,
+        record_batch_size: int = 1
+    ):
+        """
+        Initialize pipeline components.
+        
+        Args:
+            priority: LLM scheduling priority (INTERACTIVE or BATCH)
+            run_store: Where to record runs (default: RUN_STORE_PATH if set)
+            record_batch_size: Runs written per run-store transaction; above 1,
+                runs are buffered until that many finish or flush_runs() is called
+        """
         self.embedding_generator = EmbeddingGenerator()
-        self.vector_store = VectorStore(self.embedding_generator)
-        self.llm_client = LLMClient()
+        self.vector_store = ShardedVectorStore(self.embedding_generator)
+        self.llm_client = LLMClient(priority=priority)
         self.validator = Validator()
+        self.cascade = ModelCascade(self.llm_client) if config.CASCADE_ENABLED else None
+        self.reranker = CrossEncoderReranker() if config.RERANK_ENABLED else None
+        self.run_store = run_store or (RunStore() if config.RUN_STORE_PATH else None)
+        self.record_batch_size = record_batch_size
+        self._pending_runs: List[RunRecord] = []
+        self._pending_lock = threading.Lock()
+        self.variance_analyzer = VarianceAnalyzer()
         self._index_built = False
+        self._index_lock = threading.Lock()
     
     def _ensure_index(self) -> None:
-        """Build vector index if not already built."""
-        if not self._index_built:
-            chunks = get_all_chunks()
-            print(f"📚 Building index from {len(chunks)} regulatory chunks...")
-            self.vector_store.build_index(chunks)
-            self._index_built = True
-            print("✅ Index built successfully\n")
+        """
+        Build the default template shard if not already built (exactly once
+        across threads). Other served template shards load on first use.
+        """
+        if self._index_built:
+            return
+        
+        with self._index_lock:
+            if not self._index_built:
+                template = (
+                    DEFAULT_TEMPLATE if DEFAULT_TEMPLATE in self.vector_store.templates
+                    else self.vector_store.templates[0]
+                )
+                self.vector_store.load([template])
+                self._index_built = True
+                print("✅ Index built successfully\n")
+    
+    def warm_up(self) -> None:
+        """Load the embedding model and build the index ahead of the first request."""
+        self._ensure_index()
+        if self.reranker is not None:
+            _ = self.reranker.model
+    
+    @property
+    def is_ready(self) -> bool:
+        """True once the vector index has been built."""
+        return self._index_built
     
     def retrieve_chunks(
         self, 
         question: str, 
-        top_k: int = None
+        top_k: int = None,
+        filters: ChunkFilter = None
     ) -> List[RegulatoryChunk]:
         """
         Retrieve relevant regulatory chunks for a question.
         
+        With reranking enabled, RERANK_CANDIDATES chunks are retrieved and
+        the cross-encoder keeps the best top_k (default RERANK_TOP_N).
+        
         Args:
             question: User's natural language question
             top_k: Number of chunks to retrieve
+            filters: Optional metadata filter (e.g. restrict to a source)
             
         Returns:
             List of relevant RegulatoryChunk objects
         """
         self._ensure_index()
         
+        if self.reranker is not None:
+            return self._retrieve_and_rerank(question, top_k, filters)
+        
         top_k = top_k or config.TOP_K_CHUNKS
-        results = self.vector_store.retrieve(question, top_k)
+        results = self.vector_store.retrieve(question, top_k, filters)
         
         print(f"🔍 Retrieved {len(results)} relevant regulatory chunks:")
         for chunk, distance in results:
@@ -59,10 +132,45 @@ class CorepPipeline:
         
         return [chunk for chunk, _ in results]
     
+    def _retrieve_and_rerank(
+        self,
+        question: str,
+        top_k: int = None,
+        filters: ChunkFilter = None
+    ) -> List[RegulatoryChunk]:
+        """Wide FAISS retrieval followed by cross-encoder reranking."""
+        top_n = top_k or config.RERANK_TOP_N
+        candidates = self.vector_store.retrieve_chunks(
+            question, max(config.RERANK_CANDIDATES, top_n), filters
+        )
+        results = self.reranker.rerank(question, candidates, top_n)
+        chunks = [chunk for chunk, _ in results]
+        
+        self.reranker.record_prompt_tokens(
+            estimate_tokens(build_user_prompt(question, candidates)),
+            estimate_tokens(build_user_prompt(question, chunks))
+        )
+        
+        print(f"🔍 Reranked {len(candidates)} candidates to {len(results)} regulatory chunks:")
+        for chunk, score in results:
+            print(f"   - {chunk.id}: {chunk.source}, {chunk.paragraph} (score: {score:.4f})")
+        print()
+        
+        return chunks
+    
+    def route_template(self, question: str) -> str:
+        """COREP template a question is routed to (its best-matching shard), as recorded on runs."""
+        return self.vector_store.router.route(question)[0]
+    
+    def get_chunk(self, chunk_id: str) -> Optional[RegulatoryChunk]:
+        """Look up a retrieved regulatory chunk by ID (e.g. for audit-log display)."""
+        return self.vector_store.get_chunk(chunk_id)
+    
     def reason_with_llm(
         self, 
         question: str, 
-        chunks: List[RegulatoryChunk]
+        chunks: List[RegulatoryChunk],
+        facts: Sequence[Fact] = None
     ) -> Optional[dict]:
         """
         Use LLM to interpret rules and generate COREP output.
@@ -70,6 +178,7 @@ class CorepPipeline:
         Args:
             question: User's question
             chunks: Retrieved regulatory chunks
+            facts: Optional scenario facts to tag audit-log entries with
             
         Returns:
             Parsed JSON response or None
@@ -77,9 +186,8 @@ class CorepPipeline:
         print("🤖 Calling LLM for regulatory interpretation...")
         
         system_prompt = build_system_prompt()
-        user_prompt = build_user_prompt(question, chunks)
-        
-        response = self.llm_client.generate_json(system_prompt, user_prompt)
+        user_prompt = build_user_prompt(question, chunks, facts)
+        response = self._generate(system_prompt, user_prompt)
         
         if response:
             print("✅ LLM response received and parsed\n")
@@ -88,6 +196,33 @@ class CorepPipeline:
         
         return response
     
+    def _generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        accept: Callable[[dict], bool] = None
+    ) -> Optional[dict]:
+        """
+        Generate JSON, through the model cascade when enabled.
+        
+        Args:
+            system_prompt: System instructions
+            user_prompt: User message with context
+            accept: Cascade acceptance check (default: _passes_validation)
+            
+        Returns:
+            Parsed JSON response or None
+        """
+        if self.cascade is None:
+            return self.llm_client.generate_json(system_prompt, user_prompt)
+        
+        response, tier = self.cascade.run(
+            system_prompt, user_prompt, accept=accept or self._passes_validation
+        )
+        if response:
+            print(f"🪜 Answered by cascade tier '{tier}'")
+        return response
+    
     def validate_and_build_output(self, raw_output: dict) -> CorepOutput:
         """
         Validate raw LLM output and build CorepOutput.
@@ -100,6 +235,24 @@ class CorepPipeline:
         """
         print("✔️  Validating output...")
         
+        output = self._build_output(raw_output)
+        
+        # Run validations
+        validation_warnings = self.validator.run_all_validations(output)
+        
+        # Add validation warnings to output
+        output.warnings.extend(validation_warnings)
+        
+        if validation_warnings:
+            print(f"⚠️  {len(validation_warnings)} validation warning(s) found\n")
+        else:
+            print("✅ All validations passed\n")
+        
+        return output
+    
+    @staticmethod
+    def _build_output(raw_output: dict) -> CorepOutput:
+        """Build an unvalidated CorepOutput from parsed LLM JSON."""
         # Build OwnFunds
         own_funds_data = raw_output.get("own_funds", {})
         own_funds = OwnFunds(
@@ -116,7 +269,8 @@ class CorepPipeline:
                 field=entry.get("field", "unknown"),
                 value=entry.get("value", 0),
                 rule_ids=entry.get("rule_ids", []),
-                explanation=entry.get("explanation", "No explanation provided")
+                explanation=entry.get("explanation", "No explanation provided"),
+                input_facts=entry.get("input_facts")
             ))
         
         # Build initial output
@@ -126,48 +280,467 @@ class CorepPipeline:
             warnings=raw_output.get("warnings", [])
         )
         
-        # Run validations
-        validation_warnings = self.validator.run_all_validations(output)
+        return output
+    
+    def analyse_variance(self, output: CorepOutput, entity: str, period: str) -> List[str]:
+        """
+        Flag large movements against the entity's earlier periods in the run
+        store and attach them to the output's warnings.
         
-        # Add validation warnings to output
-        output.warnings.extend(validation_warnings)
+        Returns:
+            Variance warnings added (empty without a run store)
+        """
+        if self.run_store is None:
+            return []
         
-        if validation_warnings:
-            print(f"⚠️  {len(validation_warnings)} validation warning(s) found\n")
-        else:
-            print("✅ All validations passed\n")
+        variance_warnings = self.variance_analyzer.annotate(output, entity, period, self.run_store)
+        if variance_warnings:
+            print(f"📈 {len(variance_warnings)} period-over-period movement(s) flagged\n")
+        return variance_warnings
+    
+    def _passes_validation(self, raw_output: dict) -> bool:
+        """
+        Cascade acceptance check: the output must build and have no hard
+        validation errors. Soft warnings do not trigger escalation.
+        """
+        try:
+            output = self._build_output(raw_output)
+        except Exception:
+            return False
         
-        return output
+        return not any(
+            warning.startswith("VALIDATION ERROR")
+            for warning in self.validator.run_all_validations(output)
+        )
+    
+    def get_cascade_stats(self) -> dict:
+        """Per-tier cascade counters (empty when the cascade is disabled)."""
+        return self.cascade.get_stats() if self.cascade is not None else {}
     
-    def run(self, question: str) -> CorepOutput:
+    def get_rerank_stats(self) -> dict:
+        """Rerank latency, cache and prompt-token counters (empty when disabled)."""
+        return self.reranker.get_metrics() if self.reranker is not None else {}
+    
+    def run(
+        self,
+        question: str,
+        on_stage: StageCallback = None,
+        entity: str = None,
+        period: str = None
+    ) -> CorepOutput:
         """
         Run the full COREP reporting pipeline.
         
         Args:
             question: User's natural language question
+            on_stage: Optional callback invoked as on_stage(stage, status)
+                with status "running" or "done" for each of PIPELINE_STAGES
+            entity: Optional reporting entity, recorded in the run store
+            period: Optional reporting reference date, recorded in the run store
             
         Returns:
             Complete, validated CorepOutput
         """
+        return self.run_traced(question, on_stage, entity, period).output
+    
+    def run_traced(
+        self,
+        question: str,
+        on_stage: StageCallback = None,
+        entity: str = None,
+        period: str = None,
+        facts: Sequence[Fact] = None,
+        chunks: List[RegulatoryChunk] = None
+    ) -> RunRecord:
+        """
+        Run the pipeline and return a RunRecord with the retrieved chunk IDs,
+        raw LLM JSON, validated output and per-stage timings.
+        
+        The record is appended to the run store (if configured), including
+        failed runs, whose exception is re-raised after recording.
+        
+        ``facts`` asks the LLM to tag audit-log entries with the facts they
+        depend on; ``chunks`` skips retrieval and reasons over the given
+        chunks instead (both used by ScenarioSession).
+        """
+        notify = on_stage or (lambda stage, status: None)
+        record = RunRecord(
+            question=question, entity=entity, period=period,
+            template=self.route_template(question)
+        )
+        
         print("=" * 60)
         print("🚀 STARTING COREP REPORTING PIPELINE")
         print("=" * 60)
         print(f"\n📝 Question: {question}\n")
         
-        # Step 1: Retrieve relevant chunks
-        chunks = self.retrieve_chunks(question)
-        
-        # Step 2: LLM reasoning
-        raw_output = self.reason_with_llm(question, chunks)
-        
-        if raw_output is None:
-            raise ValueError("LLM failed to generate valid output")
+        try:
+            # Step 1: Retrieve relevant chunks
+            notify("retrieve", "running")
+            started = time.perf_counter()
+            if chunks is None:
+                with profile_stage("retrieve"):
+                    chunks = self.retrieve_chunks(question)
+            record.chunk_ids = [chunk.id for chunk in chunks]
+            record.stage_timings["retrieve"] = time.perf_counter() - started
+            notify("retrieve", "done")
+            
+            # Step 2: LLM reasoning
+            notify("reason", "running")
+            started = time.perf_counter()
+            with profile_stage("reason"):
+                raw_output = self.reason_with_llm(question, chunks, facts)
+            record.raw_output = raw_output
+            record.stage_timings["reason"] = time.perf_counter() - started
+            
+            if raw_output is None:
+                raise ValueError("LLM failed to generate valid output")
+            notify("reason", "done")
+            
+            # Step 3: Validate and build output
+            notify("validate", "running")
+            started = time.perf_counter()
+            with profile_stage("validate_and_build_output"):
+                record.output = self.validate_and_build_output(raw_output)
+            if entity and period:
+                with profile_stage("analyse_variance"):
+                    self.analyse_variance(record.output, entity, period)
+            record.stage_timings["validate"] = time.perf_counter() - started
+            notify("validate", "done")
+        except Exception as e:
+            record.error = str(e)
+            self._record(record)
+            raise
         
-        # Step 3: Validate and build output
-        output = self.validate_and_build_output(raw_output)
+        self._record(record)
         
         print("=" * 60)
         print("✅ PIPELINE COMPLETE")
         print("=" * 60 + "\n")
         
-        return output
+        return record
+    
+    def start_session(self, entity: str = None, period: str = None) -> "ScenarioSession":
+        """Start an incremental-edit session for one analyst's scenario."""
+        return ScenarioSession(self, entity, period)
+    
+    def _record(self, record: RunRecord) -> None:
+        """Append a run to the run store; storage errors never fail the run."""
+        if self.run_store is None:
+            return
+        if self.record_batch_size <= 1:
+            self._write_runs([record])
+            return
+        with self._pending_lock:
+            self._pending_runs.append(record)
+            if len(self._pending_runs) < self.record_batch_size:
+                return
+            records, self._pending_runs = self._pending_runs, []
+        self._write_runs(records)
+    
+    def flush_runs(self) -> int:
+        """
+        Write buffered runs to the run store (see record_batch_size).
+        
+        Returns:
+            Number of runs flushed
+        """
+        with self._pending_lock:
+            records, self._pending_runs = self._pending_runs, []
+        if records:
+            self._write_runs(records)
+        return len(records)
+    
+    def _write_runs(self, records: List[RunRecord]) -> None:
+        try:
+            self.run_store.append_many(records)
+        except Exception as e:
+            run_ids = ", ".join(record.run_id for record in records)
+            print(f"⚠️  Could not record run(s) {run_ids}: {e}")
+
+
+class ScenarioSession:
+    """
+    Incremental re-runs of one scenario as an analyst edits it.
+    
+    The session keeps a dependency record of its last run: the question's
+    facts and masked skeleton (see reasoning/facts.py), the query embedding,
+    the retrieved chunks, and the raw LLM output whose audit-log entries
+    list the facts each field depends on. On an edit:
+    
+    - retrieval is reused unless the query embedding moved by more than
+      INCREMENTAL_RETRIEVAL_DRIFT (cosine distance); if re-retrieval finds
+      different chunks, the run is done in full
+    - if only amounts changed, the LLM is asked only for the fields that
+      depend on a changed fact (entries without input_facts, or an Own
+      Funds component with an empty list, count as depending on every
+      fact); other edits re-ask every field. Partial answers go through
+      the same cascade as full runs, accepted if the merged output passes
+      validation
+    - total_own_funds is recomputed locally and validation is rerun
+    
+    Runs within a session are serialised.
+    """
+    
+    def __init__(self, pipeline: CorepPipeline, entity: str = None, period: str = None):
+        """
+        Args:
+            pipeline: Pipeline whose retrieval, LLM client and validator are used
+            entity: Optional reporting entity, recorded in the run store
+            period: Optional reporting reference date, recorded in the run store
+        """
+        self.pipeline = pipeline
+        self.entity = entity
+        self.period = period
+        self.question: Optional[str] = None
+        self.skeleton: Optional[str] = None
+        self.facts: List[Fact] = []
+        self.embedding: Optional[np.ndarray] = None
+        self.chunks: List[RegulatoryChunk] = []
+        self.raw_output: Optional[dict] = None
+        self.output: Optional[CorepOutput] = None
+        self.last_update: dict = {}
+        self.stats = {"full": 0, "partial": 0, "local": 0, "unchanged": 0}
+        self._lock = threading.Lock()
+    
+    def run(self, question: str, on_stage: StageCallback = None) -> CorepOutput:
+        """Run or incrementally update the scenario; returns the validated output."""
+        return self.run_traced(question, on_stage).output
+    
+    def run_traced(self, question: str, on_stage: StageCallback = None) -> RunRecord:
+        """
+        Run or incrementally update the scenario.
+        
+        ``last_update`` afterwards describes what was reused: mode ("full",
+        "partial", "local" or "unchanged"), the changed facts, the re-asked
+        fields, whether retrieval was redone and the elapsed seconds.
+        """
+        notify = on_stage or (lambda stage, status: None)
+        with self._lock:
+            started = time.perf_counter()
+            skeleton, facts = extract_facts(question)
+            
+            if self.output is None:
+                record = self._run_full(question, skeleton, facts, notify)
+                update = {"mode": "full", "retrieved": True}
+            else:
+                record, update = self._run_incremental(question, skeleton, facts, notify)
+            
+            update["seconds"] = round(time.perf_counter() - started, 3)
+            self.stats[update["mode"]] += 1
+            self.last_update = update
+            print(f"♻️  Scenario update: {update}\n")
+            return record
+    
+    def dependencies(self) -> Dict[str, Optional[Set[str]]]:
+        """Audit-log field -> IDs of the facts it depends on (None: unknown, i.e. all)."""
+        if self.raw_output is None:
+            return {}
+        return {
+            entry.get("field"): self._entry_facts(entry)
+            for entry in self.raw_output.get("audit_log", [])
+        }
+    
+    def _run_full(
+        self,
+        question: str,
+        skeleton: str,
+        facts: List[Fact],
+        notify: StageCallback,
+        chunks: List[RegulatoryChunk] = None,
+        embedding: np.ndarray = None
+    ) -> RunRecord:
+        record = self.pipeline.run_traced(
+            question, notify, self.entity, self.period, facts=facts, chunks=chunks
+        )
+        if chunks is None:
+            chunks = [self.pipeline.get_chunk(chunk_id) for chunk_id in record.chunk_ids]
+        if embedding is None:
+            embedding = self.pipeline.embedding_generator.embed_text(question)
+        self._remember(question, skeleton, facts, embedding, chunks, record)
+        return record
+    
+    def _run_incremental(
+        self,
+        question: str,
+        skeleton: str,
+        facts: List[Fact],
+        notify: StageCallback
+    ):
+        changed = changed_facts(self.facts, facts) if skeleton == self.skeleton else None
+        if changed is not None and not changed:
+            for stage, _ in PIPELINE_STAGES:
+                notify(stage, "done")
+            record = RunRecord(
+                question=question, entity=self.entity, period=self.period,
+                template=self.pipeline.route_template(question),
+                chunk_ids=[chunk.id for chunk in self.chunks],
+                raw_output=self.raw_output, output=self.output.model_copy(deep=True)
+            )
+            return record, {"mode": "unchanged", "retrieved": False}
+        
+        # Retrieval: reuse unless the query moved in embedding space
+        notify("retrieve", "running")
+        started = time.perf_counter()
+        embedding = self.pipeline.embedding_generator.embed_text(question)
+        chunks, retrieved = self.chunks, False
+        if _cosine_distance(embedding, self.embedding) > config.INCREMENTAL_RETRIEVAL_DRIFT:
+            with profile_stage("retrieve"):
+                chunks = self.pipeline.retrieve_chunks(question)
+            retrieved = True
+            if {chunk.id for chunk in chunks} != {chunk.id for chunk in self.chunks}:
+                # Different rules in context: nothing from the last answer carries over
+                record = self._run_full(question, skeleton, facts, notify, chunks, embedding)
+                return record, {"mode": "full", "retrieved": True}
+        
+        record = RunRecord(
+            question=question, entity=self.entity, period=self.period,
+            template=self.pipeline.route_template(question),
+            chunk_ids=[chunk.id for chunk in chunks],
+            stage_timings={"retrieve": time.perf_counter() - started}
+        )
+        notify("retrieve", "done")
+        try:
+            # Reasoning: re-ask only the affected fields
+            notify("reason", "running")
+            started = time.perf_counter()
+            fields = self._affected_fields(changed)
+            partial = {}
+            if fields:
+                with profile_stage("reason"):
+                    partial = self._reason_partial(question, chunks, facts, changed, fields)
+            record.raw_output = self._merge(partial, fields)
+            record.stage_timings["reason"] = time.perf_counter() - started
+            notify("reason", "done")
+            
+            # Validation and derived rows are local
+            notify("validate", "running")
+            started = time.perf_counter()
+            with profile_stage("validate_and_build_output"):
+                record.output = self.pipeline.validate_and_build_output(record.raw_output)
+            if self.entity and self.period:
+                self.pipeline.analyse_variance(record.output, self.entity, self.period)
+            record.stage_timings["validate"] = time.perf_counter() - started
+            notify("validate", "done")
+        except Exception as e:
+            record.error = str(e)
+            self.pipeline._record(record)
+            raise
+        
+        self.pipeline._record(record)
+        self._remember(question, skeleton, facts, embedding, chunks, record)
+        return record, {
+            "mode": "partial" if fields else "local",
+            "changed_facts": sorted(changed) if changed is not None else None,
+            "reasked_fields": fields,
+            "retrieved": retrieved,
+        }
+    
+    def _reason_partial(
+        self,
+        question: str,
+        chunks: List[RegulatoryChunk],
+        facts: List[Fact],
+        changed: Optional[Set[str]],
+        fields: List[str]
+    ) -> dict:
+        print(f"🤖 Re-asking LLM for {len(fields)} affected field(s): {', '.join(fields)}")
+        user_prompt = build_partial_user_prompt(
+            question, chunks, facts, sorted(changed or []), fields, self.raw_output
+        )
+        response = self.pipeline._generate(
+            build_system_prompt(), user_prompt,
+            accept=lambda partial: self._accepts_partial(partial, fields)
+        )
+        if response is None:
+            raise ValueError("LLM failed to generate valid output")
+        print("✅ LLM response received and parsed\n")
+        return response
+    
+    def _accepts_partial(self, partial: dict, fields: List[str]) -> bool:
+        """Cascade acceptance for a partial answer: the merged output must validate."""
+        try:
+            merged = self._merge(partial, fields)
+        except Exception:
+            return False
+        return self.pipeline._passes_validation(merged)
+    
+    def _entry_facts(self, entry: dict) -> Optional[Set[str]]:
+        """Known fact IDs an audit-log entry depends on; None if not (usably) tracked."""
+        ids = entry.get("input_facts")
+        if not isinstance(ids, list):
+            return None
+        if not ids and entry.get("field") in OWN_FUNDS_COMPONENTS:
+            # A capital component always rests on the scenario; [] means untracked
+            return None
+        known = {fact.id for fact in self.facts}
+        tracked = {fact_id for fact_id in ids if fact_id in known}
+        return tracked if tracked or not ids else None
+    
+    def _affected_fields(self, changed: Optional[Set[str]]) -> List[str]:
+        """Fields to re-ask; every derived field if the edit was not amounts-only."""
+        entries = [
+            entry for entry in self.raw_output.get("audit_log", [])
+            if entry.get("field") != "total_own_funds"
+        ]
+        fields = []
+        for entry in entries:
+            depends_on = self._entry_facts(entry)
+            if changed is None or depends_on is None or depends_on & changed:
+                fields.append(entry.get("field"))
+        # Components without an audit entry have unknown dependencies
+        covered = {entry.get("field") for entry in entries}
+        fields.extend(name for name in OWN_FUNDS_COMPONENTS if name not in covered)
+        return list(dict.fromkeys(fields))
+    
+    def _merge(self, partial: dict, fields: List[str]) -> dict:
+        """Previous raw output with re-asked fields replaced and the total recomputed."""
+        previous = self.raw_output
+        own_funds = dict(previous.get("own_funds", {}))
+        for name, value in partial.get("own_funds", {}).items():
+            if name in fields:
+                own_funds[name] = value
+        own_funds["total_own_funds"] = sum(own_funds.get(name, 0) for name in OWN_FUNDS_COMPONENTS)
+        
+        fresh = {
+            entry.get("field"): entry for entry in partial.get("audit_log", [])
+            if entry.get("field") in fields
+        }
+        audit_log = []
+        for entry in previous.get("audit_log", []):
+            name = entry.get("field")
+            if name in fresh:
+                audit_log.append(fresh.pop(name))
+            elif name == "total_own_funds":
+                audit_log.append({**entry, "value": own_funds["total_own_funds"]})
+            else:
+                audit_log.append(entry)
+        audit_log.extend(fresh.values())
+        
+        return {
+            "own_funds": own_funds,
+            "audit_log": audit_log,
+            "warnings": partial.get("warnings", previous.get("warnings", [])),
+        }
+    
+    def _remember(
+        self,
+        question: str,
+        skeleton: str,
+        facts: List[Fact],
+        embedding: np.ndarray,
+        chunks: List[RegulatoryChunk],
+        record: RunRecord
+    ) -> None:
+        self.question = question
+        self.skeleton = skeleton
+        self.facts = facts
+        self.embedding = embedding
+        self.chunks = [chunk for chunk in chunks if chunk is not None]
+        self.raw_output = record.raw_output
+        self.output = record.output
+
+
+def _cosine_distance(a: np.ndarray, b: np.ndarray) -> float:
+    denominator = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return 1.0 - float(np.dot(a, b)) / denominator if denominator else 1.0
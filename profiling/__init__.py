@@ -0,0 +1,8 @@
+"""Profiling package: opt-in per-stage CPU and memory profiling."""
+from .profiler import (
+    StageProfiler, enable_profiling, disable_profiling, get_profiler, profile_stage
+)
+
+__all__ = [
+    "StageProfiler", "enable_profiling", "disable_profiling", "get_profiler", "profile_stage",
+]
@@ -0,0 +1,222 @@
+"""
+Opt-in per-stage CPU and memory profiling.
+
+Code marks its expensive stages with::
+
+    with profile_stage("retrieve"):
+        ...
+
+When profiling is off (the default) ``profile_stage`` returns a shared
+no-op context manager, so instrumented code pays one global lookup per
+stage. When on, each stage invocation is run under cProfile and wrapped in
+tracemalloc snapshots, and results are aggregated per stage name:
+
+    <dir>/<stage>.prof   cProfile data (pstats, snakeviz, gprof2dot)
+    <dir>/summary.txt    calls, wall time, top-N functions by cumulative
+                         time and top-N lines by net allocated memory
+
+Nested stages are exclusive: while an inner stage runs, the outer stage's
+profiler is paused, so each function's time is charged to the innermost
+stage. tracemalloc is process-wide, so memory deltas measured while other
+threads run include their allocations.
+"""
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import config
+
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+@dataclass
+class StageStats:
+    """Aggregated measurements for one stage name."""
+
+    calls: int = 0
+    wall_seconds: float = 0.0
+    memory_delta_bytes: int = 0
+    cpu: Optional[pstats.Stats] = None
+    allocations: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+class StageProfiler:
+    """Collects cProfile and tracemalloc data per named stage."""
+
+    def __init__(self, output_dir: str = None, top_n: int = None, trace_memory: bool = True):
+        """
+        Args:
+            output_dir: Where .prof files and summary.txt are written
+            top_n: Functions/lines listed per stage in the summary
+            trace_memory: Take tracemalloc snapshots around each stage
+        """
+        self.output_dir = output_dir or config.PROFILE_DIR
+        self.top_n = top_n or config.PROFILE_TOP_N
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, StageStats] = defaultdict(StageStats)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_tracemalloc = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(config.PROFILE_TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Profile the enclosed block as one invocation of ``name``."""
+        stack: List[cProfile.Profile] = self._local.__dict__.setdefault("stack", [])
+        parent = stack[-1] if stack else None
+        if parent is not None:
+            parent.disable()
+
+        # Snapshot before enabling cProfile so its cost is not charged to the stage
+        before = self._snapshot() if self.trace_memory else None
+        traced_before = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active (e.g. a concurrent stage on Python
+            # 3.12+, where profiling is process-wide): record time/memory only
+            profile = None
+        stack.append(profile)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            stack.pop()
+            if profile is not None:
+                profile.disable()
+
+            delta, allocations = 0, []
+            if self.trace_memory:
+                delta = tracemalloc.get_traced_memory()[0] - traced_before
+                after = self._snapshot()
+                allocations = after.compare_to(before, "lineno")[:self.top_n * 2]
+
+            with self._lock:
+                stats = self.stages[name]
+                stats.calls += 1
+                stats.wall_seconds += elapsed
+                stats.memory_delta_bytes += delta
+                if profile is not None:
+                    try:
+                        if stats.cpu is None:
+                            stats.cpu = pstats.Stats(profile)
+                        else:
+                            stats.cpu.add(profile)
+                    except TypeError:
+                        pass  # nothing was called while this profile was active
+                for diff in allocations:
+                    frame = diff.traceback[0]
+                    stats.allocations[f"{frame.filename}:{frame.lineno}"] += diff.size_diff
+
+            if parent is not None:
+                parent.enable()
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        # Hide the profiler's own bookkeeping allocations
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, module.__file__)
+            for module in (tracemalloc, cProfile, pstats, sys.modules[__name__])
+        ])
+
+    def summary(self) -> str:
+        """Human-readable per-stage report."""
+        lines = []
+        with self._lock:
+            for name, stats in sorted(self.stages.items(), key=lambda item: -item[1].wall_seconds):
+                lines.append("=" * 78)
+                lines.append(
+                    f"{name}: {stats.calls} call(s), {stats.wall_seconds:.3f}s wall, "
+                    f"net memory {stats.memory_delta_bytes / 1e6:+.2f} MB"
+                )
+                lines.append("=" * 78)
+                if stats.cpu is not None:
+                    buffer = io.StringIO()
+                    stats.cpu.stream = buffer
+                    stats.cpu.sort_stats("cumulative").print_stats(self.top_n)
+                    lines.extend(
+                        line for line in buffer.getvalue().splitlines()
+                        if line.strip() and not line.lstrip().startswith(("Ordered by", "List reduced"))
+                    )
+                if stats.allocations:
+                    lines.append(f"Top {self.top_n} lines by net allocation:")
+                    top = sorted(stats.allocations.items(), key=lambda item: -abs(item[1]))
+                    for location, size in top[:self.top_n]:
+                        lines.append(f"  {size / 1024:+12.1f} KiB  {location}")
+                lines.append("")
+        return "\n".join(lines)
+
+    def dump(self) -> List[str]:
+        """
+        Write <stage>.prof files and summary.txt to output_dir.
+
+        Returns:
+            Paths written
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        paths = []
+        with self._lock:
+            stages = dict(self.stages)
+        for name, stats in stages.items():
+            if stats.cpu is not None:
+                path = os.path.join(self.output_dir, f"{name}.prof")
+                stats.cpu.dump_stats(path)
+                paths.append(path)
+        summary_path = os.path.join(self.output_dir, "summary.txt")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write(self.summary())
+        paths.append(summary_path)
+        return paths
+
+    def close(self) -> None:
+        """Stop tracemalloc if this profiler started it."""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+
+_profiler: Optional[StageProfiler] = None
+
+
+def enable_profiling(output_dir: str = None, top_n: int = None) -> StageProfiler:
+    """Turn on process-wide stage profiling."""
+    global _profiler
+    _profiler = StageProfiler(output_dir, top_n)
+    return _profiler
+
+
+def disable_profiling() -> Optional[StageProfiler]:
+    """Turn profiling off; returns the profiler that was active, if any."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.close()
+    return profiler
+
+
+def get_profiler() -> Optional[StageProfiler]:
+    """The active profiler, or None when profiling is off."""
+    return _profiler
+
+
+def profile_stage(name: str):
+    """Context manager profiling a stage; a no-op unless profiling is enabled."""
+    profiler = _profiler
+    if profiler is None:
+        return _NULL_STAGE
+    return profiler.stage(name)
@@ -1,5 +1,15 @@
 """Reasoning package for LLM integration."""
-from .llm_client import LLMClient
-from .prompts import build_system_prompt, build_user_prompt
+from .llm_client import LLMClient, estimate_tokens
+from .cascade import ModelCascade, ModelTier
+from .rate_limiter import LLMScheduler, INTERACTIVE, BATCH, RequestCancelled, get_scheduler
+from .hedging import HedgedExecutor, get_hedger
+from .prompts import build_system_prompt, build_user_prompt, build_partial_user_prompt
+from .facts import Fact, extract_facts, changed_facts
 
-__all__ = ["LLMClient", "build_system_prompt", "build_user_prompt"]
+__all__ = [
+    "LLMClient", "estimate_tokens", "ModelCascade", "ModelTier",
+    "LLMScheduler", "INTERACTIVE", "BATCH", "RequestCancelled", "get_scheduler",
+    "HedgedExecutor", "get_hedger",
+    "build_system_prompt", "build_user_prompt", "build_partial_user_prompt",
+    "Fact", "extract_facts", "changed_facts",
+]
@@ -0,0 +1,160 @@
+"""
+Model cascade: try a cheap, fast model first and escalate only on failure.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .llm_client import LLMClient, JSON_INSTRUCTION, estimate_tokens
+import config
+
+
+@dataclass
+class ModelTier:
+    """A single model tier in the cascade."""
+
+    name: str
+    model: str
+    cost_per_1k_input_tokens: float = 0.0
+    cost_per_1k_output_tokens: float = 0.0
+
+    def cost(self, input_tokens: int, output_tokens: int) -> float:
+        """Estimated cost of one call on this tier."""
+        return (
+            input_tokens / 1000 * self.cost_per_1k_input_tokens +
+            output_tokens / 1000 * self.cost_per_1k_output_tokens
+        )
+
+
+@dataclass
+class TierStats:
+    """Counters for one tier, used to tune the cascade policy."""
+
+    attempts: int = 0
+    successes: int = 0
+    parse_failures: int = 0
+    validation_failures: int = 0
+    errors: int = 0
+    total_latency: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_cost: float = 0.0
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.attempts if self.attempts else 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.total_latency / self.attempts if self.attempts else 0.0
+
+    def to_dict(self) -> dict:
+        """Summarise counters as a plain dict."""
+        return {
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "success_rate": round(self.success_rate, 4),
+            "parse_failures": self.parse_failures,
+            "validation_failures": self.validation_failures,
+            "errors": self.errors,
+            "avg_latency_s": round(self.avg_latency, 4),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "total_cost": round(self.total_cost, 6),
+        }
+
+
+class ModelCascade:
+    """
+    Runs a request through model tiers in order of cost.
+
+    Each tier's response is parsed and passed to an ``accept`` callback
+    (normally the Validator). The first accepted response wins; otherwise
+    the request escalates. The last tier's parsed response is returned
+    even if it was not accepted, so callers still get a best-effort answer.
+    """
+
+    def __init__(self, llm_client: LLMClient, tiers: List[ModelTier] = None):
+        """Initialize with an LLM client and tiers (default from config)."""
+        self.llm_client = llm_client
+        self.tiers = tiers or [ModelTier(**tier) for tier in config.CASCADE_TIERS]
+        self._stats: Dict[str, TierStats] = {tier.name: TierStats() for tier in self.tiers}
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        accept: Callable[[dict], bool],
+        temperature: float = 0.1
+    ) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Generate JSON, escalating through tiers until ``accept`` passes.
+
+        Args:
+            system_prompt: System instructions
+            user_prompt: User message with context
+            accept: Returns True if the parsed response is good enough
+            temperature: Sampling temperature
+
+        Returns:
+            (parsed JSON or None, name of the tier that produced it)
+        """
+        full_user_prompt = user_prompt + JSON_INSTRUCTION
+        input_tokens = estimate_tokens(system_prompt) + estimate_tokens(full_user_prompt)
+
+        fallback: Tuple[Optional[dict], Optional[str]] = (None, None)
+
+        for tier in self.tiers:
+            start = time.perf_counter()
+            try:
+                text, parsed = self.llm_client.generate_parsed(
+                    system_prompt, full_user_prompt, temperature, model=tier.model
+                )
+            except Exception as e:
+                print(f"⏫ Tier '{tier.name}' ({tier.model}) failed: {e}")
+                self._record(tier, start, input_tokens, 0, errors=1)
+                continue
+
+            output_tokens = estimate_tokens(text)
+
+            if parsed is None:
+                print(f"⏫ Tier '{tier.name}' returned unparseable JSON, escalating")
+                self._record(tier, start, input_tokens, output_tokens, parse_failures=1)
+                continue
+
+            if accept(parsed):
+                self._record(tier, start, input_tokens, output_tokens, successes=1)
+                return parsed, tier.name
+
+            print(f"⏫ Tier '{tier.name}' failed validation, escalating")
+            self._record(tier, start, input_tokens, output_tokens, validation_failures=1)
+            fallback = (parsed, tier.name)
+
+        return fallback
+
+    def _record(
+        self,
+        tier: ModelTier,
+        start: float,
+        input_tokens: int,
+        output_tokens: int,
+        **counts: int
+    ) -> None:
+        """Update counters for one attempt."""
+        latency = time.perf_counter() - start
+        with self._lock:
+            stats = self._stats[tier.name]
+            stats.attempts += 1
+            stats.total_latency += latency
+            stats.input_tokens += input_tokens
+            stats.output_tokens += output_tokens
+            stats.total_cost += tier.cost(input_tokens, output_tokens)
+            for name, value in counts.items():
+                setattr(stats, name, getattr(stats, name) + value)
+
+    def get_stats(self) -> Dict[str, dict]:
+        """Per-tier success rate, latency and cost counters."""
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self._stats.items()}
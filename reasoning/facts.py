@@ -0,0 +1,86 @@
+"""
+Input-fact extraction for incremental re-runs.
+
+A scenario like "£1,000m in paid-up ordinary shares and £50m in intangible
+assets" is split into numeric facts (F1 = 1,000m, F2 = 50m) and a skeleton
+with every number masked. Two versions of a scenario with the same
+skeleton differ only in their amounts, so facts can be matched by position
+and the edit reduced to the set of fact IDs whose value changed.
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Set, Tuple
+
+
+_NUMBER = re.compile(
+    r"(?:(?P<currency>[£$€])\s?)?(?<![\w.])(?P<number>\d[\d,]*(?:\.\d+)?)"
+    r"(?:\s?(?P<unit>%|(?:bn|billion|mn|m|million|k|thousand|per ?cent|years?)\b))?",
+    re.IGNORECASE
+)
+_CONTEXT_WORDS = 6
+
+
+@dataclass(frozen=True)
+class Fact:
+    """One number stated in a scenario."""
+
+    id: str
+    text: str
+    value: float
+    context: str
+
+    def to_prompt_line(self) -> str:
+        return f"- {self.id}: {self.text} {self.context}".rstrip()
+
+
+def _context_after(question: str, end: int) -> str:
+    """The words following a number, up to punctuation (e.g. 'in retained earnings')."""
+    tail = re.split(r"[,;.:()\n£$€\d]", question[end:], maxsplit=1)[0]
+    words = tail.split()[:_CONTEXT_WORDS]
+    while words and words[-1].lower() in ("and", "or", "of", "plus"):
+        words.pop()
+    return " ".join(words)
+
+
+def _is_amount(match: re.Match) -> bool:
+    # Bare numbers ("Tier 2", "C 01.00") are labels, not amounts
+    return bool(match.group("currency") or match.group("unit"))
+
+
+def extract_facts(question: str) -> Tuple[str, List[Fact]]:
+    """
+    Split a scenario into its masked skeleton and numeric facts.
+
+    Only amounts with a currency symbol or unit (m, bn, %, years, ...) are
+    facts; other numbers stay part of the skeleton.
+
+    Returns:
+        (skeleton with amounts replaced by '<n>' and whitespace normalised,
+         facts in order of appearance with IDs F1, F2, ...)
+    """
+    facts = []
+    for match in filter(_is_amount, _NUMBER.finditer(question)):
+        facts.append(Fact(
+            id=f"F{len(facts) + 1}",
+            text=match.group(0).strip(),
+            value=float(match.group("number").replace(",", "")),
+            context=_context_after(question, match.end()),
+        ))
+    skeleton = _NUMBER.sub(lambda m: "<n>" if _is_amount(m) else m.group(0), question)
+    return " ".join(skeleton.split()), facts
+
+
+def changed_facts(old: List[Fact], new: List[Fact]) -> Optional[Set[str]]:
+    """
+    IDs of facts whose stated amount changed between two scenario versions.
+
+    Returns:
+        The changed IDs, or None if the versions do not have matching facts
+        (different number of facts), in which case nothing can be reused
+    """
+    if len(old) != len(new):
+        return None
+    return {
+        after.id for before, after in zip(old, new)
+        if before.value != after.value or before.text.lower() != after.text.lower()
+    }
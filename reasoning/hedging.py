@@ -0,0 +1,269 @@
+"""
+Hedged LLM requests to cut tail latency.
+
+If a request has not returned within a percentile of recently observed
+latencies, a duplicate is issued and whichever response parses first is
+used. The number of extra requests is capped as a fraction of total traffic.
+
+The hedge deadline is learned from provider latency only. When the request
+function queues in the rate limiter before calling the provider, wrap the
+provider call itself with ``HedgedExecutor.timed`` and pass
+``wait_for_send=True`` to ``run``: the deadline then counts from the moment
+the primary reaches the provider, so queue wait is neither learned nor
+hedged (hedging a queued request only adds load). Pass ``attempt_lost`` as
+the limiter's cancel check so an attempt that is still queued when another
+one wins leaves the queue without sending a request.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+from .rate_limiter import RequestCancelled
+import config
+
+
+T = TypeVar("T")
+
+# The hedged attempt running on this thread: its race, whether it is the
+# primary, and its provider latency (see timed)
+_attempt = threading.local()
+
+
+class _Race:
+    """State shared by the attempts of one hedged request."""
+
+    def __init__(self):
+        self.sent = threading.Event()
+        self.won = threading.Event()
+
+
+def attempt_lost() -> bool:
+    """True on a hedged attempt whose request another attempt has already answered."""
+    race = getattr(_attempt, "race", None)
+    return race is not None and race.won.is_set()
+
+
+class LatencyTracker:
+    """Rolling window of call latencies."""
+
+    def __init__(self, window: int = 500):
+        self._samples = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def percentile(self, pct: float) -> float:
+        """Nearest-rank percentile of the current window."""
+        ordered = sorted(self._samples)
+        if not ordered:
+            return 0.0
+        rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+        return ordered[rank]
+
+
+class HedgedExecutor:
+    """
+    Issues a backup request when the primary is slower than the hedge deadline.
+
+    The deadline is the configured percentile of recent latencies for the
+    same model, floored at ``min_delay``. Until ``min_samples`` latencies have
+    been seen, ``initial_delay`` is used instead.
+
+    The losing request is cancelled if it has not started yet. A request that
+    is already in flight cannot be interrupted through the synchronous SDK,
+    so its result is simply discarded when it arrives.
+    """
+
+    def __init__(
+        self,
+        percentile: float = None,
+        min_delay: float = None,
+        initial_delay: float = None,
+        min_samples: int = None,
+        budget_ratio: float = None,
+        max_workers: int = None,
+        clock: Callable[[], float] = time.perf_counter
+    ):
+        """Initialize hedging policy (defaults from config)."""
+        self.percentile = percentile or config.LLM_HEDGE_PERCENTILE
+        self.min_delay = config.LLM_HEDGE_MIN_DELAY if min_delay is None else min_delay
+        self.initial_delay = initial_delay or config.LLM_HEDGE_INITIAL_DELAY
+        self.min_samples = config.LLM_HEDGE_MIN_SAMPLES if min_samples is None else min_samples
+        self.budget_ratio = config.LLM_HEDGE_BUDGET if budget_ratio is None else budget_ratio
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or config.LLM_HEDGE_MAX_WORKERS,
+            thread_name_prefix="llm-hedge"
+        )
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+        self._clock = clock
+
+        # Metrics
+        self._requests = 0
+        self._hedges_triggered = 0
+        self._hedge_wins = 0
+        self._budget_denied = 0
+
+    def hedge_delay(self, key: str = "") -> float:
+        """Seconds to wait for the primary before issuing a hedge."""
+        with self._lock:
+            tracker = self._trackers.get(key)
+            if tracker is None or len(tracker) < self.min_samples:
+                return self.initial_delay
+            return max(self.min_delay, tracker.percentile(self.percentile))
+
+    def _record_latency(self, key: str, latency: float) -> None:
+        with self._lock:
+            self._trackers.setdefault(key, LatencyTracker()).record(latency)
+
+    def timed(self, fn: Callable[[], T]) -> Callable[[], T]:
+        """
+        Wrap the provider request inside a hedged ``fn`` so that only its
+        duration (not rate-limiter queueing or retry backoff around it) feeds
+        the hedge deadline. The last call made by an attempt is the one recorded.
+
+        The wrapper also marks the primary as sent (starting the hedge clock
+        for ``run(..., wait_for_send=True)``) and refuses to send for an
+        attempt that has already lost.
+        """
+        def call() -> T:
+            race = getattr(_attempt, "race", None)
+            if race is not None:
+                if race.won.is_set():
+                    raise RequestCancelled("Hedged request already answered")
+                if _attempt.primary:
+                    race.sent.set()
+            start = self._clock()
+            try:
+                return fn()
+            finally:
+                _attempt.latency = self._clock() - start
+
+        return call
+
+    def _try_take_budget(self) -> bool:
+        """Allow a hedge only while hedges stay within budget_ratio of requests."""
+        with self._lock:
+            if self._hedges_triggered + 1 <= self.budget_ratio * self._requests:
+                self._hedges_triggered += 1
+                return True
+            self._budget_denied += 1
+            return False
+
+    def run(
+        self,
+        fn: Callable[[], str],
+        parse: Callable[[str], Optional[T]],
+        key: str = "",
+        wait_for_send: bool = False
+    ) -> Tuple[Optional[str], Optional[T]]:
+        """
+        Run ``fn`` with hedging and return the first response that parses.
+
+        Args:
+            fn: Performs one provider request and returns its text
+            parse: Converts text to a result, or None if unusable
+            key: Latency bucket (normally the model name)
+            wait_for_send: ``fn`` sends through ``timed`` after queueing
+                (e.g. in the LLMScheduler); start the hedge deadline when the
+                primary is sent instead of when it is submitted
+
+        Returns:
+            (response text, parsed result). If no response parses, the last
+            text received is returned with None. If every attempt raised,
+            the last error is re-raised.
+        """
+        with self._lock:
+            self._requests += 1
+
+        race = _Race()
+
+        def attempt(is_primary: bool) -> Tuple[str, Optional[T]]:
+            _attempt.race, _attempt.primary, _attempt.latency = race, is_primary, None
+            try:
+                if race.won.is_set():
+                    raise RequestCancelled("Hedged request already answered")
+                start = self._clock()
+                text = fn()
+                provider_latency = _attempt.latency
+                self._record_latency(
+                    key, self._clock() - start if provider_latency is None else provider_latency
+                )
+                return text, parse(text)
+            finally:
+                _attempt.race = None
+                if is_primary:
+                    # A primary that failed before sending must not hold up the caller
+                    race.sent.set()
+
+        primary = self._executor.submit(attempt, True)
+        futures = [primary]
+
+        if wait_for_send:
+            race.sent.wait()
+        delay = self.hedge_delay(key)
+        done, _ = wait(futures, timeout=delay)
+        if not done and self._try_take_budget():
+            print(f"🪁 LLM call exceeded {delay:.2f}s, issuing hedged request")
+            futures.append(self._executor.submit(attempt, False))
+
+        pending = set(futures)
+        last_text: Optional[str] = None
+        last_error: Optional[Exception] = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    text, parsed = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+
+                last_text = text
+                if parsed is not None:
+                    # Losers not yet sent give up (see attempt_lost); sent ones are discarded
+                    race.won.set()
+                    for other in pending:
+                        other.cancel()
+                    if future is not primary:
+                        with self._lock:
+                            self._hedge_wins += 1
+                    return text, parsed
+
+        if last_text is None and last_error is not None:
+            raise last_error
+        return last_text, None
+
+    def get_metrics(self) -> dict:
+        """How often hedging triggered, won, or was denied by the budget."""
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "hedges_triggered": self._hedges_triggered,
+                "hedge_wins": self._hedge_wins,
+                "budget_denied": self._budget_denied,
+                "hedge_rate": round(self._hedges_triggered / self._requests, 4) if self._requests else 0.0,
+                "hedge_win_rate": (
+                    round(self._hedge_wins / self._hedges_triggered, 4)
+                    if self._hedges_triggered else 0.0
+                ),
+            }
+
+
+_shared_hedger: Optional[HedgedExecutor] = None
+_shared_lock = threading.Lock()
+
+
+def get_hedger() -> HedgedExecutor:
+    """Return the process-wide hedged executor."""
+    global _shared_hedger
+    with _shared_lock:
+        if _shared_hedger is None:
+            _shared_hedger = HedgedExecutor()
+        return _shared_hedger
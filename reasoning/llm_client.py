@@ -3,21 +3,45 @@ LLM client abstraction for Google Gemini API (google-genai SDK).
 """
 import json
 import re
-from typing import Optional
+from typing import Optional, Tuple
 
 from google import genai
 from google.genai import types
 
+from .rate_limiter import LLMScheduler, INTERACTIVE, RequestCancelled, get_scheduler
+from .hedging import HedgedExecutor, attempt_lost, get_hedger
+from profiling import profile_stage
 import config
 
 
+JSON_INSTRUCTION = (
+    "\n\nIMPORTANT: Output ONLY valid JSON code. "
+    "Do not include any other text."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (about 4 characters per token)."""
+    return max(1, len(text or "") // 4)
+
+
 class LLMClient:
     """Abstracted LLM client supporting Google Gemini API via google-genai SDK."""
     
-    def __init__(self, api_key: str = None, model: str = None):
-        """Initialize with API key and model."""
+    def __init__(
+        self,
+        api_key: str = None,
+        model: str = None,
+        priority: int = INTERACTIVE,
+        scheduler: LLMScheduler = None,
+        hedger: HedgedExecutor = None
+    ):
+        """Initialize with API key, model and scheduling priority."""
         self.api_key = api_key or config.GEMINI_API_KEY
         self.model_name = model or config.GEMINI_MODEL
+        self.priority = priority
+        self.scheduler = scheduler or get_scheduler()
+        self.hedger = hedger or (get_hedger() if config.LLM_HEDGING_ENABLED else None)
         self._client = None
         
         if not self.api_key:
@@ -37,22 +61,29 @@ class LLMClient:
         self, 
         system_prompt: str, 
         user_prompt: str,
-        temperature: float = 0.1
+        temperature: float = 0.1,
+        model: str = None,
+        priority: int = None
     ) -> str:
         """
         Generate a response from the LLM.
         
+        The call goes through the shared rate limiter, so it may wait in the
+        priority queue and is retried on provider rate-limit errors.
+        
         Args:
             system_prompt: System instructions
             user_prompt: User message with context
             temperature: Sampling temperature
+            model: Model override (defaults to the client's model)
+            priority: Scheduling priority override (defaults to the client's)
             
         Returns:
             Raw response text from LLM
         """
-        try:
+        def call() -> str:
             response = self.client.models.generate_content(
-                model=self.model_name,
+                model=model or self.model_name,
                 contents=user_prompt,
                 config=types.GenerateContentConfig(
                     system_instruction=system_prompt,
@@ -60,6 +91,28 @@ class LLMClient:
                 )
             )
             return response.text
+        
+        cancelled = None
+        if self.hedger is not None:
+            # Time the provider alone; queueing below must not move the hedge
+            # deadline, and a hedge that lost while queued must not be sent
+            call = self.hedger.timed(call)
+            cancelled = attempt_lost
+        
+        tokens = (
+            estimate_tokens(system_prompt) + estimate_tokens(user_prompt) +
+            config.LLM_EXPECTED_OUTPUT_TOKENS
+        )
+        
+        try:
+            return self.scheduler.call(
+                call,
+                tokens=tokens,
+                priority=self.priority if priority is None else priority,
+                cancelled=cancelled
+            )
+        except RequestCancelled:
+            raise
         except Exception as e:
             print(f"Error calling Gemini API: {e}")
             raise
@@ -68,7 +121,8 @@ class LLMClient:
         self, 
         system_prompt: str, 
         user_prompt: str,
-        temperature: float = 0.1
+        temperature: float = 0.1,
+        model: str = None
     ) -> Optional[dict]:
         """
         Generate and parse JSON response from LLM.
@@ -77,16 +131,13 @@ class LLMClient:
             system_prompt: System instructions
             user_prompt: User message with context
             temperature: Sampling temperature
+            model: Model override (defaults to the client's model)
             
         Returns:
             Parsed JSON dict or None if parsing fails
         """
         # Append JSON instruction to ensure format
-        json_instruction = (
-            "\n\nIMPORTANT: Output ONLY valid JSON code. "
-            "Do not include any other text."
-        )
-        full_user_prompt = user_prompt + json_instruction
+        full_user_prompt = user_prompt + JSON_INSTRUCTION
         
         try:
             # We can use response_mime_type with newer models, but sticking to prompt eng for safety
@@ -94,12 +145,55 @@ class LLMClient:
             # config=types.GenerateContentConfig(response_mime_type="application/json")
             # But let's keep it simple and consistent with previous logic for now.
             
-            response_text = self.generate_response(system_prompt, full_user_prompt, temperature)
-            return self._extract_json(response_text)
+            _, parsed = self.generate_parsed(
+                system_prompt, full_user_prompt, temperature, model=model
+            )
+            return parsed
         except Exception as e:
             print(f"Error generating JSON: {e}")
             return None
     
+    def generate_parsed(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.1,
+        model: str = None
+    ) -> Tuple[Optional[str], Optional[dict]]:
+        """
+        Generate a response and parse it as JSON, hedging if enabled.
+        
+        With hedging on, a slow call triggers a duplicate request and the
+        first response that parses is used.
+        
+        Profiled as stage "generate_parsed". Hedged requests run on the
+        hedger's executor threads, which the caller's profile cannot see,
+        so each request is also profiled as "generate_response" inside the
+        task itself; "generate_parsed" then holds only JSON extraction and
+        the time spent waiting for the hedged requests.
+        
+        Args:
+            system_prompt: System instructions
+            user_prompt: Full user message (including any JSON instruction)
+            temperature: Sampling temperature
+            model: Model override (defaults to the client's model)
+            
+        Returns:
+            (raw response text, parsed JSON dict or None)
+        """
+        with profile_stage("generate_parsed"):
+            def call() -> str:
+                with profile_stage("generate_response"):
+                    return self.generate_response(system_prompt, user_prompt, temperature, model=model)
+            
+            if self.hedger is not None:
+                return self.hedger.run(
+                    call, self._extract_json, key=model or self.model_name, wait_for_send=True
+                )
+            
+            text = call()
+            return text, self._extract_json(text)
+    
     @staticmethod
     def _extract_json(text: str) -> Optional[dict]:
         """Extract JSON from response text, handling markdown code blocks and loose formatting."""
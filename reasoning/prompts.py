@@ -1,10 +1,12 @@
 """
 Prompt templates for LLM reasoning.
 """
-from typing import List
+import json
+from typing import List, Sequence
 
 from models.regulatory import RegulatoryChunk
 from models.corep import CorepOutput
+from .facts import Fact
 
 
 # JSON Schema for LLM output
@@ -61,7 +63,7 @@ The following regulatory excerpts are most relevant to the question:
 
 {chunks_text}
 
-## Task
+{facts_section}## Task
 Based on the regulatory text above and the user's question:
 1. Populate the COREP Own Funds table with appropriate sample values
 2. For each field, cite the rule_ids used and explain your reasoning
@@ -70,28 +72,121 @@ Based on the regulatory text above and the user's question:
 '''
 
 
+FACTS_SECTION_TEMPLATE = '''## Input Facts
+Amounts stated in the question, by ID:
+
+{facts_text}
+
+In every audit_log entry, also return "input_facts": the IDs of the facts above that the value depends on ([] if none).
+
+'''
+
+
+PARTIAL_USER_PROMPT_TEMPLATE = '''## User Question (edited)
+{question}
+
+## Retrieved Regulatory Text
+The following regulatory excerpts are most relevant to the question:
+
+{chunks_text}
+
+{facts_section}## Previous Output
+The question was edited. Facts changed by the edit: {changed}.
+These entries do not depend on the changed facts and are kept as they are:
+
+{kept_text}
+
+Previous warnings:
+{warnings_text}
+
+## Task
+Re-derive ONLY these fields for the edited question: {fields}
+Return ONLY JSON of this form, no other text:
+{{
+    "own_funds": {{<only those of the fields above that are own_funds keys>}},
+    "audit_log": [<one entry per field above, in the schema's audit_log format, with input_facts>],
+    "warnings": [<the complete, updated list of warnings>]
+}}
+Do not return total_own_funds: it is recomputed as CET1 + AT1 + Tier2.
+'''
+
+
 def build_system_prompt() -> str:
     """Build the system prompt with schema."""
     return SYSTEM_PROMPT_TEMPLATE.format(schema=COREP_SCHEMA)
 
 
-def build_user_prompt(question: str, chunks: List[RegulatoryChunk]) -> str:
+def _format_chunks(chunks: List[RegulatoryChunk]) -> str:
+    return "\n\n".join([
+        f"---\n{chunk.to_context_string()}\n---"
+        for chunk in chunks
+    ])
+
+
+def _format_facts(facts: Sequence[Fact]) -> str:
+    if not facts:
+        return ""
+    return FACTS_SECTION_TEMPLATE.format(
+        facts_text="\n".join(fact.to_prompt_line() for fact in facts)
+    )
+
+
+def build_user_prompt(
+    question: str,
+    chunks: List[RegulatoryChunk],
+    facts: Sequence[Fact] = None
+) -> str:
     """
     Build the user prompt with question and retrieved chunks.
     
     Args:
         question: User's natural language question
         chunks: Retrieved regulatory chunks
+        facts: Optional scenario facts; the LLM is then asked to tag each
+            audit-log entry with the fact IDs it depends on
         
     Returns:
         Formatted user prompt
     """
-    chunks_text = "\n\n".join([
-        f"---\n{chunk.to_context_string()}\n---"
-        for chunk in chunks
-    ])
-    
     return USER_PROMPT_TEMPLATE.format(
         question=question,
-        chunks_text=chunks_text
+        chunks_text=_format_chunks(chunks),
+        facts_section=_format_facts(facts)
+    )
+
+
+def build_partial_user_prompt(
+    question: str,
+    chunks: List[RegulatoryChunk],
+    facts: Sequence[Fact],
+    changed: Sequence[str],
+    fields: Sequence[str],
+    previous: dict
+) -> str:
+    """
+    Build a prompt that re-derives only the fields affected by an edit.
+    
+    Args:
+        question: Edited question
+        chunks: Regulatory chunks (reused from the previous run)
+        facts: Facts of the edited question
+        changed: IDs of the facts the edit changed
+        fields: Fields to re-derive
+        previous: Previous raw LLM output
+        
+    Returns:
+        Formatted user prompt
+    """
+    kept = [
+        entry for entry in previous.get("audit_log", [])
+        if entry.get("field") not in fields and entry.get("field") != "total_own_funds"
+    ]
+    return PARTIAL_USER_PROMPT_TEMPLATE.format(
+        question=question,
+        chunks_text=_format_chunks(chunks),
+        facts_section=_format_facts(facts),
+        changed=", ".join(sorted(changed)) or "none (the wording changed)",
+        kept_text="\n".join(json.dumps(entry) for entry in kept) or "(none)",
+        warnings_text=json.dumps(previous.get("warnings", [])),
+        fields=", ".join(fields)
     )
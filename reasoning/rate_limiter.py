@@ -0,0 +1,271 @@
+"""
+Client-side rate limiting and priority scheduling for LLM calls.
+
+All LLMClient instances in a process share one LLMScheduler, so concurrent
+Streamlit sessions and batch jobs draw from the same requests/min and
+tokens/min budget. Waiting callers are admitted in priority order, which
+lets interactive calls jump ahead of queued batch calls.
+"""
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, TypeVar
+
+import config
+
+
+T = TypeVar("T")
+
+# Priorities: lower value is admitted first
+INTERACTIVE = 0
+BATCH = 10
+
+# How often a cancellable waiter re-checks its cancel condition (seconds)
+CANCEL_POLL_SECONDS = 0.05
+
+
+class RequestCancelled(Exception):
+    """A queued request was withdrawn before it reached the provider."""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate_per_minute``."""
+
+    def __init__(self, rate_per_minute: float, capacity: float = None, clock=time.monotonic):
+        """Initialize a full bucket. A rate of 0 disables the limit."""
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until ``amount`` tokens are available (0 if available now)."""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Take tokens from the bucket (caller checks availability first)."""
+        if not self.unlimited:
+            self.tokens -= min(amount, self.capacity)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Detect provider quota / rate-limit errors (HTTP 429)."""
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if code == 429:
+        return True
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message or "rate limit" in message.lower()
+
+
+class LLMScheduler:
+    """
+    Shared admission control for LLM calls.
+
+    Each call waits in a priority queue until it is at the head and both the
+    request and token buckets can cover it, then runs on the caller's thread.
+    Rate-limit errors from the provider are retried with full-jitter
+    exponential backoff, re-entering the queue at the same priority.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = None,
+        tokens_per_minute: float = None,
+        max_retries: int = None,
+        backoff_base: float = None,
+        backoff_max: float = None,
+        clock=time.monotonic,
+        sleep=time.sleep
+    ):
+        """Initialize limits (defaults from config)."""
+        rpm = config.LLM_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+        tpm = config.LLM_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        self.request_bucket = TokenBucket(rpm, clock=clock)
+        self.token_bucket = TokenBucket(tpm, clock=clock)
+        self.max_retries = config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base or config.LLM_BACKOFF_BASE
+        self.backoff_max = backoff_max or config.LLM_BACKOFF_MAX
+        self._clock = clock
+        self._sleep = sleep
+
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+
+        # Metrics
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._retries = 0
+        self._rate_limit_errors = 0
+        self._cancelled = 0
+        self._max_queue_depth = 0
+        self._wait_times = deque(maxlen=1000)
+
+    @property
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def acquire(
+        self,
+        tokens: int = 1,
+        priority: int = INTERACTIVE,
+        cancelled: Callable[[], bool] = None
+    ) -> float:
+        """
+        Block until this caller may issue one request of ``tokens`` tokens.
+
+        Args:
+            tokens: Estimated tokens consumed by the request
+            priority: Queue priority (lower runs first)
+            cancelled: Polled while waiting; once it returns True the caller
+                leaves the queue without consuming budget
+
+        Returns:
+            Seconds spent waiting in the queue
+
+        Raises:
+            RequestCancelled: ``cancelled`` returned True before admission
+        """
+        start = self._clock()
+        poll = CANCEL_POLL_SECONDS if cancelled is not None else None
+        with self._cond:
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._queue, entry)
+            self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+
+            while True:
+                if cancelled is not None and cancelled():
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._cancelled += 1
+                    self._cond.notify_all()
+                    raise RequestCancelled("Request withdrawn while queued")
+                if self._queue[0] == entry:
+                    wait = max(
+                        self.request_bucket.time_until(1),
+                        self.token_bucket.time_until(tokens)
+                    )
+                    if wait <= 0:
+                        self.request_bucket.consume(1)
+                        self.token_bucket.consume(tokens)
+                        heapq.heappop(self._queue)
+                        self._cond.notify_all()
+                        break
+                    self._cond.wait(wait if poll is None else min(wait, poll))
+                else:
+                    self._cond.wait(poll)
+
+            waited = self._clock() - start
+            self._wait_times.append(waited)
+            return waited
+
+    def call(
+        self,
+        fn: Callable[[], T],
+        tokens: int = 1,
+        priority: int = INTERACTIVE,
+        cancelled: Callable[[], bool] = None
+    ) -> T:
+        """
+        Run ``fn`` under the rate limit, retrying on rate-limit errors.
+
+        Args:
+            fn: Zero-argument callable that performs the provider request
+            tokens: Estimated tokens consumed by the request
+            priority: INTERACTIVE, BATCH or any int (lower runs first)
+            cancelled: Optional check that withdraws the request while it
+                is queued (see acquire)
+
+        Returns:
+            Whatever ``fn`` returns
+
+        Raises:
+            RequestCancelled: The request was withdrawn before it was sent
+        """
+        with self._cond:
+            self._submitted += 1
+
+        attempt = 0
+        while True:
+            self.acquire(tokens, priority, cancelled)
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt >= self.max_retries:
+                    with self._cond:
+                        self._failed += 1
+                        if is_rate_limit_error(e):
+                            self._rate_limit_errors += 1
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                with self._cond:
+                    self._rate_limit_errors += 1
+                    self._retries += 1
+                print(f"⏳ Rate limited, retrying in {delay:.2f}s (attempt {attempt + 1}/{self.max_retries})")
+                self._sleep(delay)
+                attempt += 1
+                continue
+
+            with self._cond:
+                self._completed += 1
+            return result
+
+    def get_metrics(self) -> dict:
+        """Queue depth, wait-time and retry counters."""
+        with self._cond:
+            waits = sorted(self._wait_times)
+            return {
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self._max_queue_depth,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "cancelled": self._cancelled,
+                "retries": self._retries,
+                "rate_limit_errors": self._rate_limit_errors,
+                "wait_p50_s": round(_percentile(waits, 50), 4),
+                "wait_p95_s": round(_percentile(waits, 95), 4),
+                "wait_max_s": round(waits[-1], 4) if waits else 0.0,
+            }
+
+
+def _percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+_shared_scheduler: Optional[LLMScheduler] = None
+_shared_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """Return the process-wide scheduler shared by all LLM clients."""
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = LLMScheduler()
+        return _shared_scheduler
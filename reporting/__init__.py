@@ -1,4 +1,10 @@
 """Reporting package."""
 from .output import ReportGenerator
+from .export import (
+    ExportStats, XbrlCsvWriter, ParquetExportWriter, export_runs, iter_outputs
+)
 
-__all__ = ["ReportGenerator"]
+__all__ = [
+    "ReportGenerator",
+    "ExportStats", "XbrlCsvWriter", "ParquetExportWriter", "export_runs", "iter_outputs",
+]
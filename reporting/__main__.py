@@ -0,0 +1,147 @@
+"""
+Export CLI.
+
+    python -m reporting export --xbrl-csv out/group_2024Q4 --zip --period 2024-12-31
+    python -m reporting export --parquet out/history
+    python -m reporting benchmark --submissions 100000
+
+``export`` streams the latest successful run per entity, period and template
+from the run store (RUN_STORE_PATH); superseded reruns and runs without an
+entity or period are not submissions and are left out.
+``benchmark`` writes synthetic submissions and reports rows/s per format,
+next to the per-output text report as a baseline.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from tabulate import tabulate
+
+from models.corep import CorepOutput, FieldJustification, OwnFunds
+from models.run import RunRecord
+from .export import ExportStats, ParquetExportWriter, XbrlCsvWriter, _require_pyarrow, export_runs
+from .output import ReportGenerator
+
+
+def _export(args: argparse.Namespace) -> None:
+    from storage import RunStore
+
+    store = RunStore(args.store)
+    records = store.iter_latest(entity=args.entity, period=args.period, template=args.template)
+    for stats in export_runs(records, args.xbrl_csv, args.parquet, archive=args.zip):
+        print(json.dumps(stats.to_dict()))
+
+
+def synthetic_records(count: int, entities: int = 500, seed: int = 0):
+    """
+    Lazily yield ``count`` realistic-looking runs.
+
+    Outputs are cycled from a small pool, but every run gets its own run_id
+    (as distinct submissions would), so the output can be stored or joined on it.
+    """
+    rng = random.Random(seed)
+    pool = []
+    for i in range(min(count, 1000)):
+        cet1, at1, t2 = (round(rng.uniform(100, 50_000), 2) for _ in range(3))
+        output = CorepOutput(
+            own_funds=OwnFunds(
+                common_equity_tier_1=cet1, additional_tier_1=at1, tier_2=t2,
+                total_own_funds=cet1 + at1 + t2
+            ),
+            audit_log=[
+                FieldJustification(field=field, value=value, rule_ids=["PRA_OWNFUNDS_001", "PRA_OWNFUNDS_004"],
+                                   explanation=f"{field} recognised per CRR eligibility criteria")
+                for field, value in (
+                    ("common_equity_tier_1", cet1), ("additional_tier_1", at1),
+                    ("tier_2", t2), ("total_own_funds", cet1 + at1 + t2),
+                )
+            ],
+            warnings=["WARNING: Intangible assets deduction not stated"] if i % 4 == 0 else [],
+        )
+        pool.append(RunRecord(
+            question="", entity=f"LEI{i % entities:017d}", period="2024-12-31", output=output
+        ))
+    for record in itertools.islice(itertools.cycle(pool), count):
+        yield record.model_copy(update={"run_id": uuid.uuid4().hex})
+
+
+def _report_baseline(count: int) -> ExportStats:
+    """Per-output text report (ReportGenerator) timed on the same data."""
+    stats = ExportStats()
+    started = time.perf_counter()
+    for record in synthetic_records(count):
+        ReportGenerator.generate_full_report(record.output)
+        stats.submissions += 1
+        stats.figure_rows += 5
+        stats.audit_rows += len(record.output.audit_log)
+        stats.warning_rows += len(record.output.warnings)
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def _benchmark(args: argparse.Namespace) -> None:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        writers = [("xBRL-CSV", lambda: XbrlCsvWriter(os.path.join(tmp, "xbrl")))]
+        try:
+            _require_pyarrow()
+            writers.append(("Parquet", lambda: ParquetExportWriter(os.path.join(tmp, "parquet"))))
+        except ImportError as e:
+            print(f"⚠️  Skipping Parquet: {e}")
+
+        for name, make in writers:
+            with make() as writer:
+                writer.write_many(synthetic_records(args.submissions))
+            results.append((name, writer.stats))
+
+    baseline_count = min(args.submissions, args.baseline_submissions)
+    results.append(("Text report (baseline)", _report_baseline(baseline_count)))
+
+    print(f"\n{args.submissions:,} submissions (baseline: {baseline_count:,})\n")
+    print(tabulate(
+        [
+            [name, f"{stats.rows:,}", f"{stats.seconds:.2f}",
+             f"{stats.submissions / stats.seconds if stats.seconds else 0:,.0f}",
+             f"{stats.rows_per_second:,.0f}",
+             f"{stats.bytes_written / 1e6:,.1f} MB" if stats.bytes_written else "-"]
+            for name, stats in results
+        ],
+        headers=["Format", "Rows", "Seconds", "Submissions/s", "Rows/s", "Size"],
+        tablefmt="simple"
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export COREP runs to submission formats")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Export the latest successful run per submission")
+    export.add_argument("--store", default=None, help="Run store path (default: RUN_STORE_PATH)")
+    export.add_argument("--xbrl-csv", metavar="DIR", help="xBRL-CSV report package directory")
+    export.add_argument("--zip", action="store_true", help="Zip the xBRL-CSV package")
+    export.add_argument("--parquet", metavar="DIR", help="Parquet dataset directory")
+    export.add_argument("--entity", help="Only this entity")
+    export.add_argument("--period", help="Only this reporting period")
+    export.add_argument("--template", help="Only this COREP template")
+
+    benchmark = commands.add_parser("benchmark", help="Measure export throughput in rows/s")
+    benchmark.add_argument("--submissions", type=int, default=100_000, help="Synthetic runs to export")
+    benchmark.add_argument("--baseline-submissions", type=int, default=5_000,
+                           help="Runs rendered with ReportGenerator for comparison")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        if not args.xbrl_csv and not args.parquet:
+            parser.error("export needs --xbrl-csv and/or --parquet")
+        _export(args)
+    else:
+        _benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
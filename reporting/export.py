@@ -0,0 +1,471 @@
+"""
+Streaming export of many runs to regulatory submission formats.
+
+ReportGenerator renders one CorepOutput as an in-memory string. The writers
+here take an iterable of RunRecords (one per entity/period submission) and
+write each one as it arrives through large write buffers. Memory use is
+bounded by the buffer size and does not grow with the number of submissions.
+
+XbrlCsvWriter writes an xBRL-CSV style report package:
+
+    <path>/META-INF/reportPackage.json
+    <path>/reports/report.json       table and column metadata
+    <path>/reports/parameters.csv    baseCurrency, decimalsMonetary
+    <path>/reports/c_01.00.csv       entity, period, datapoint, factValue
+    <path>/reports/audit_log.csv     one row per audit-log entry
+    <path>/reports/warnings.csv      one row per warning
+
+ParquetExportWriter writes the same three tables as Parquet files
+(figures, audit_log, warnings). It needs pyarrow, which is imported lazily.
+
+Datapoints use the C 01.00 row codes for column 0010:
+
+    r0010  Own funds                       total_own_funds
+    r0015  Tier 1 capital                  common_equity_tier_1 + additional_tier_1
+    r0020  Common Equity Tier 1 capital    common_equity_tier_1
+    r0530  Additional Tier 1 capital       additional_tier_1
+    r0750  Tier 2 capital                  tier_2
+"""
+import csv
+import json
+import os
+import shutil
+import time
+import zipfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from models.corep import OwnFunds
+from models.run import RunRecord
+from storage.run_store import warning_type
+import config
+
+
+C01_TABLE = "c_01.00"
+
+# (datapoint, CorepOutput field); Tier 1 has no field of its own
+C01_DATAPOINTS: Tuple[Tuple[str, Optional[str]], ...] = (
+    ("r0010_c0010", "total_own_funds"),
+    ("r0015_c0010", None),
+    ("r0020_c0010", "common_equity_tier_1"),
+    ("r0530_c0010", "additional_tier_1"),
+    ("r0750_c0010", "tier_2"),
+)
+
+FIGURE_COLUMNS = ("entity", "period", "run_id", "datapoint", "field", "value")
+AUDIT_COLUMNS = ("entity", "period", "run_id", "field", "value", "rule_ids", "explanation")
+WARNING_COLUMNS = ("entity", "period", "run_id", "warning_type", "message")
+
+
+def own_funds_datapoints(own_funds: OwnFunds) -> List[Tuple[str, str, float]]:
+    """(datapoint, field, value) for each exported C 01.00 cell."""
+    tier_1 = own_funds.common_equity_tier_1 + own_funds.additional_tier_1
+    return [
+        (datapoint, name or "tier_1", tier_1 if name is None else getattr(own_funds, name))
+        for datapoint, name in C01_DATAPOINTS
+    ]
+
+
+def figure_rows(record: RunRecord) -> List[tuple]:
+    """Rows of the figures table for one run (FIGURE_COLUMNS order)."""
+    key = (record.entity or "", record.period or "", record.run_id)
+    return [key + cell for cell in own_funds_datapoints(record.output.own_funds)]
+
+
+def audit_rows(record: RunRecord) -> List[tuple]:
+    """Rows of the audit-log table for one run (AUDIT_COLUMNS order)."""
+    key = (record.entity or "", record.period or "", record.run_id)
+    return [
+        key + (entry.field, entry.value, entry.rule_ids, entry.explanation)
+        for entry in record.output.audit_log
+    ]
+
+
+def warning_rows(record: RunRecord) -> List[tuple]:
+    """Rows of the warnings table for one run (WARNING_COLUMNS order)."""
+    key = (record.entity or "", record.period or "", record.run_id)
+    return [key + (warning_type(message), message) for message in record.output.warnings]
+
+
+@dataclass
+class ExportStats:
+    """Counts and timing of one export."""
+
+    submissions: int = 0
+    skipped: int = 0
+    figure_rows: int = 0
+    audit_rows: int = 0
+    warning_rows: int = 0
+    seconds: float = 0.0
+    bytes_written: int = 0
+
+    @property
+    def rows(self) -> int:
+        return self.figure_rows + self.audit_rows + self.warning_rows
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "submissions": self.submissions,
+            "skipped": self.skipped,
+            "figure_rows": self.figure_rows,
+            "audit_rows": self.audit_rows,
+            "warning_rows": self.warning_rows,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "bytes_written": self.bytes_written,
+        }
+
+
+class _ExportWriter(ABC):
+    """Shared write loop: skips failed runs, counts rows, times the export."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stats = ExportStats()
+        self._closed = False
+        self._started = time.perf_counter()
+
+    def write(self, record: RunRecord) -> None:
+        """Append one run; runs without an output are counted as skipped."""
+        if record.output is None:
+            self.stats.skipped += 1
+            return
+        figures, audit, warnings = figure_rows(record), audit_rows(record), warning_rows(record)
+        self._write_rows(figures, audit, warnings)
+        self.stats.submissions += 1
+        self.stats.figure_rows += len(figures)
+        self.stats.audit_rows += len(audit)
+        self.stats.warning_rows += len(warnings)
+
+    def write_many(self, records: Iterable[RunRecord]) -> ExportStats:
+        """Append every run from an iterable, consuming it lazily."""
+        for record in records:
+            self.write(record)
+        return self.stats
+
+    def close(self) -> ExportStats:
+        """Flush and finish the output; returns the export statistics."""
+        if not self._closed:
+            self._closed = True
+            self._finish()
+            self.stats.seconds = time.perf_counter() - self._started
+        return self.stats
+
+    def discard(self) -> None:
+        """Close without finishing the output and remove the files written so far."""
+        if not self._closed:
+            self._closed = True
+            self._discard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # A failed write leaves a truncated export; never finish it as a valid package
+        if exc_info[0] is not None:
+            self.discard()
+        else:
+            self.close()
+
+    @abstractmethod
+    def _write_rows(self, figures: List[tuple], audit: List[tuple], warnings: List[tuple]) -> None:
+        """Write one run's rows of each table."""
+
+    @abstractmethod
+    def _finish(self) -> None:
+        """Flush buffers and write any trailing files or metadata."""
+
+    @abstractmethod
+    def _discard(self) -> None:
+        """Release open files and delete the partial output."""
+
+
+class XbrlCsvWriter(_ExportWriter):
+    """Streams runs into an xBRL-CSV style report package directory."""
+
+    def __init__(
+        self,
+        path: str,
+        currency: str = None,
+        decimals: int = None,
+        buffer_size: int = None,
+        archive: bool = False
+    ):
+        """
+        Args:
+            path: Package directory to create (must not already contain a report)
+            currency: ISO 4217 code written as the baseCurrency parameter
+            decimals: Decimal places for monetary values
+            buffer_size: Write buffer per table file in bytes
+            archive: Zip the package to ``path + '.zip'`` on close and remove the directory
+        """
+        super().__init__(path)
+        self.currency = currency or config.EXPORT_CURRENCY
+        self.decimals = config.EXPORT_DECIMALS if decimals is None else decimals
+        self.archive = archive
+        self._reports_dir = os.path.join(path, "reports")
+        if os.path.exists(os.path.join(self._reports_dir, "report.json")):
+            raise ValueError(f"{path} already contains a report package")
+        os.makedirs(self._reports_dir, exist_ok=True)
+
+        buffer_size = buffer_size or config.EXPORT_BUFFER_BYTES
+        self._files = {}
+        self._writers = {}
+        for table, columns in (
+            (C01_TABLE, ("entity", "period", "datapoint", "factValue")),
+            ("audit_log", AUDIT_COLUMNS),
+            ("warnings", WARNING_COLUMNS),
+        ):
+            f = open(os.path.join(self._reports_dir, f"{table}.csv"), "w",
+                     encoding="utf-8", newline="", buffering=buffer_size)
+            self._files[table] = f
+            self._writers[table] = csv.writer(f)
+            self._writers[table].writerow(columns)
+        self._value_format = f"{{:.{self.decimals}f}}".format
+
+    def _write_rows(self, figures, audit, warnings) -> None:
+        fmt = self._value_format
+        self._writers[C01_TABLE].writerows(
+            (entity, period, datapoint, fmt(value))
+            for entity, period, _, datapoint, _, value in figures
+        )
+        if audit:
+            self._writers["audit_log"].writerows(
+                (entity, period, run_id, field, fmt(value), " ".join(rule_ids), explanation)
+                for entity, period, run_id, field, value, rule_ids, explanation in audit
+            )
+        if warnings:
+            self._writers["warnings"].writerows(warnings)
+
+    def _finish(self) -> None:
+        for f in self._files.values():
+            f.close()
+
+        with open(os.path.join(self._reports_dir, "parameters.csv"), "w",
+                  encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerows([
+                ("name", "value"),
+                ("baseCurrency", self.currency),
+                ("decimalsMonetary", str(self.decimals)),
+            ])
+        with open(os.path.join(self._reports_dir, "report.json"), "w", encoding="utf-8") as f:
+            json.dump(self._metadata(), f, indent=2)
+        meta_inf = os.path.join(self.path, "META-INF")
+        os.makedirs(meta_inf, exist_ok=True)
+        with open(os.path.join(meta_inf, "reportPackage.json"), "w", encoding="utf-8") as f:
+            json.dump({"documentInfo": {"documentType": "https://xbrl.org/report-package/2023"}}, f)
+
+        self.stats.bytes_written = _tree_size(self.path)
+        if self.archive:
+            self.path = _zip_directory(self.path)
+
+    def _discard(self) -> None:
+        for f in self._files.values():
+            f.close()
+            os.remove(f.name)
+        _remove_empty_dirs(self._reports_dir, self.path)
+
+    def _metadata(self) -> dict:
+        """xBRL-CSV metadata describing the package tables."""
+        fact = {
+            "dimensions": {
+                "concept": "$datapoint",
+                "entity": "$entity",
+                "period": "$period",
+                "unit": f"iso4217:{self.currency}",
+            },
+            "decimals": "$decimalsMonetary",
+        }
+        plain = lambda columns: {"columns": {column: {} for column in columns}}
+        return {
+            "documentInfo": {"documentType": "https://xbrl.org/2021/xbrl-csv"},
+            "parameterURL": "parameters.csv",
+            "tableTemplates": {
+                C01_TABLE: {
+                    "columns": {
+                        "entity": {}, "period": {}, "datapoint": {}, "factValue": fact,
+                    }
+                },
+                "audit_log": plain(AUDIT_COLUMNS),
+                "warnings": plain(WARNING_COLUMNS),
+            },
+            "tables": {
+                table: {"template": table, "url": f"{table}.csv"}
+                for table in (C01_TABLE, "audit_log", "warnings")
+            },
+        }
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Parquet export needs pyarrow. Install it with: pip install pyarrow"
+        ) from e
+    return pyarrow, pyarrow.parquet
+
+
+class ParquetExportWriter(_ExportWriter):
+    """Streams runs into Parquet files, one row group per batch of rows."""
+
+    def __init__(self, path: str, batch_rows: int = None, compression: str = None):
+        """
+        Args:
+            path: Directory for figures.parquet, audit_log.parquet and warnings.parquet
+            batch_rows: Rows buffered per table before a row group is written
+            compression: Parquet codec (e.g. 'zstd', 'snappy', 'none')
+        """
+        super().__init__(path)
+        pa, pq = _require_pyarrow()
+        self._pa = pa
+        self.batch_rows = batch_rows or config.EXPORT_PARQUET_BATCH_ROWS
+        compression = compression or config.EXPORT_PARQUET_COMPRESSION
+        os.makedirs(path, exist_ok=True)
+
+        text = pa.string()
+        self._schemas = {
+            "figures": pa.schema([
+                ("entity", text), ("period", text), ("run_id", text),
+                ("datapoint", text), ("field", text), ("value", pa.float64()),
+            ]),
+            "audit_log": pa.schema([
+                ("entity", text), ("period", text), ("run_id", text), ("field", text),
+                ("value", pa.float64()), ("rule_ids", pa.list_(text)), ("explanation", text),
+            ]),
+            "warnings": pa.schema([
+                ("entity", text), ("period", text), ("run_id", text),
+                ("warning_type", text), ("message", text),
+            ]),
+        }
+        self._writers = {
+            table: pq.ParquetWriter(os.path.join(path, f"{table}.parquet"), schema,
+                                    compression=compression)
+            for table, schema in self._schemas.items()
+        }
+        self._buffers = {table: [] for table in self._schemas}
+
+    def _write_rows(self, figures, audit, warnings) -> None:
+        for table, rows in (("figures", figures), ("audit_log", audit), ("warnings", warnings)):
+            buffer = self._buffers[table]
+            buffer.extend(rows)
+            if len(buffer) >= self.batch_rows:
+                self._flush(table)
+
+    def _flush(self, table: str) -> None:
+        buffer = self._buffers[table]
+        if not buffer:
+            return
+        schema = self._schemas[table]
+        columns = [self._pa.array(column, type=field.type)
+                   for column, field in zip(zip(*buffer), schema)]
+        self._writers[table].write_table(self._pa.Table.from_arrays(columns, schema=schema))
+        buffer.clear()
+
+    def _finish(self) -> None:
+        for table, writer in self._writers.items():
+            self._flush(table)
+            writer.close()
+        self.stats.bytes_written = _tree_size(self.path)
+
+    def _discard(self) -> None:
+        for table, writer in self._writers.items():
+            writer.close()
+            os.remove(os.path.join(self.path, f"{table}.parquet"))
+        _remove_empty_dirs(self.path)
+
+
+def export_runs(
+    records: Iterable[RunRecord],
+    xbrl_csv_path: str = None,
+    parquet_path: str = None,
+    archive: bool = False
+) -> List[ExportStats]:
+    """
+    Export runs to one or both formats in a single pass over ``records``.
+
+    Every record is written, so pass one run per submission; a rerun of the
+    same entity, period and template would otherwise be exported twice.
+
+    Args:
+        records: Runs to export, e.g. RunStore.iter_latest()
+        xbrl_csv_path: xBRL-CSV package directory
+        parquet_path: Parquet dataset directory
+        archive: Zip the xBRL-CSV package
+
+    Returns:
+        Statistics per writer, in the order above
+    """
+    if not xbrl_csv_path and not parquet_path:
+        raise ValueError("No export destination given")
+
+    writers: List[_ExportWriter] = []
+    try:
+        if xbrl_csv_path:
+            writers.append(XbrlCsvWriter(xbrl_csv_path, archive=archive))
+        if parquet_path:
+            writers.append(ParquetExportWriter(parquet_path))
+        for record in records:
+            for writer in writers:
+                writer.write(record)
+    except BaseException:
+        # pyarrow missing, a bad record or an interrupt: a partial export must not
+        # be finished into something that looks like a complete submission
+        for writer in writers:
+            writer.discard()
+        raise
+    return [writer.close() for writer in writers]
+
+
+def _tree_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+
+def _remove_empty_dirs(*paths: str) -> None:
+    """Remove each directory, in order, if it is empty."""
+    for path in paths:
+        if os.path.isdir(path) and not os.listdir(path):
+            os.rmdir(path)
+
+
+def _zip_directory(path: str) -> str:
+    """Zip ``path`` (keeping it as the top-level folder) and remove the directory."""
+    path = os.path.normpath(path)
+    archive_path = path + ".zip"
+    base = os.path.dirname(path)
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for root, _, names in os.walk(path):
+            for name in sorted(names):
+                full = os.path.join(root, name)
+                zf.write(full, os.path.relpath(full, base))
+    shutil.rmtree(path)
+    return archive_path
+
+
+def iter_outputs(
+    outputs: Iterable, entity: str = None, period: str = None
+) -> Iterator[RunRecord]:
+    """
+    Wrap bare CorepOutputs (or (entity, period, output) tuples) as RunRecords.
+
+    Args:
+        outputs: CorepOutput objects or (entity, period, CorepOutput) tuples
+        entity: Entity for bare outputs
+        period: Period for bare outputs
+    """
+    for item in outputs:
+        if isinstance(item, tuple):
+            item_entity, item_period, output = item
+        else:
+            item_entity, item_period, output = entity, period, item
+        yield RunRecord(question="", entity=item_entity, period=item_period, output=output)
@@ -7,6 +7,7 @@ from typing import List
 from tabulate import tabulate
 
 from models.corep import CorepOutput, FieldJustification
+from profiling import profile_stage
 
 
 class ReportGenerator:
@@ -94,22 +95,23 @@ class ReportGenerator:
         Returns:
             Full formatted report string
         """
-        sections = [
-            "╔══════════════════════════════════════════════════════════════╗",
-            "║         PRA COREP OWN FUNDS REPORTING ASSISTANT              ║",
-            "╚══════════════════════════════════════════════════════════════╝",
-            "",
-            "═══ A. STRUCTURED JSON OUTPUT ═══",
-            "",
-            ReportGenerator.to_json(output),
-            "",
-            "═══ B. COREP TABLE EXTRACT ═══",
-            "",
-            ReportGenerator.to_table(output),
-            "",
-            "═══ C. AUDIT LOG ═══",
-            "",
-            ReportGenerator.to_audit_log(output),
-        ]
-        
+        with profile_stage("generate_full_report"):
+            sections = [
+                "╔══════════════════════════════════════════════════════════════╗",
+                "║         PRA COREP OWN FUNDS REPORTING ASSISTANT              ║",
+                "╚══════════════════════════════════════════════════════════════╝",
+                "",
+                "═══ A. STRUCTURED JSON OUTPUT ═══",
+                "",
+                ReportGenerator.to_json(output),
+                "",
+                "═══ B. COREP TABLE EXTRACT ═══",
+                "",
+                ReportGenerator.to_table(output),
+                "",
+                "═══ C. AUDIT LOG ═══",
+                "",
+                ReportGenerator.to_audit_log(output),
+            ]
+            
         return "\n".join(sections)
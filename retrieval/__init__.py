@@ -1,5 +1,12 @@
 """Retrieval package for RAG pipeline."""
 from .embeddings import EmbeddingGenerator
+from .embedding_client import EmbeddingClient
+from .filters import ChunkFilter
 from .vector_store import VectorStore
+from .sharding import ShardedVectorStore, TemplateRouter
+from .reranker import CrossEncoderReranker, TwoStageRetriever
 
-__all__ = ["EmbeddingGenerator", "VectorStore"]
+__all__ = [
+    "EmbeddingGenerator", "EmbeddingClient", "ChunkFilter", "VectorStore",
+    "ShardedVectorStore", "TemplateRouter", "CrossEncoderReranker", "TwoStageRetriever",
+]
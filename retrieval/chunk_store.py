@@ -0,0 +1,194 @@
+"""
+Compact, memory-mapped columnar store for regulatory chunks.
+
+Instead of keeping one Pydantic object per chunk in every process, chunk
+data lives in a directory of flat files that are memory-mapped read-only:
+
+    meta.json       count, field vocabularies, hash table size
+    strings.bin     UTF-8 bytes of every chunk ID and text, back to back
+    offsets.npy     int64[2n + 1]: row r's ID is strings[off[2r]:off[2r+1]],
+                    its text is strings[off[2r+1]:off[2r+2]]
+    source.npy      uint32 codes into vocab["source"]
+    paragraph.npy   uint32 codes into vocab["paragraph"]
+    template.npy    uint32 codes into vocab["template"]
+    id_table.npy    int64 open-addressing hash table (row or -1) for O(1)
+                    lookup by chunk ID
+
+Worker processes that open the same directory share its pages through the
+OS page cache. A RegulatoryChunk is only materialised for rows that are
+actually read (e.g. the handful of retrieval hits).
+"""
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from models.regulatory import RegulatoryChunk
+
+
+_CODED_FIELDS = ("source", "paragraph", "template")
+
+
+def _id_hash(chunk_id: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(chunk_id, digest_size=8).digest(), "little")
+
+
+def content_digest(chunks: Sequence[RegulatoryChunk]) -> str:
+    """Stable digest of chunk content, used to version store directories."""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        for value in (chunk.id, chunk.source, chunk.paragraph, chunk.template, chunk.text):
+            digest.update(value.encode("utf-8"))
+            digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+class ChunkStore:
+    """Read-only, memory-mapped chunk columns with O(1) lookup by ID."""
+
+    def __init__(self, path: str):
+        """Open an existing store directory."""
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self._count: int = meta["count"]
+        self.vocab: Dict[str, List[str]] = meta["vocab"]
+        self._offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self._codes = {
+            field: np.load(os.path.join(path, f"{field}.npy"), mmap_mode="r")
+            for field in _CODED_FIELDS
+        }
+        self._id_table = np.load(os.path.join(path, "id_table.npy"), mmap_mode="r")
+        self._mask = len(self._id_table) - 1
+
+        with open(os.path.join(path, "strings.bin"), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._strings = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) if size else b""
+
+    @classmethod
+    def build(cls, chunks: Sequence[RegulatoryChunk], path: str) -> "ChunkStore":
+        """
+        Write chunks to ``path`` and open the result.
+
+        The store is written to a temporary directory and renamed into place,
+        so concurrent builders of the same content never see a partial store.
+        If ``path`` already exists it is reused as-is.
+        """
+        if os.path.isdir(path):
+            return cls(path)
+
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".chunk-store-", dir=parent)
+
+        try:
+            count = len(chunks)
+            vocab: Dict[str, Dict[str, int]] = {field: {} for field in _CODED_FIELDS}
+            codes = {field: np.empty(count, dtype=np.uint32) for field in _CODED_FIELDS}
+            offsets = np.empty(2 * count + 1, dtype=np.int64)
+
+            position = 0
+            offsets[0] = 0
+            with open(os.path.join(tmp, "strings.bin"), "wb", buffering=1 << 20) as blob:
+                for row, chunk in enumerate(chunks):
+                    for slot, value in enumerate((chunk.id, chunk.text)):
+                        encoded = value.encode("utf-8")
+                        blob.write(encoded)
+                        position += len(encoded)
+                        offsets[2 * row + slot + 1] = position
+                    for field in _CODED_FIELDS:
+                        value = getattr(chunk, field)
+                        codes[field][row] = vocab[field].setdefault(value, len(vocab[field]))
+
+            # Open addressing with linear probing, load factor <= 0.5
+            size = 1
+            while size < 2 * max(count, 1):
+                size <<= 1
+            table = np.full(size, -1, dtype=np.int64)
+            mask = size - 1
+            for row, chunk in enumerate(chunks):
+                slot = _id_hash(chunk.id.encode("utf-8")) & mask
+                while table[slot] != -1:
+                    slot = (slot + 1) & mask
+                table[slot] = row
+
+            np.save(os.path.join(tmp, "offsets.npy"), offsets)
+            np.save(os.path.join(tmp, "id_table.npy"), table)
+            for field in _CODED_FIELDS:
+                np.save(os.path.join(tmp, f"{field}.npy"), codes[field])
+
+            meta = {
+                "count": count,
+                "vocab": {field: list(values) for field, values in vocab.items()},
+            }
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+
+            try:
+                os.rename(tmp, path)
+            except OSError:
+                # Another process published the same store first
+                if not os.path.isdir(path):
+                    raise
+                shutil.rmtree(tmp, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        return cls(path)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[RegulatoryChunk]:
+        for row in range(self._count):
+            yield self[row]
+
+    def __getitem__(self, row: int) -> RegulatoryChunk:
+        """Materialise the chunk at a row position."""
+        if row < 0:
+            row += self._count
+        if not 0 <= row < self._count:
+            raise IndexError(row)
+        return RegulatoryChunk(
+            id=self._string(2 * row),
+            text=self._string(2 * row + 1),
+            **{field: self.vocab[field][self._codes[field][row]] for field in _CODED_FIELDS}
+        )
+
+    def _string(self, slot: int) -> str:
+        start, end = int(self._offsets[slot]), int(self._offsets[slot + 1])
+        return bytes(self._strings[start:end]).decode("utf-8")
+
+    def row_of(self, chunk_id: str) -> Optional[int]:
+        """Row position of a chunk ID, or None (expected O(1))."""
+        encoded = chunk_id.encode("utf-8")
+        slot = _id_hash(encoded) & self._mask
+        while True:
+            row = int(self._id_table[slot])
+            if row == -1:
+                return None
+            start, end = int(self._offsets[2 * row]), int(self._offsets[2 * row + 1])
+            if self._strings[start:end] == encoded:
+                return row
+            slot = (slot + 1) & self._mask
+
+    def get(self, chunk_id: str) -> Optional[RegulatoryChunk]:
+        """Materialise a chunk by ID, or None if absent."""
+        row = self.row_of(chunk_id)
+        return self[row] if row is not None else None
+
+    def codes(self, field: str) -> np.ndarray:
+        """Dictionary codes for a metadata column (source, paragraph, template)."""
+        return self._codes[field]
+
+    def texts(self) -> Iterator[str]:
+        """Stream chunk texts in row order."""
+        for row in range(self._count):
+            yield self._string(2 * row + 1)
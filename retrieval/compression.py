@@ -0,0 +1,135 @@
+"""
+Memory, latency and recall@k of compressed indexes against the Flat baseline.
+
+See retrieval/index_factory.py for the supported compression settings.
+
+Run with:
+    python -m retrieval.compression --factory "PCA128,SQ8" --factory SQfp16 -k 10
+"""
+import argparse
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+import faiss
+from tabulate import tabulate
+
+from .index_factory import build_faiss_index, index_memory_bytes
+
+
+@dataclass
+class CompressionReport:
+    """Memory, latency and recall of one index configuration."""
+
+    factory: str
+    memory_bytes: int
+    search_ms_per_query: float
+    recall_at_k: float
+    k: int
+    error: Optional[str] = None
+
+    def to_row(self, baseline_bytes: int) -> List[str]:
+        if self.error:
+            return [self.factory, "-", "-", "-", f"not built: {self.error}"]
+        return [
+            self.factory,
+            f"{self.memory_bytes / 1e6:,.2f} MB",
+            f"{baseline_bytes / max(self.memory_bytes, 1):.1f}x",
+            f"{self.search_ms_per_query:.3f}",
+            f"{self.recall_at_k:.3f}",
+        ]
+
+
+def _timed_search(index: faiss.Index, queries: np.ndarray, k: int):
+    start = time.perf_counter()
+    _, indices = index.search(queries, k)
+    elapsed = time.perf_counter() - start
+    return indices, elapsed * 1000 / len(queries)
+
+
+def evaluate_compression(
+    embeddings: np.ndarray,
+    queries: np.ndarray,
+    factories: List[str],
+    k: int = 10
+) -> List[CompressionReport]:
+    """
+    Compare index configurations against the uncompressed Flat baseline.
+
+    Recall@k is the fraction of the baseline's top-k neighbours that the
+    compressed index also returns in its top-k. A configuration FAISS cannot
+    train on this corpus is reported with ``error`` set instead of being
+    measured as a silent Flat fallback.
+
+    Args:
+        embeddings: Corpus vectors (n, d)
+        queries: Query vectors (m, d)
+        factories: Index-factory strings to evaluate
+        k: Neighbours per query
+
+    Returns:
+        One report per configuration, baseline first
+    """
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    k = min(k, len(embeddings))
+
+    baseline = build_faiss_index(embeddings, "Flat")
+    truth, baseline_ms = _timed_search(baseline, queries, k)
+    reports = [CompressionReport("Flat", index_memory_bytes(baseline), baseline_ms, 1.0, k)]
+
+    for factory in factories:
+        try:
+            index = build_faiss_index(embeddings, factory, fallback=False)
+        except RuntimeError as e:
+            reports.append(CompressionReport(
+                factory, 0, 0.0, 0.0, k, error=str(e).strip().splitlines()[-1].split("Error: ")[-1]
+            ))
+            continue
+        found, ms = _timed_search(index, queries, k)
+        hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+        reports.append(CompressionReport(
+            factory, index_memory_bytes(index), ms, hits / (len(queries) * k), k
+        ))
+
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare compressed FAISS indexes against Flat")
+    parser.add_argument("--factory", action="append", required=True,
+                        help="FAISS index-factory string (repeatable)")
+    parser.add_argument("-k", type=int, default=10, help="Neighbours per query for recall@k")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Use N random vectors instead of the corpus (memory/latency only; "
+                             "recall on random data understates real recall)")
+    parser.add_argument("--queries", type=int, default=1000, help="Queries for synthetic runs")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        rng = np.random.default_rng(0)
+        embeddings = rng.standard_normal((args.synthetic, 384), dtype=np.float32)
+        queries = rng.standard_normal((args.queries, 384), dtype=np.float32)
+    else:
+        from evaluation import load_golden_set
+        from knowledge_base import TEMPLATES, get_template_chunks
+        from .embeddings import EmbeddingGenerator
+
+        embedder = EmbeddingGenerator()
+        chunks = [chunk for code in TEMPLATES for chunk in get_template_chunks(code)]
+        embeddings = embedder.embed_chunks(chunks)
+        # Real questions, not the corpus vectors (which are their own nearest neighbours)
+        queries = embedder.embed_texts([golden.question for golden in load_golden_set()])
+
+    reports = evaluate_compression(embeddings, queries, args.factory, args.k)
+    baseline_bytes = reports[0].memory_bytes
+    print(f"\n{len(embeddings):,} vectors, {len(queries):,} queries, k={reports[0].k}\n")
+    print(tabulate(
+        [report.to_row(baseline_bytes) for report in reports],
+        headers=["Index", "Memory", "Ratio", "ms/query", f"Recall@{reports[0].k}"],
+        tablefmt="simple"
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Client and wire protocol for the shared embedding server.
+
+Wire format (both directions): 4-byte big-endian header length, a JSON
+header, then for encode responses the raw float32 matrix (row-major).
+"""
+import json
+import socket
+import struct
+import threading
+from typing import List
+
+import numpy as np
+
+
+_HEADER = struct.Struct(">I")
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    """Read exactly ``size`` bytes or raise ConnectionError."""
+    data = bytearray()
+    while len(data) < size:
+        part = sock.recv(size - len(data))
+        if not part:
+            raise ConnectionError("Embedding server connection closed")
+        data.extend(part)
+    return bytes(data)
+
+
+def send_message(sock: socket.socket, header: dict, payload: bytes = b"") -> None:
+    encoded = json.dumps(header).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(encoded)) + encoded + payload)
+
+
+def recv_header(sock: socket.socket) -> dict:
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, length).decode("utf-8"))
+
+
+class EmbeddingClient:
+    """Client for EmbeddingServer; keeps one connection per thread."""
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self._local = threading.local()
+        self._dimension = None
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _reset(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+        self._local.sock = None
+
+    def _request(self, header: dict) -> tuple:
+        # One reconnect attempt covers a restarted server
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_message(sock, header)
+                response = recv_header(sock)
+                payload = b""
+                if "shape" in response:
+                    rows, dim = response["shape"]
+                    payload = _recv_exact(sock, rows * dim * 4)
+                return response, payload
+            except (ConnectionError, OSError):
+                self._reset()
+                if attempt:
+                    raise
+
+    @property
+    def dimension(self) -> int:
+        """Embedding dimension of the server's model (asked once, then cached)."""
+        if self._dimension is None:
+            response, _ = self._request({"op": "stats"})
+            self._dimension = response["dimension"]
+        return self._dimension
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts on the server; returns a (len(texts), dim) float32 array."""
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        response, payload = self._request({"op": "encode", "texts": texts})
+        if response.get("error"):
+            raise RuntimeError(f"Embedding server error: {response['error']}")
+        rows, dim = response["shape"]
+        self._dimension = dim
+        return np.frombuffer(payload, dtype=np.float32).reshape(rows, dim)
+
+    def stats(self) -> dict:
+        """Micro-batching counters from the server."""
+        response, _ = self._request({"op": "stats"})
+        if "dimension" in response:
+            self._dimension = response["dimension"]
+        return response.get("stats", {})
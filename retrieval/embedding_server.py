@@ -0,0 +1,205 @@
+"""
+Shared embedding-model server for multi-worker deployments.
+
+One process loads the SentenceTransformer model and serves encode requests
+over a Unix domain socket. EmbeddingGenerator switches to client mode when
+EMBEDDING_SERVER_SOCKET is set, so worker processes never import torch or
+hold their own copy of the model. Concurrent requests from all workers are
+micro-batched into a single encode call.
+
+Run with:
+    python -m retrieval.embedding_server --socket /tmp/corep-embed.sock
+"""
+import argparse
+import os
+import queue
+import socketserver
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from .embedding_client import recv_header, send_message
+import config
+
+
+class _PendingRequest:
+    """One client request waiting for its slice of a micro-batch."""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Collects requests from many connections and encodes them together.
+
+    A batch is flushed when it reaches ``max_batch`` texts or when the
+    oldest request has waited ``max_wait_ms``.
+    """
+
+    def __init__(self, model, max_batch: int = None, max_wait_ms: float = None):
+        self.model = model
+        self.max_batch = max_batch or config.EMBEDDING_SERVER_MAX_BATCH
+        self.max_wait = (max_wait_ms or config.EMBEDDING_SERVER_MAX_WAIT_MS) / 1000.0
+        self._queue: "queue.Queue[_PendingRequest]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.texts = 0
+        self.requests = 0
+        self.dimension = model.get_sentence_embedding_dimension()
+        threading.Thread(target=self._loop, name="embed-batcher", daemon=True).start()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Submit texts and block until their embeddings are ready."""
+        if not texts:
+            # model.encode([]) does not return a (0, dim) matrix
+            return np.empty((0, self.dimension), dtype=np.float32)
+        request = _PendingRequest(texts)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error:
+            raise RuntimeError(request.error)
+        return request.result
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0].texts)
+            deadline = time.monotonic() + self.max_wait
+
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request.texts)
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[_PendingRequest]) -> None:
+        texts = [text for request in batch for text in request.texts]
+        try:
+            embeddings = self.model.encode(texts, convert_to_numpy=True).astype(np.float32)
+        except Exception as e:
+            for request in batch:
+                request.error = str(e)
+                request.done.set()
+            return
+
+        offset = 0
+        for request in batch:
+            request.result = embeddings[offset:offset + len(request.texts)]
+            offset += len(request.texts)
+            request.done.set()
+
+        with self._lock:
+            self.batches += 1
+            self.texts += len(texts)
+            self.requests += len(batch)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "texts": self.texts,
+                "avg_batch_texts": round(self.texts / self.batches, 2) if self.batches else 0.0,
+                "avg_batch_requests": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            }
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Serves requests on one client connection until it closes."""
+
+    def handle(self) -> None:
+        batcher: MicroBatcher = self.server.batcher
+        while True:
+            try:
+                header = recv_header(self.request)
+            except (ConnectionError, OSError):
+                return
+
+            op = header.get("op", "encode")
+            try:
+                if op == "encode":
+                    embeddings = batcher.encode(header["texts"])
+                    send_message(
+                        self.request,
+                        {"shape": list(embeddings.shape)},
+                        np.ascontiguousarray(embeddings, dtype=np.float32).tobytes()
+                    )
+                elif op == "stats":
+                    send_message(self.request, {"stats": batcher.stats(), "dimension": batcher.dimension})
+                else:
+                    send_message(self.request, {"error": f"Unknown op '{op}'"})
+            except Exception as e:
+                send_message(self.request, {"error": str(e)})
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class EmbeddingServer:
+    """Holds the embedding model and serves micro-batched encode requests."""
+
+    def __init__(
+        self,
+        socket_path: str = None,
+        model_name: str = None,
+        max_batch: int = None,
+        max_wait_ms: float = None
+    ):
+        """Initialize server settings (defaults from config)."""
+        self.socket_path = socket_path or config.EMBEDDING_SERVER_SOCKET
+        self.model_name = model_name or config.EMBEDDING_MODEL
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+
+    def serve_forever(self) -> None:
+        """Load the model and serve until interrupted."""
+        if not self.socket_path:
+            raise ValueError("Embedding server socket path not set.")
+
+        from sentence_transformers import SentenceTransformer
+        from .threads import configure_torch_threads
+
+        configure_torch_threads()
+        print(f"🧠 Loading embedding model '{self.model_name}'...")
+        model = SentenceTransformer(self.model_name)
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        with _Server(self.socket_path, _Handler) as server:
+            server.batcher = MicroBatcher(model, self.max_batch, self.max_wait_ms)
+            print(f"✅ Serving embeddings on {self.socket_path}")
+            try:
+                server.serve_forever()
+            finally:
+                if os.path.exists(self.socket_path):
+                    os.unlink(self.socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared embedding-model server")
+    parser.add_argument("--socket", default=config.EMBEDDING_SERVER_SOCKET or "/tmp/corep-embed.sock")
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL)
+    parser.add_argument("--max-batch", type=int, default=config.EMBEDDING_SERVER_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=config.EMBEDDING_SERVER_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    EmbeddingServer(args.socket, args.model, args.max_batch, args.max_wait_ms).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,76 @@
 """
 Embedding generation using sentence-transformers.
 """
-from typing import List
+import threading
+from typing import TYPE_CHECKING, List
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
 from models.regulatory import RegulatoryChunk
+from .embedding_client import EmbeddingClient
+from .threads import configure_torch_threads
 import config
 
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
 
 class EmbeddingGenerator:
-    """Generates embeddings for text using sentence-transformers."""
+    """
+    Generates embeddings for text using sentence-transformers.
+    
+    In client mode (a server socket is configured) encoding is delegated to
+    a shared EmbeddingServer process, and sentence-transformers/torch are
+    never imported in this process.
+    """
     
-    def __init__(self, model_name: str = None):
+    def __init__(self, model_name: str = None, server_socket: str = None):
         """Initialize with specified model or default from config."""
         self.model_name = model_name or config.EMBEDDING_MODEL
+        self.server_socket = server_socket or config.EMBEDDING_SERVER_SOCKET
+        self._client = EmbeddingClient(self.server_socket) if self.server_socket else None
         self._model = None
+        self._load_lock = threading.Lock()
+        # Bounds concurrent encodes so sessions x torch threads <= cores
+        self._encode_slots = threading.BoundedSemaphore(config.EMBEDDING_MAX_CONCURRENCY)
     
     @property
-    def model(self) -> SentenceTransformer:
-        """Lazy load the embedding model."""
+    def model(self) -> "SentenceTransformer":
+        """Lazy load the embedding model (once, even under concurrent access)."""
         if self._model is None:
-            self._model = SentenceTransformer(self.model_name)
+            with self._load_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    configure_torch_threads()
+                    self._model = SentenceTransformer(self.model_name)
         return self._model
     
+    @property
+    def is_client(self) -> bool:
+        """True if encoding is delegated to a shared embedding server."""
+        return self._client is not None
+    
+    def warm_up(self) -> None:
+        """Load the local model, or check the server connection in client mode."""
+        if self.is_client:
+            self._client.stats()
+        else:
+            _ = self.model
+    
     def embed_text(self, text: str) -> np.ndarray:
         """Generate embedding for a single text string."""
-        return self.model.encode(text, convert_to_numpy=True)
+        if self.is_client:
+            return self._client.encode([text])[0]
+        model = self.model
+        with self._encode_slots:
+            return model.encode(text, convert_to_numpy=True)
     
     def embed_texts(self, texts: List[str]) -> np.ndarray:
         """Generate embeddings for multiple texts."""
-        return self.model.encode(texts, convert_to_numpy=True)
+        if self.is_client:
+            return self._client.encode(texts)
+        model = self.model
+        with self._encode_slots:
+            return model.encode(texts, convert_to_numpy=True)
     
     def embed_chunks(self, chunks: List[RegulatoryChunk]) -> np.ndarray:
         """Generate embeddings for regulatory chunks using their text content."""
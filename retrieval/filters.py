@@ -0,0 +1,162 @@
+"""
+Metadata pre-filtering for vector retrieval.
+
+Filters are evaluated against precomputed bitsets (one packed bit per
+indexed chunk) and handed to FAISS as an ID selector, so the search itself
+skips non-matching vectors and still returns a full top_k.
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import faiss
+
+from .chunk_store import ChunkStore
+import config
+
+
+@dataclass(frozen=True)
+class ChunkFilter:
+    """
+    Predicate on RegulatoryChunk metadata.
+
+    Values within one field are OR-ed; fields are AND-ed. A field left as
+    None does not constrain the search.
+
+    Example:
+        ChunkFilter(sources=("PRA SS3/21",))
+        ChunkFilter(paragraphs=("Article 26", "Article 36"))
+    """
+
+    sources: Optional[Tuple[str, ...]] = None
+    paragraphs: Optional[Tuple[str, ...]] = None
+    ids: Optional[Tuple[str, ...]] = None
+
+    def __post_init__(self):
+        # Accept lists for convenience but keep the filter hashable
+        for name in ("sources", "paragraphs", "ids"):
+            value = getattr(self, name)
+            if value is not None and not isinstance(value, tuple):
+                object.__setattr__(self, name, tuple(value))
+
+
+class MetadataIndex:
+    """
+    Packed bitsets over chunk positions in the FAISS index.
+
+    Bitsets are precomputed per distinct value for low-cardinality columns
+    (up to FILTER_BITSET_MAX_VALUES values, e.g. source). Higher-cardinality
+    columns are matched against the store's dictionary codes at query time.
+    Chunk IDs are resolved to rows through the store's hash table.
+    """
+
+    _FIELDS = {"sources": "source", "paragraphs": "paragraph"}
+
+    def __init__(self, store: ChunkStore):
+        """Precompute bitsets for the chunks in a ChunkStore (in index order)."""
+        self.store = store
+        self.size = len(store)
+        self._nbytes = (self.size + 7) // 8
+        self._codes_by_value: Dict[str, Dict[str, int]] = {}
+        self._bitsets: Dict[str, Dict[int, np.ndarray]] = {}
+
+        for attr, column in self._FIELDS.items():
+            vocab = store.vocab[column]
+            self._codes_by_value[attr] = {value: code for code, value in enumerate(vocab)}
+            if len(vocab) <= config.FILTER_BITSET_MAX_VALUES:
+                codes = np.asarray(store.codes(column))
+                self._bitsets[attr] = {
+                    code: np.packbits(codes == code, bitorder="little")
+                    for code in range(len(vocab))
+                }
+
+    def _empty(self) -> np.ndarray:
+        return np.zeros(self._nbytes, dtype=np.uint8)
+
+    def _field_bits(self, attr: str, values: Tuple[str, ...]) -> np.ndarray:
+        lookup = self._codes_by_value[attr]
+        codes = [lookup[value] for value in values if value in lookup]
+        if attr in self._bitsets:
+            bits = self._empty()
+            for code in codes:
+                bits |= self._bitsets[attr][code]
+            return bits
+        mask = np.isin(self.store.codes(self._FIELDS[attr]), codes)
+        return np.packbits(mask, bitorder="little")
+
+    def evaluate(self, chunk_filter: ChunkFilter) -> np.ndarray:
+        """
+        Evaluate a filter to a packed bitmap (bit i = chunk at row i matches).
+
+        Bit order is little-endian within each byte, as faiss.IDSelectorBitmap expects.
+        """
+        result = np.full(self._nbytes, 0xFF, dtype=np.uint8)
+
+        for attr in self._FIELDS:
+            wanted = getattr(chunk_filter, attr)
+            if wanted is not None:
+                result &= self._field_bits(attr, wanted)
+
+        if chunk_filter.ids is not None:
+            id_bits = self._empty()
+            rows = [self.store.row_of(chunk_id) for chunk_id in chunk_filter.ids]
+            rows = np.asarray([row for row in rows if row is not None], dtype=np.int64)
+            if len(rows):
+                np.bitwise_or.at(id_bits, rows >> 3, (1 << (rows & 7)).astype(np.uint8))
+            result &= id_bits
+
+        # Clear padding bits beyond the last chunk
+        if self.size % 8:
+            result[-1] &= (1 << (self.size % 8)) - 1
+        return result
+
+    @staticmethod
+    def count(bitmap: np.ndarray) -> int:
+        """Number of set bits in a packed bitmap."""
+        return int(np.unpackbits(bitmap).sum())
+
+
+def search_with_bitmap(
+    index: faiss.Index,
+    queries: np.ndarray,
+    top_k: int,
+    bitmap: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run index.search restricted to the rows set in ``bitmap``.
+
+    Index types without ID-selector support (e.g. IndexPQ) fall back to
+    widening an unfiltered search until top_k matching rows are found.
+    """
+    selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+    params = faiss.SearchParameters(sel=selector)
+    try:
+        return index.search(queries, top_k, params=params)
+    except RuntimeError:
+        return _search_and_post_filter(index, queries, top_k, bitmap)
+
+
+def _search_and_post_filter(
+    index: faiss.Index,
+    queries: np.ndarray,
+    top_k: int,
+    bitmap: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    mask = np.unpackbits(bitmap, bitorder="little").astype(bool)
+    wanted = min(top_k, int(mask.sum()))
+    out_d = np.full((len(queries), top_k), np.inf, dtype=np.float32)
+    out_i = np.full((len(queries), top_k), -1, dtype=np.int64)
+
+    for row, query in enumerate(queries):
+        k = top_k
+        while True:
+            k = min(k * 4, index.ntotal)
+            distances, indices = index.search(query.reshape(1, -1), k)
+            keep = (indices[0] >= 0) & mask[np.clip(indices[0], 0, None)]
+            if keep.sum() >= wanted or k >= index.ntotal:
+                break
+
+        found_d, found_i = distances[0][keep][:top_k], indices[0][keep][:top_k]
+        out_d[row, :len(found_d)] = found_d
+        out_i[row, :len(found_i)] = found_i
+    return out_d, out_i
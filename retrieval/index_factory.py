@@ -0,0 +1,59 @@
+"""
+FAISS index construction with optional vector compression.
+
+The index type is chosen by a FAISS index-factory string (VECTOR_INDEX_FACTORY):
+
+    "Flat"          uncompressed float32 (default)
+    "SQfp16"        float16 scalar quantization (2x smaller)
+    "SQ8"           8-bit scalar quantization (4x smaller)
+    "PQ48"          product quantization, 48 x 8-bit codes (32x smaller)
+    "PCA128,SQ8"    PCA to 128 dims, then 8-bit quantization
+
+Trainable stages (PCA, SQ, PQ) are trained on the corpus embeddings. Query
+vectors go through the same index, so the PCA projection and quantizer are
+applied to them consistently.
+"""
+import numpy as np
+import faiss
+
+import config
+
+
+def build_faiss_index(
+    embeddings: np.ndarray, factory: str = None, fallback: bool = True
+) -> faiss.Index:
+    """
+    Build and fill a FAISS index from embeddings using an index-factory string.
+
+    Falls back to an uncompressed IndexFlatL2 if the compressed index cannot
+    be trained (e.g. the corpus has fewer vectors than PQ centroids). With
+    ``fallback=False`` the FAISS RuntimeError is raised instead.
+    """
+    factory = factory or config.VECTOR_INDEX_FACTORY
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    dimension = embeddings.shape[1]
+
+    if factory == "Flat":
+        index = faiss.IndexFlatL2(dimension)
+        index.add(embeddings)
+        return index
+
+    try:
+        index = faiss.index_factory(dimension, factory, faiss.METRIC_L2)
+        if not index.is_trained:
+            index.train(embeddings)
+        index.add(embeddings)
+        return index
+    except RuntimeError as e:
+        if not fallback:
+            raise
+        print(f"⚠️  Could not build '{factory}' index ({len(embeddings)} vectors): "
+              f"{str(e).splitlines()[-1]}. Falling back to Flat.")
+        index = faiss.IndexFlatL2(dimension)
+        index.add(embeddings)
+        return index
+
+
+def index_memory_bytes(index: faiss.Index) -> int:
+    """Serialized size of an index, a close proxy for its resident memory."""
+    return int(faiss.serialize_index(index).nbytes)
@@ -0,0 +1,223 @@
+"""
+Second-stage reranking of FAISS candidates with a cross-encoder.
+
+FAISS retrieves a wide candidate set cheaply; a small cross-encoder then
+scores every (query, chunk) pair in one batched CPU forward pass and only
+the best few chunks are kept for the prompt. Scores are cached per
+(query, chunk ID), so repeated questions skip the model entirely.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from models.regulatory import RegulatoryChunk
+from .filters import ChunkFilter
+from .threads import configure_torch_threads
+import config
+
+if TYPE_CHECKING:
+    from sentence_transformers import CrossEncoder
+
+
+class CrossEncoderReranker:
+    """Rescores retrieved chunks with a cross-encoder and an LRU score cache."""
+
+    def __init__(self, model_name: str = None, cache_size: int = None):
+        """Initialize with specified model or default from config; ``cache_size=0`` disables the cache."""
+        self.model_name = model_name or config.RERANK_MODEL
+        self.cache_size = config.RERANK_CACHE_SIZE if cache_size is None else cache_size
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._predict_lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear the score cache and all counters (the loaded model is kept)."""
+        with self._lock:
+            self._cache.clear()
+            self.calls = 0
+            self.pairs_scored = 0
+            self.cache_hits = 0
+            self.candidates_in = 0
+            self.chunks_out = 0
+            self.total_ms = 0.0
+            self.prompt_tokens_before = 0
+            self.prompt_tokens_after = 0
+
+    @property
+    def model(self) -> "CrossEncoder":
+        """Lazy load the cross-encoder (once, even under concurrent access)."""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    configure_torch_threads()
+                    self._model = CrossEncoder(self.model_name)
+        return self._model
+
+    def score(self, pairs: Sequence[Tuple[str, RegulatoryChunk]]) -> np.ndarray:
+        """
+        Relevance scores for (query, chunk) pairs, higher is better.
+
+        Cached pairs are looked up; all uncached pairs are scored in a
+        single batched predict call.
+        """
+        scores = np.empty(len(pairs), dtype=np.float32)
+        missing: Dict[Tuple[str, str], List[int]] = {}
+
+        with self._lock:
+            for position, (query, chunk) in enumerate(pairs):
+                key = (query, chunk.id)
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    scores[position] = cached
+                    self.cache_hits += 1
+                else:
+                    missing.setdefault(key, []).append(position)
+
+        if missing:
+            keys = list(missing)
+            texts = [[key[0], pairs[missing[key][0]][1].text] for key in keys]
+            model = self.model
+            with self._predict_lock:
+                predicted = model.predict(texts, batch_size=len(texts), show_progress_bar=False)
+
+            with self._lock:
+                self.pairs_scored += len(keys)
+                for key, value in zip(keys, predicted):
+                    value = float(value)
+                    scores[missing[key]] = value
+                    self._cache[key] = value
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return scores
+
+    def rerank(
+        self,
+        query: str,
+        chunks: Sequence[RegulatoryChunk],
+        top_n: int = None
+    ) -> List[Tuple[RegulatoryChunk, float]]:
+        """
+        Reorder candidate chunks by cross-encoder score.
+
+        Args:
+            query: User question/query text
+            chunks: First-stage candidates
+            top_n: Number of chunks to keep (default from config)
+
+        Returns:
+            List of (chunk, score) tuples, best first
+        """
+        return self.rerank_batch([query], [chunks], top_n)[0]
+
+    def rerank_batch(
+        self,
+        queries: Sequence[str],
+        candidates: Sequence[Sequence[RegulatoryChunk]],
+        top_n: int = None
+    ) -> List[List[Tuple[RegulatoryChunk, float]]]:
+        """Rerank the candidates of many queries with one batched predict call."""
+        top_n = top_n or config.RERANK_TOP_N
+        start = time.perf_counter()
+
+        pairs = [(query, chunk) for query, chunks in zip(queries, candidates) for chunk in chunks]
+        scores = self.score(pairs) if pairs else np.empty(0, dtype=np.float32)
+
+        results = []
+        offset = 0
+        for chunks in candidates:
+            chunk_scores = scores[offset:offset + len(chunks)]
+            offset += len(chunks)
+            order = np.argsort(-chunk_scores, kind="stable")[:top_n]
+            results.append([(chunks[i], float(chunk_scores[i])) for i in order])
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.calls += len(queries)
+            self.candidates_in += len(pairs)
+            self.chunks_out += sum(len(hits) for hits in results)
+            self.total_ms += elapsed_ms
+        return results
+
+    def record_prompt_tokens(self, before: int, after: int) -> None:
+        """Record prompt size with all candidates vs. with the reranked top-n."""
+        with self._lock:
+            self.prompt_tokens_before += before
+            self.prompt_tokens_after += after
+
+    def get_metrics(self) -> dict:
+        """Rerank latency, cache and prompt-size counters."""
+        with self._lock:
+            lookups = self.cache_hits + self.pairs_scored
+            return {
+                "model": self.model_name,
+                "calls": self.calls,
+                "avg_rerank_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+                "candidates_in": self.candidates_in,
+                "chunks_out": self.chunks_out,
+                "pairs_scored": self.pairs_scored,
+                "cache_hits": self.cache_hits,
+                "cache_hit_rate": round(self.cache_hits / lookups, 3) if lookups else 0.0,
+                "cache_size": len(self._cache),
+                "prompt_tokens_before": self.prompt_tokens_before,
+                "prompt_tokens_after": self.prompt_tokens_after,
+                "prompt_token_reduction": round(
+                    1 - self.prompt_tokens_after / self.prompt_tokens_before, 3
+                ) if self.prompt_tokens_before else 0.0,
+            }
+
+
+class TwoStageRetriever:
+    """
+    Wraps a VectorStore/ShardedVectorStore: retrieve wide, then rerank.
+
+    Exposes the same retrieve/retrieve_batch interface as the store, with
+    (chunk, score) results where higher scores are better.
+    """
+
+    def __init__(self, store, reranker: CrossEncoderReranker = None, candidates: int = None):
+        """Initialize with the first-stage store and a reranker."""
+        self.store = store
+        self.reranker = reranker or CrossEncoderReranker()
+        self.candidates = candidates or config.RERANK_CANDIDATES
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = None,
+        filters: ChunkFilter = None,
+        **kwargs
+    ) -> List[Tuple[RegulatoryChunk, float]]:
+        """Retrieve candidates from the store and keep the best top_k after reranking."""
+        hits = self.store.retrieve(query, max(self.candidates, top_k or 0), filters, **kwargs)
+        return self.reranker.rerank(query, [chunk for chunk, _ in hits], top_k)
+
+    def retrieve_batch(
+        self,
+        queries: Sequence[str],
+        top_k: int = None,
+        filters: ChunkFilter = None,
+        **kwargs
+    ) -> List[List[Tuple[RegulatoryChunk, float]]]:
+        """Batched first-stage search followed by one batched rerank."""
+        batch_hits = self.store.retrieve_batch(
+            queries, max(self.candidates, top_k or 0), filters, **kwargs
+        )
+        return self.reranker.rerank_batch(
+            queries, [[chunk for chunk, _ in hits] for hits in batch_hits], top_k
+        )
+
+    def load(self, templates: Sequence[str] = None) -> None:
+        """Build the store's shards and load the cross-encoder."""
+        if hasattr(self.store, "load"):
+            self.store.load(templates)
+        _ = self.reranker.model
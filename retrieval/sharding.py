@@ -0,0 +1,213 @@
+"""
+Template-partitioned vector index with query routing.
+
+Each COREP template gets its own VectorStore shard, built lazily on first
+use. A keyword router picks the relevant shard(s) for a question, so
+queries search only the templates they are about.
+"""
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from models.regulatory import RegulatoryChunk
+from knowledge_base.templates import TEMPLATES, DEFAULT_TEMPLATE, get_template_chunks
+from .embeddings import EmbeddingGenerator
+from .filters import ChunkFilter
+from .vector_store import VectorStore
+import config
+
+
+def _keyword_pattern(keyword: str) -> re.Pattern:
+    """
+    Match a keyword as whole words, optionally pluralised: "share" matches
+    "shares" but not "shareholder", and "rwa" does not match "forward".
+    """
+    return re.compile(rf"(?<!\w){re.escape(keyword)}(?:s|es)?(?!\w)")
+
+
+class TemplateRouter:
+    """Routes a question to template shards by keyword matching."""
+
+    def __init__(self, templates: Sequence[str] = None, default: str = None, max_shards: int = None):
+        """Initialize with the candidate templates (default: all registered)."""
+        self.templates = list(templates or TEMPLATES)
+        self.default = default or (
+            DEFAULT_TEMPLATE if DEFAULT_TEMPLATE in self.templates else self.templates[0]
+        )
+        self.max_shards = max_shards or config.ROUTER_MAX_SHARDS
+        self._patterns = {
+            code: [_keyword_pattern(keyword) for keyword in TEMPLATES[code].keywords]
+            for code in self.templates
+        }
+
+    def score(self, question: str) -> Dict[str, int]:
+        """Number of keyword hits per template."""
+        text = " ".join(re.findall(r"[\w.%-]+", question.lower()))
+        return {
+            code: sum(1 for pattern in patterns if pattern.search(text))
+            for code, patterns in self._patterns.items()
+        }
+
+    def route(self, question: str) -> List[str]:
+        """
+        Pick the template shards to search for a question.
+
+        Returns:
+            Up to max_shards template codes, best match first; the default
+            template if nothing matches
+        """
+        scores = self.score(question)
+        ranked = sorted(
+            (code for code, hits in scores.items() if hits > 0),
+            key=lambda code: -scores[code]
+        )
+        return ranked[:self.max_shards] or [self.default]
+
+
+class ShardedVectorStore:
+    """
+    One lazily built VectorStore per served COREP template.
+
+    Shards for templates outside ``templates`` are never loaded. The query
+    is embedded once and searched against every routed shard; results are
+    merged by distance.
+    """
+
+    def __init__(
+        self,
+        embedding_generator: EmbeddingGenerator = None,
+        templates: Sequence[str] = None,
+        router: TemplateRouter = None,
+        index_factory: str = None
+    ):
+        """Initialize with the templates this process serves (default from config)."""
+        self.embedding_generator = embedding_generator or EmbeddingGenerator()
+        self.index_factory = index_factory
+        self.templates = list(templates or config.SERVED_TEMPLATES or TEMPLATES)
+        self.router = router or TemplateRouter(self.templates)
+        self._shards: Dict[str, VectorStore] = {}
+        self._locks: Dict[str, threading.Lock] = {code: threading.Lock() for code in self.templates}
+
+    @property
+    def loaded_templates(self) -> List[str]:
+        """Templates whose shard has been built."""
+        return list(self._shards)
+
+    def shard(self, template: str) -> VectorStore:
+        """Return the shard for a template, building it on first use."""
+        store = self._shards.get(template)
+        if store is not None:
+            return store
+
+        if template not in self._locks:
+            raise ValueError(
+                f"Template '{template}' is not served by this process. "
+                f"Served: {', '.join(self.templates)}"
+            )
+
+        with self._locks[template]:
+            store = self._shards.get(template)
+            if store is None:
+                store = self._build_shard(template)
+                self._shards[template] = store
+        return store
+
+    def _build_shard(self, template: str) -> VectorStore:
+        chunks = get_template_chunks(template)
+        print(f"📚 Building {template} shard from {len(chunks)} regulatory chunks...")
+        store = VectorStore(self.embedding_generator, self.index_factory)
+        store.build_index(chunks)
+        return store
+
+    def get_chunk(self, chunk_id: str) -> Optional[RegulatoryChunk]:
+        """Look up a chunk by ID across the loaded shards."""
+        for store in list(self._shards.values()):
+            chunk = store.get_chunk(chunk_id)
+            if chunk is not None:
+                return chunk
+        return None
+
+    def load(self, templates: Sequence[str] = None) -> None:
+        """Eagerly build shards (default: all served templates)."""
+        for template in templates or self.templates:
+            self.shard(template)
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = None,
+        filters: ChunkFilter = None,
+        templates: Optional[Sequence[str]] = None
+    ) -> List[Tuple[RegulatoryChunk, float]]:
+        """
+        Retrieve top-k chunks across the routed template shards.
+
+        Args:
+            query: User question/query text
+            top_k: Number of chunks to retrieve (default from config)
+            filters: Optional metadata filter applied within each shard
+            templates: Explicit shards to search (default: routed from query)
+
+        Returns:
+            List of (chunk, distance) tuples sorted by relevance
+        """
+        top_k = top_k or config.TOP_K_CHUNKS
+        templates = templates or self.router.route(query)
+
+        query_embedding = self.embedding_generator.embed_text(query)
+
+        results: List[Tuple[RegulatoryChunk, float]] = []
+        for template in templates:
+            results.extend(self.shard(template).search_embedding(query_embedding, top_k, filters))
+
+        results.sort(key=lambda item: item[1])
+        return results[:top_k]
+
+    def retrieve_batch(
+        self,
+        queries: Sequence[str],
+        top_k: int = None,
+        filters: ChunkFilter = None,
+        templates: Optional[Sequence[str]] = None
+    ) -> List[List[Tuple[RegulatoryChunk, float]]]:
+        """
+        Retrieve top-k chunks for many queries.
+
+        All queries are embedded in one call; queries routed to the same
+        shard are searched together in one FAISS call.
+
+        Returns:
+            One list of (chunk, distance) tuples per query, in query order
+        """
+        if not queries:
+            return []
+        top_k = top_k or config.TOP_K_CHUNKS
+
+        by_template: Dict[str, List[int]] = defaultdict(list)
+        for position, query in enumerate(queries):
+            for template in templates or self.router.route(query):
+                by_template[template].append(position)
+
+        query_embeddings = self.embedding_generator.embed_texts(list(queries))
+
+        results: List[List[Tuple[RegulatoryChunk, float]]] = [[] for _ in queries]
+        for template, positions in by_template.items():
+            hits = self.shard(template).search_embeddings(query_embeddings[positions], top_k, filters)
+            for position, shard_hits in zip(positions, hits):
+                results[position].extend(shard_hits)
+
+        for hits in results:
+            hits.sort(key=lambda item: item[1])
+            del hits[top_k:]
+        return results
+
+    def retrieve_chunks(
+        self,
+        query: str,
+        top_k: int = None,
+        filters: ChunkFilter = None,
+        templates: Optional[Sequence[str]] = None
+    ) -> List[RegulatoryChunk]:
+        """Retrieve just the chunks without distances."""
+        return [chunk for chunk, _ in self.retrieve(query, top_k, filters, templates)]
@@ -0,0 +1,51 @@
+"""
+Thread-pool sizing for embedding and FAISS under concurrent sessions.
+
+By default torch and FAISS each start one thread per core for every call.
+When several sessions embed and search at the same time, that multiplies
+into far more runnable threads than cores. This module caps intra-op
+threads once per process, and EmbeddingGenerator bounds how many encodes
+run at once, so that concurrency x threads stays within the CPU count.
+"""
+import threading
+
+import config
+
+
+_torch_configured = False
+_faiss_configured = False
+_lock = threading.Lock()
+
+
+def configure_torch_threads() -> None:
+    """Apply the torch intra-op thread limit from config (idempotent)."""
+    global _torch_configured
+    with _lock:
+        if _torch_configured:
+            return
+        try:
+            import torch
+            torch.set_num_threads(config.EMBEDDING_INTRA_OP_THREADS)
+        except ImportError:
+            pass
+        _torch_configured = True
+
+
+def configure_faiss_threads() -> None:
+    """Apply the FAISS OpenMP thread limit from config (idempotent)."""
+    global _faiss_configured
+    with _lock:
+        if _faiss_configured:
+            return
+        try:
+            import faiss
+            faiss.omp_set_num_threads(config.FAISS_OMP_THREADS)
+        except ImportError:
+            pass
+        _faiss_configured = True
+
+
+def configure_thread_pools() -> None:
+    """Apply both torch and FAISS thread limits."""
+    configure_torch_threads()
+    configure_faiss_threads()
@@ -1,40 +1,97 @@
 """
 FAISS vector store for semantic retrieval.
 """
-from typing import List, Tuple
+import os
+from typing import List, NamedTuple, Optional, Tuple
 import numpy as np
 import faiss
 
 from models.regulatory import RegulatoryChunk
+from .chunk_store import ChunkStore, content_digest
 from .embeddings import EmbeddingGenerator
+from .filters import ChunkFilter, MetadataIndex, search_with_bitmap
+from .index_factory import build_faiss_index, index_memory_bytes
+from .threads import configure_faiss_threads
+from profiling import profile_stage
 import config
 
 
+class IndexSnapshot(NamedTuple):
+    """An immutable (index, chunks, metadata) set published atomically after a build."""
+    
+    index: faiss.Index
+    chunks: ChunkStore
+    metadata: MetadataIndex
+
+
 class VectorStore:
-    """FAISS-based vector store for regulatory chunk retrieval."""
+    """
+    FAISS-based vector store for regulatory chunk retrieval.
     
-    def __init__(self, embedding_generator: EmbeddingGenerator = None):
-        """Initialize vector store with optional embedding generator."""
+    The index is built off to the side and then published as one immutable
+    snapshot, so concurrent retrievals always see a consistent, read-only
+    index (FAISS search on a const index is thread-safe).
+    """
+    
+    def __init__(self, embedding_generator: EmbeddingGenerator = None, index_factory: str = None):
+        """Initialize vector store with optional embedding generator and index type."""
+        configure_faiss_threads()
         self.embedding_generator = embedding_generator or EmbeddingGenerator()
-        self.index: faiss.IndexFlatL2 = None
-        self.chunks: List[RegulatoryChunk] = []
+        self.index_factory = index_factory
+        self._snapshot: IndexSnapshot = None
     
-    def build_index(self, chunks: List[RegulatoryChunk]) -> None:
-        """Build FAISS index from regulatory chunks."""
-        self.chunks = chunks
-        
-        # Generate embeddings for all chunks
-        embeddings = self.embedding_generator.embed_chunks(chunks)
+    @property
+    def index(self) -> faiss.Index:
+        """Current FAISS index (None until built)."""
+        snapshot = self._snapshot
+        return snapshot.index if snapshot else None
+    
+    @property
+    def chunks(self) -> Optional[ChunkStore]:
+        """Memory-mapped chunk store in index order (None until built)."""
+        snapshot = self._snapshot
+        return snapshot.chunks if snapshot else None
+    
+    def build_index(self, chunks: List[RegulatoryChunk], store_path: str = None) -> None:
+        """
+        Build FAISS index from regulatory chunks.
         
-        # Create FAISS index
-        dimension = embeddings.shape[1]
-        self.index = faiss.IndexFlatL2(dimension)
-        self.index.add(embeddings.astype(np.float32))
+        Chunk data is written to a memory-mapped ChunkStore (by default under
+        CHUNK_STORE_DIR, named by a content digest so processes indexing the
+        same corpus share one copy through the page cache).
+        """
+        with profile_stage("build_index"):
+            store_path = store_path or os.path.join(config.CHUNK_STORE_DIR, content_digest(chunks))
+            store = ChunkStore.build(chunks, store_path)
+            
+            # Generate embeddings for all chunks
+            embeddings = self.embedding_generator.embed_chunks(chunks)
+            
+            # Create FAISS index (optionally compressed, see VECTOR_INDEX_FACTORY)
+            index = build_faiss_index(embeddings, self.index_factory)
+            
+            # Publish atomically; readers holding the old snapshot are unaffected
+            self._snapshot = IndexSnapshot(
+                index=index,
+                chunks=store,
+                metadata=MetadataIndex(store)
+            )
+    
+    def index_memory_bytes(self) -> int:
+        """Approximate memory used by the FAISS index (0 if not built)."""
+        index = self.index
+        return index_memory_bytes(index) if index is not None else 0
+    
+    def get_chunk(self, chunk_id: str) -> Optional[RegulatoryChunk]:
+        """Look up an indexed chunk by ID (None if absent or not built)."""
+        snapshot = self._snapshot
+        return snapshot.chunks.get(chunk_id) if snapshot else None
     
     def retrieve(
         self, 
         query: str, 
-        top_k: int = None
+        top_k: int = None,
+        filters: ChunkFilter = None
     ) -> List[Tuple[RegulatoryChunk, float]]:
         """
         Retrieve top-k most relevant chunks for a query.
@@ -42,31 +99,107 @@ class VectorStore:
         Args:
             query: User question/query text
             top_k: Number of chunks to retrieve (default from config)
+            filters: Optional metadata filter applied inside the FAISS search
             
         Returns:
             List of (chunk, distance) tuples sorted by relevance
         """
-        if self.index is None:
+        if self._snapshot is None:
             raise ValueError("Index not built. Call build_index() first.")
         
-        top_k = top_k or config.TOP_K_CHUNKS
-        
         # Embed the query
         query_embedding = self.embedding_generator.embed_text(query)
-        query_embedding = query_embedding.reshape(1, -1).astype(np.float32)
         
-        # Search the index
-        distances, indices = self.index.search(query_embedding, top_k)
+        return self.search_embedding(query_embedding, top_k, filters)
+    
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        top_k: int = None,
+        filters: ChunkFilter = None
+    ) -> List[List[Tuple[RegulatoryChunk, float]]]:
+        """
+        Retrieve top-k chunks for many queries with one embedding call and one search.
         
-        # Return chunks with their distances
-        results = []
-        for idx, dist in zip(indices[0], distances[0]):
-            if idx < len(self.chunks):
-                results.append((self.chunks[idx], float(dist)))
+        Returns:
+            One list of (chunk, distance) tuples per query, in query order
+        """
+        if self._snapshot is None:
+            raise ValueError("Index not built. Call build_index() first.")
+        if not queries:
+            return []
         
-        return results
+        query_embeddings = self.embedding_generator.embed_texts(list(queries))
+        return self.search_embeddings(query_embeddings, top_k, filters)
+    
+    def search_embedding(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = None,
+        filters: ChunkFilter = None
+    ) -> List[Tuple[RegulatoryChunk, float]]:
+        """
+        Search with a precomputed query embedding.
+        
+        Args:
+            query_embedding: Embedding of the query text
+            top_k: Number of chunks to retrieve (default from config)
+            filters: Optional metadata filter applied inside the FAISS search
+            
+        Returns:
+            List of (chunk, distance) tuples sorted by relevance
+        """
+        return self.search_embeddings(query_embedding.reshape(1, -1), top_k, filters)[0]
+    
+    def search_embeddings(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int = None,
+        filters: ChunkFilter = None
+    ) -> List[List[Tuple[RegulatoryChunk, float]]]:
+        """
+        Search a batch of precomputed query embeddings in one FAISS call.
+        
+        Args:
+            query_embeddings: Query embeddings (n, d)
+            top_k: Number of chunks to retrieve per query (default from config)
+            filters: Optional metadata filter applied to every query
+            
+        Returns:
+            One list of (chunk, distance) tuples per query, sorted by relevance
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise ValueError("Index not built. Call build_index() first.")
+        
+        top_k = top_k or config.TOP_K_CHUNKS
+        query_embeddings = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+        
+        # Search the index, restricted to matching chunks if filtered
+        if filters is not None:
+            bitmap = snapshot.metadata.evaluate(filters)
+            if not MetadataIndex.count(bitmap):
+                return [[] for _ in range(len(query_embeddings))]
+            distances, indices = search_with_bitmap(snapshot.index, query_embeddings, top_k, bitmap)
+        else:
+            distances, indices = snapshot.index.search(query_embeddings, top_k)
+        
+        # Return chunks with their distances
+        return [
+            [
+                (snapshot.chunks[idx], float(dist))
+                for idx, dist in zip(row_indices, row_distances)
+                if 0 <= idx < len(snapshot.chunks)
+            ]
+            for row_indices, row_distances in zip(indices, distances)
+        ]
     
-    def retrieve_chunks(self, query: str, top_k: int = None) -> List[RegulatoryChunk]:
+    def retrieve_chunks(
+        self,
+        query: str,
+        top_k: int = None,
+        filters: ChunkFilter = None
+    ) -> List[RegulatoryChunk]:
         """Retrieve just the chunks without distances."""
-        results = self.retrieve(query, top_k)
+        results = self.retrieve(query, top_k, filters)
         return [chunk for chunk, _ in results]
@@ -0,0 +1,217 @@
+"""
+HTTP API server for PRA COREP Reporting Assistant.
+
+Each worker process keeps one warmed CorepPipeline (embedding model and
+index loaded) and serves report generation over JSON endpoints.
+
+Run with:
+    uvicorn server:app --host 0.0.0.0 --port 8000 --workers 4
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+
+from models.corep import CorepOutput
+from pipeline import CorepPipeline
+from reporting import ReportGenerator
+import config
+
+
+class ReportRequest(BaseModel):
+    """Request body for report generation."""
+
+    question: str = Field(..., min_length=1, description="Reporting scenario or question")
+    include_report: bool = Field(False, description="Also return the full text report")
+    entity: Optional[str] = Field(None, description="Reporting entity, recorded in the run store")
+    period: Optional[str] = Field(None, description="Reporting reference date, recorded in the run store")
+
+
+class ReportResponse(BaseModel):
+    """Response body for report generation."""
+
+    output: CorepOutput
+    report: Optional[str] = None
+    coalesced: bool = Field(False, description="True if served from another request's execution")
+
+
+class SingleFlight:
+    """Coalesces identical concurrent calls into one in-flight execution."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]) -> Tuple[object, bool]:
+        """
+        Run ``fn`` for ``key`` unless an identical call is already running.
+
+        Returns:
+            (result, shared) where shared is True if the result came from
+            an execution started by another caller
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future), True
+
+        future = asyncio.ensure_future(fn())
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so a disconnecting leader does not cancel work others await
+        return await asyncio.shield(future), False
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+class ServiceState:
+    """Per-worker pipeline, executor and admission counters."""
+
+    def __init__(self):
+        self.pipeline: Optional[CorepPipeline] = None
+        self.startup_error: Optional[str] = None
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.SERVER_MAX_CONCURRENCY,
+            thread_name_prefix="corep-run"
+        )
+        self.single_flight = SingleFlight()
+        self.admitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.errors: Dict[str, int] = {}
+        self.coalesced = 0
+        self.rejected = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.pipeline is not None and self.pipeline.is_ready
+
+    def warm_up(self) -> None:
+        """Build the pipeline and load the index (runs in a background thread)."""
+        try:
+            pipeline = CorepPipeline()
+            pipeline.warm_up()
+            self.pipeline = pipeline
+        except Exception as e:
+            self.startup_error = str(e)
+            print(f"❌ Pipeline warm-up failed: {e}")
+
+
+state = ServiceState()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so liveness probes answer immediately
+    threading.Thread(target=state.warm_up, name="corep-warmup", daemon=True).start()
+    yield
+    state.executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="PRA COREP Reporting Assistant", lifespan=lifespan)
+
+
+def _normalise_question(question: str) -> str:
+    """Key for coalescing: identical up to whitespace."""
+    return " ".join(question.split())
+
+
+async def _execute(question: str, entity: str = None, period: str = None) -> CorepOutput:
+    """Run the pipeline on the bounded executor, enforcing backpressure."""
+    limit = config.SERVER_MAX_CONCURRENCY + config.SERVER_MAX_QUEUE
+    if state.admitted >= limit:
+        state.rejected += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, retry later",
+            headers={"Retry-After": str(config.SERVER_RETRY_AFTER_SECONDS)}
+        )
+
+    state.admitted += 1
+    try:
+        loop = asyncio.get_running_loop()
+        run = functools.partial(state.pipeline.run, question, entity=entity, period=period)
+        output = await loop.run_in_executor(state.executor, run)
+        state.completed += 1
+        return output
+    except ValueError as e:
+        # The LLM returned no usable output
+        state.failed += 1
+        state.errors["ValueError"] = state.errors.get("ValueError", 0) + 1
+        raise HTTPException(status_code=502, detail={"error": "ValueError", "message": str(e)})
+    except Exception as e:
+        state.failed += 1
+        error = type(e).__name__
+        state.errors[error] = state.errors.get(error, 0) + 1
+        print(f"❌ Pipeline run failed: {error}: {e}")
+        raise HTTPException(status_code=500, detail={"error": error, "message": str(e)})
+    finally:
+        state.admitted -= 1
+
+
+@app.post("/v1/reports", response_model=ReportResponse)
+async def create_report(request: ReportRequest) -> ReportResponse:
+    """Generate a validated COREP Own Funds output for a scenario."""
+    if not state.ready:
+        raise HTTPException(
+            status_code=503,
+            detail="Pipeline is warming up",
+            headers={"Retry-After": str(config.SERVER_RETRY_AFTER_SECONDS)}
+        )
+
+    question = _normalise_question(request.question)
+    key = "\x1f".join([question, request.entity or "", request.period or ""])
+    output, shared = await state.single_flight.do(
+        key, lambda: _execute(question, request.entity, request.period)
+    )
+    if shared:
+        state.coalesced += 1
+
+    report = ReportGenerator.generate_full_report(output) if request.include_report else None
+    return ReportResponse(output=output, report=report, coalesced=shared)
+
+
+@app.get("/health/live")
+async def health_live() -> dict:
+    """Liveness: the process is up and serving HTTP."""
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: only OK once the embedding model and index are loaded."""
+    if state.ready:
+        return {"status": "ready"}
+    status = "failed" if state.startup_error else "warming_up"
+    return JSONResponse(
+        status_code=503,
+        content={"status": status, "error": state.startup_error}
+    )
+
+
+@app.get("/metrics")
+async def metrics() -> dict:
+    """Admission, coalescing and LLM scheduling counters for this worker."""
+    data = {
+        "ready": state.ready,
+        "in_flight": len(state.single_flight),
+        "admitted": state.admitted,
+        "completed": state.completed,
+        "failed": state.failed,
+        "errors": dict(state.errors),
+        "coalesced": state.coalesced,
+        "rejected": state.rejected,
+    }
+    if state.pipeline is not None:
+        llm_client = state.pipeline.llm_client
+        data["llm_scheduler"] = llm_client.scheduler.get_metrics()
+        if llm_client.hedger is not None:
+            data["llm_hedging"] = llm_client.hedger.get_metrics()
+        data["cascade"] = state.pipeline.get_cascade_stats()
+        data["rerank"] = state.pipeline.get_rerank_stats()
+    return data
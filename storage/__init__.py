@@ -0,0 +1,4 @@
+"""Storage package: persistent run history."""
+from .run_store import RunStore
+
+__all__ = ["RunStore"]
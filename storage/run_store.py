@@ -0,0 +1,438 @@
+"""
+Append-only SQLite store of pipeline runs.
+
+Every run is one row in ``runs`` (with the Own Funds figures as columns
+for fast numeric queries), plus one row per retrieved chunk, audit-log
+field, cited rule ID and warning in child tables. Each queryable column
+is indexed, so filters by entity, period, field, rule ID, chunk ID or
+warning type are index lookups rather than scans over JSON.
+
+The database runs in WAL mode: readers never block the writer, and each
+thread uses its own connection. An in-memory store (":memory:") exists only
+within one connection, so there all threads share a single connection and
+take turns using it.
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from models.corep import CorepOutput
+from models.run import RunRecord
+import config
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id              INTEGER PRIMARY KEY,
+    run_id          TEXT NOT NULL UNIQUE,
+    created_at      REAL NOT NULL,
+    entity          TEXT,
+    period          TEXT,
+    template        TEXT NOT NULL,
+    status          TEXT NOT NULL,
+    question        TEXT NOT NULL,
+    cet1            REAL,
+    at1             REAL,
+    tier_2          REAL,
+    total_own_funds REAL,
+    raw_output      TEXT,
+    output          TEXT,
+    stage_timings   TEXT NOT NULL,
+    error           TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_entity_period ON runs (entity, period, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_period ON runs (period, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs (created_at);
+
+CREATE TABLE IF NOT EXISTS run_chunks (
+    run      INTEGER NOT NULL REFERENCES runs (id),
+    rank     INTEGER NOT NULL,
+    chunk_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_run_chunks_chunk ON run_chunks (chunk_id, run);
+CREATE INDEX IF NOT EXISTS idx_run_chunks_run ON run_chunks (run);
+
+CREATE TABLE IF NOT EXISTS run_fields (
+    run   INTEGER NOT NULL REFERENCES runs (id),
+    field TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_run_fields_field ON run_fields (field, run);
+
+CREATE TABLE IF NOT EXISTS run_rules (
+    run     INTEGER NOT NULL REFERENCES runs (id),
+    field   TEXT NOT NULL,
+    rule_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_run_rules_rule ON run_rules (rule_id, run);
+
+CREATE TABLE IF NOT EXISTS run_warnings (
+    run          INTEGER NOT NULL REFERENCES runs (id),
+    warning_type TEXT NOT NULL,
+    message      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_run_warnings_type ON run_warnings (warning_type, run);
+"""
+
+_INSERT_RUN = """
+INSERT INTO runs (
+    run_id, created_at, entity, period, template, status, question,
+    cet1, at1, tier_2, total_own_funds, raw_output, output, stage_timings, error
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_RUN_COLUMNS = (
+    "run_id, created_at, entity, period, template, question, "
+    "raw_output, output, stage_timings, error"
+)
+
+
+def warning_type(message: str) -> str:
+    """
+    Classify a warning by its prefix, e.g. 'VALIDATION ERROR' or 'WARNING'.
+
+    Messages without a recognised 'PREFIX:' are typed 'OTHER'.
+    """
+    prefix, sep, _ = message.partition(":")
+    prefix = prefix.strip()
+    if sep and prefix and prefix.upper() == prefix and len(prefix) <= 40:
+        return prefix
+    return "OTHER"
+
+
+class RunStore:
+    """Append-only, indexed history of pipeline runs."""
+
+    def __init__(self, path: str = None):
+        """Open (and create if needed) the store at ``path`` (default from config)."""
+        self.path = path or config.RUN_STORE_PATH
+        if not self.path:
+            raise ValueError("No run store path configured. Set RUN_STORE_PATH.")
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._shared: Optional[sqlite3.Connection] = None
+        self._shared_lock = threading.RLock()
+        if self.path == ":memory:":
+            # Each connection to ":memory:" would open its own empty database
+            self._shared = self._connect(check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=OFF")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        This thread's connection (SQLite connections are not shared across
+        threads), or the in-memory store's shared connection, held
+        exclusively until the block exits.
+        """
+        if self._shared is not None:
+            with self._shared_lock:
+                yield self._shared
+            return
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        yield conn
+
+    def close(self) -> None:
+        """Close this thread's connection (an in-memory store is discarded)."""
+        if self._shared is not None:
+            with self._shared_lock:
+                self._shared.close()
+            return
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def append(self, record: RunRecord) -> None:
+        """Store one run."""
+        self.append_many([record])
+
+    def append_many(self, records: Iterable[RunRecord]) -> int:
+        """
+        Store many runs in a single transaction (for batch runs).
+
+        Returns:
+            Number of runs written
+        """
+        count = 0
+        with self._write_lock, self._connection() as conn:
+            with conn:
+                for record in records:
+                    self._insert(conn, record)
+                    count += 1
+        return count
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, record: RunRecord) -> None:
+        output = record.output
+        own_funds = output.own_funds if output is not None else None
+        cursor = conn.execute(_INSERT_RUN, (
+            record.run_id,
+            record.created_at,
+            record.entity,
+            record.period,
+            record.template,
+            record.status,
+            record.question,
+            own_funds.common_equity_tier_1 if own_funds else None,
+            own_funds.additional_tier_1 if own_funds else None,
+            own_funds.tier_2 if own_funds else None,
+            own_funds.total_own_funds if own_funds else None,
+            json.dumps(record.raw_output) if record.raw_output is not None else None,
+            output.model_dump_json() if output is not None else None,
+            json.dumps(record.stage_timings),
+            record.error,
+        ))
+        run = cursor.lastrowid
+
+        conn.executemany(
+            "INSERT INTO run_chunks (run, rank, chunk_id) VALUES (?, ?, ?)",
+            [(run, rank, chunk_id) for rank, chunk_id in enumerate(record.chunk_ids)]
+        )
+        if output is None:
+            return
+        conn.executemany(
+            "INSERT INTO run_fields (run, field, value) VALUES (?, ?, ?)",
+            [(run, entry.field, entry.value) for entry in output.audit_log]
+        )
+        conn.executemany(
+            "INSERT INTO run_rules (run, field, rule_id) VALUES (?, ?, ?)",
+            [(run, entry.field, rule_id) for entry in output.audit_log for rule_id in entry.rule_ids]
+        )
+        conn.executemany(
+            "INSERT INTO run_warnings (run, warning_type, message) VALUES (?, ?, ?)",
+            [(run, warning_type(message), message) for message in output.warnings]
+        )
+
+    def get(self, run_id: str) -> Optional[RunRecord]:
+        """Look up a run by ID."""
+        rows = self._select(f"SELECT id, {_RUN_COLUMNS} FROM runs WHERE run_id = ?", [run_id])
+        return rows[0] if rows else None
+
+    def find(
+        self,
+        entity: str = None,
+        period: str = None,
+        template: str = None,
+        status: str = None,
+        field: str = None,
+        rule_id: str = None,
+        chunk_id: str = None,
+        warning_type: str = None,
+        since: float = None,
+        until: float = None,
+        limit: int = 100
+    ) -> List[RunRecord]:
+        """
+        Query runs, most recently stored first. All given criteria must match.
+
+        Args:
+            entity: Reporting entity
+            period: Reporting reference date
+            template: COREP template
+            status: 'ok' or 'failed'
+            field: Audit-log field the run populated
+            rule_id: Rule ID cited in the audit log
+            chunk_id: Chunk ID that was retrieved
+            warning_type: Warning prefix, e.g. 'VALIDATION ERROR'
+            since: Earliest created_at (Unix seconds, inclusive)
+            until: Latest created_at (Unix seconds, exclusive)
+            limit: Maximum runs returned
+
+        Returns:
+            Matching RunRecords
+        """
+        where, params = self._where(
+            entity, period, template, status, field, rule_id, chunk_id, warning_type, since, until
+        )
+        # A time range is served by the created_at index; otherwise the
+        # rowid (append order) gives newest-first without a sort
+        order = "created_at DESC" if since is not None or until is not None else "id DESC"
+        sql = f"SELECT id, {_RUN_COLUMNS} FROM runs {where} ORDER BY {order} LIMIT ?"
+        return self._select(sql, params + [limit])
+
+    def count(self, **criteria) -> int:
+        """Number of runs matching the same criteria as find()."""
+        where, params = self._where(**criteria)
+        with self._connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM runs {where}", params).fetchone()[0]
+
+    def iter_runs(self, batch_size: int = 1000, **criteria) -> Iterator[RunRecord]:
+        """
+        Stream every run matching the same criteria as find(), oldest first.
+
+        Runs are read in pages of ``batch_size`` keyed on the rowid, so
+        memory stays flat however many runs match.
+        """
+        where, params = self._where(**criteria)
+        where = f"{where} AND id > ?" if where else "WHERE id > ?"
+        page_sql = f"SELECT id FROM runs {where} ORDER BY id LIMIT ?"
+        last = 0
+        while True:
+            with self._connection() as conn:
+                ids = [row[0] for row in conn.execute(page_sql, params + [last, batch_size])]
+            if not ids:
+                return
+            placeholders = ",".join("?" * len(ids))
+            yield from self._select(
+                f"SELECT id, {_RUN_COLUMNS} FROM runs WHERE id IN ({placeholders}) ORDER BY id", ids
+            )
+            last = ids[-1]
+
+    def iter_latest(
+        self,
+        entity: str = None,
+        period: str = None,
+        template: str = None,
+        batch_size: int = 1000
+    ) -> Iterator[RunRecord]:
+        """
+        Stream the latest successful run per (entity, period, template), oldest first.
+
+        This is one run per submission: earlier reruns of the same submission
+        are superseded, and runs without an entity or period are skipped.
+        Paged like iter_runs().
+        """
+        where, params = self._where(entity=entity, period=period, template=template, status="ok")
+        page_sql = (
+            f"SELECT id FROM runs {where} AND entity IS NOT NULL AND period IS NOT NULL "
+            "AND NOT EXISTS (SELECT 1 FROM runs AS newer WHERE newer.entity = runs.entity "
+            "AND newer.period = runs.period AND newer.template = runs.template "
+            "AND newer.status = 'ok' AND newer.id > runs.id) "
+            "AND id > ? ORDER BY id LIMIT ?"
+        )
+        last = 0
+        while True:
+            with self._connection() as conn:
+                ids = [row[0] for row in conn.execute(page_sql, params + [last, batch_size])]
+            if not ids:
+                return
+            placeholders = ",".join("?" * len(ids))
+            yield from self._select(
+                f"SELECT id, {_RUN_COLUMNS} FROM runs WHERE id IN ({placeholders}) ORDER BY id", ids
+            )
+            last = ids[-1]
+
+    def latest(self, entity: str, period: str) -> Optional[RunRecord]:
+        """Most recent successful run for an entity and period."""
+        runs = self.find(entity=entity, period=period, status="ok", limit=1)
+        return runs[0] if runs else None
+
+    def own_funds_history(self, entities: Sequence[str] = None) -> List[Tuple]:
+        """
+        Own Funds figures of the latest successful run per (entity, period).
+
+        Args:
+            entities: Restrict to these entities (default: all)
+
+        Returns:
+            (entity, period, cet1, at1, tier_2, total_own_funds) tuples
+        """
+        sql = (
+            "SELECT entity, period, cet1, at1, tier_2, total_own_funds, MAX(id) FROM runs "
+            "WHERE status = 'ok' AND entity IS NOT NULL AND period IS NOT NULL {} "
+            "GROUP BY entity, period"
+        )
+        params: list = []
+        if entities is not None and not entities:
+            return []
+        if entities is not None:
+            sql = sql.format(f"AND entity IN ({','.join('?' * len(entities))})")
+            params = list(entities)
+        else:
+            sql = sql.format("")
+        # SQLite returns the bare columns from the row holding MAX(id)
+        with self._connection() as conn:
+            return [row[:6] for row in conn.execute(sql, params)]
+
+    @staticmethod
+    def _where(
+        entity: str = None,
+        period: str = None,
+        template: str = None,
+        status: str = None,
+        field: str = None,
+        rule_id: str = None,
+        chunk_id: str = None,
+        warning_type: str = None,
+        since: float = None,
+        until: float = None
+    ):
+        clauses, params = [], []
+        for column, value in (
+            ("entity", entity), ("period", period), ("template", template), ("status", status)
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        # With a selective runs filter (entity or time range), probe the child
+        # index per candidate run; otherwise collect matching runs from it
+        correlated = entity is not None or since is not None or until is not None
+        for table, column, value in (
+            ("run_fields", "field", field),
+            ("run_rules", "rule_id", rule_id),
+            ("run_chunks", "chunk_id", chunk_id),
+            ("run_warnings", "warning_type", warning_type),
+        ):
+            if value is None:
+                continue
+            if correlated:
+                clauses.append(f"EXISTS (SELECT 1 FROM {table} WHERE {column} = ? AND run = runs.id)")
+            else:
+                clauses.append(f"id IN (SELECT run FROM {table} WHERE {column} = ?)")
+            params.append(value)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _select(self, sql: str, params: list) -> List[RunRecord]:
+        with self._connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+            if not rows:
+                return []
+
+            ids = [row[0] for row in rows]
+            placeholders = ",".join("?" * len(ids))
+            chunk_ids = {run: [] for run in ids}
+            for run, chunk_id in conn.execute(
+                f"SELECT run, chunk_id FROM run_chunks WHERE run IN ({placeholders}) ORDER BY run, rank",
+                ids
+            ):
+                chunk_ids[run].append(chunk_id)
+
+        records = []
+        for (run, run_id, created_at, entity, period, template, question,
+             raw_output, output, stage_timings, error) in rows:
+            records.append(RunRecord(
+                run_id=run_id,
+                created_at=created_at,
+                entity=entity,
+                period=period,
+                template=template,
+                question=question,
+                chunk_ids=chunk_ids[run],
+                raw_output=json.loads(raw_output) if raw_output else None,
+                output=CorepOutput.model_validate_json(output) if output else None,
+                stage_timings=json.loads(stage_timings),
+                error=error,
+            ))
+        return records
@@ -0,0 +1,85 @@
+"""Shared pytest setup: make the project root importable, plus offline fakes."""
+import os
+import re
+import sys
+import threading
+import zlib
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeClock:
+    """
+    Manually advanced clock for code that takes a ``clock`` (and ``sleep``)
+    callable; sleep() advances it instead of blocking.
+    """
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+        self.sleeps = []
+        self._lock = threading.Lock()
+
+    def __call__(self) -> float:
+        with self._lock:
+            return self.now
+
+    def advance(self, seconds: float) -> None:
+        with self._lock:
+            self.now += seconds
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.advance(seconds)
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+class FakeEmbedder:
+    """Deterministic bag-of-words hash embeddings (no model download)."""
+
+    model_name = "fake-hash-embedder"
+    dimension = 256
+
+    def embed_text(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[zlib.crc32(word.encode()) % self.dimension] += 1
+        return vector / (np.linalg.norm(vector) + 1e-9)
+
+    def embed_texts(self, texts) -> np.ndarray:
+        return np.stack([self.embed_text(text) for text in texts])
+
+    def embed_chunks(self, chunks) -> np.ndarray:
+        return self.embed_texts([chunk.text for chunk in chunks])
+
+
+@pytest.fixture
+def make_pipeline(monkeypatch):
+    """
+    Build a CorepPipeline that never touches the network: hash embeddings,
+    no reranker, no run store, and ``generate_json`` replaced by a stub.
+    """
+    import config
+
+    monkeypatch.setattr(config, "GEMINI_API_KEY", config.GEMINI_API_KEY or "test-key-unused")
+    monkeypatch.setattr(config, "RUN_STORE_PATH", "")
+    monkeypatch.setattr(config, "RERANK_ENABLED", False)
+
+    from pipeline import CorepPipeline
+    from retrieval import ShardedVectorStore
+
+    def make(generate_json, cascade: bool = False) -> CorepPipeline:
+        monkeypatch.setattr(config, "CASCADE_ENABLED", cascade)
+        pipeline = CorepPipeline()
+        pipeline.embedding_generator = FakeEmbedder()
+        pipeline.vector_store = ShardedVectorStore(pipeline.embedding_generator)
+        pipeline.llm_client.generate_json = generate_json
+        return pipeline
+
+    return make
@@ -0,0 +1,52 @@
+"""Batch scenario reading: malformed input lines become error results instead of aborting."""
+import csv
+
+import main
+
+
+def test_malformed_jsonl_lines_become_error_scenarios(tmp_path):
+    path = tmp_path / "scenarios.jsonl"
+    path.write_text(
+        '{"id": "a", "question": "What is CET1?", "entity": "Bank A"}\n'
+        '{"id": "b", "question": \n'
+        '\n'
+        '["not", "an", "object"]\n'
+        '{"question": "What is AT1?"}\n',
+        encoding="utf-8",
+    )
+
+    scenarios = list(main.read_scenarios(str(path), "question", "id"))
+
+    assert [scenario["id"] for scenario in scenarios] == ["a", "2", "3", "4"]
+    assert scenarios[0]["entity"] == "Bank A"
+    assert (scenarios[1]["line"], scenarios[2]["line"]) == (2, 4)
+    assert scenarios[1]["error"].startswith("Malformed JSON")
+    assert scenarios[2]["error"] == "Expected a JSON object, got list"
+    assert scenarios[3]["question"] == "What is AT1?"
+
+
+def test_malformed_csv_row_is_reported_with_its_line(tmp_path):
+    limit = csv.field_size_limit()
+    path = tmp_path / "scenarios.csv"
+    path.write_text(f"id,question\nx,q1\ny,{'a' * 200}\nz,q3\n", encoding="utf-8")
+
+    csv.field_size_limit(100)
+    try:
+        scenarios = list(main.read_scenarios(str(path), "question", "id"))
+    finally:
+        csv.field_size_limit(limit)
+
+    assert [scenario["id"] for scenario in scenarios] == ["x", "2", "z"]
+    assert scenarios[1]["line"] == 3
+    assert "field larger than field limit" in scenarios[1]["error"]
+
+
+def test_error_scenario_is_recorded_like_a_failed_run():
+    scenario = {"id": "2", "question": "", "entity": None, "period": None,
+                "line": 2, "error": "Malformed JSON: Expecting value"}
+
+    result = main.run_scenario(pipeline=None, scenario=scenario)
+
+    assert result["status"] == "error"
+    assert result["line"] == 2
+    assert result["error"] == "ValueError: Line 2: Malformed JSON: Expecting value"
@@ -0,0 +1,101 @@
+"""ModelCascade escalation, fallback and per-tier counters with a stub LLM client."""
+import pytest
+
+from reasoning import ModelCascade, ModelTier
+
+CHEAP = ModelTier("fast", "cheap-model", cost_per_1k_input_tokens=0.1, cost_per_1k_output_tokens=0.4)
+STRONG = ModelTier("strong", "strong-model", cost_per_1k_input_tokens=1.0, cost_per_1k_output_tokens=4.0)
+
+
+class StubClient:
+    """generate_parsed stand-in: a (text, parsed) response or an exception per tier."""
+
+    def __init__(self, cheap, strong):
+        self.responses = {CHEAP.model: cheap, STRONG.model: strong}
+        self.models = []
+
+    def generate_parsed(self, system_prompt, user_prompt, temperature=0.1, model=None):
+        self.models.append(model)
+        response = self.responses[model]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def _answer(confidence: float):
+    return '{"confidence": %s}' % confidence, {"confidence": confidence}
+
+
+def _confident(parsed) -> bool:
+    return parsed["confidence"] >= 0.8
+
+
+def _cascade(client) -> ModelCascade:
+    return ModelCascade(client, tiers=[CHEAP, STRONG])
+
+
+def test_cheap_model_answer_is_accepted_without_escalating():
+    client = StubClient(_answer(0.9), _answer(1.0))
+    cascade = _cascade(client)
+
+    assert cascade.run("system", "user", _confident) == ({"confidence": 0.9}, "fast")
+    assert client.models == ["cheap-model"]
+    stats = cascade.get_stats()
+    assert (stats["fast"]["attempts"], stats["fast"]["successes"]) == (1, 1)
+    assert stats["strong"]["attempts"] == 0
+
+
+def test_low_confidence_answer_escalates():
+    client = StubClient(_answer(0.3), _answer(0.95))
+    cascade = _cascade(client)
+
+    assert cascade.run("system", "user", _confident) == ({"confidence": 0.95}, "strong")
+    assert client.models == ["cheap-model", "strong-model"]
+    stats = cascade.get_stats()
+    assert stats["fast"]["validation_failures"] == 1
+    assert stats["fast"]["success_rate"] == 0.0
+    assert stats["strong"]["successes"] == 1
+
+
+def test_unparseable_answer_escalates():
+    client = StubClient(("not json", None), _answer(0.9))
+    cascade = _cascade(client)
+
+    assert cascade.run("system", "user", _confident) == ({"confidence": 0.9}, "strong")
+    assert cascade.get_stats()["fast"]["parse_failures"] == 1
+
+
+def test_strong_model_error_falls_back_to_last_parsed_answer():
+    client = StubClient(_answer(0.5), ConnectionError("provider down"))
+    cascade = _cascade(client)
+
+    assert cascade.run("system", "user", _confident) == ({"confidence": 0.5}, "fast")
+    stats = cascade.get_stats()
+    assert stats["fast"]["validation_failures"] == 1
+    assert (stats["strong"]["attempts"], stats["strong"]["errors"]) == (1, 1)
+    assert stats["strong"]["output_tokens"] == 0
+
+
+def test_every_tier_failing_returns_nothing():
+    client = StubClient(ValueError("quota"), ("garbage", None))
+
+    assert _cascade(client).run("system", "user", _confident) == (None, None)
+
+
+def test_stats_accumulate_tokens_and_cost():
+    client = StubClient(_answer(0.3), _answer(0.9))
+    cascade = _cascade(client)
+
+    for _ in range(3):
+        cascade.run("system prompt", "user prompt", _confident)
+
+    stats = cascade.get_stats()
+    fast, strong = stats["fast"], stats["strong"]
+    assert (fast["attempts"], fast["validation_failures"]) == (3, 3)
+    assert (strong["attempts"], strong["successes"], strong["success_rate"]) == (3, 3, 1.0)
+    assert fast["input_tokens"] == strong["input_tokens"] > 0
+    assert fast["output_tokens"] == strong["output_tokens"] > 0
+    expected = STRONG.cost(strong["input_tokens"], strong["output_tokens"])
+    assert strong["total_cost"] == pytest.approx(expected, abs=1e-6)
+    assert strong["total_cost"] == pytest.approx(10 * fast["total_cost"], rel=1e-3)
+    assert fast["avg_latency_s"] >= 0.0
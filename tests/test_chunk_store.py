@@ -0,0 +1,108 @@
+"""ChunkStore build/reopen round trip, ID lookup and content-addressed reuse."""
+import os
+
+import numpy as np
+import pytest
+
+from conftest import FakeEmbedder
+from models.regulatory import RegulatoryChunk
+from retrieval import VectorStore, chunk_store
+from retrieval.chunk_store import ChunkStore, content_digest
+import config
+
+
+def _corpus():
+    return [
+        RegulatoryChunk(id="PRA_OWNFUNDS_001", source="PRA Rulebook", paragraph="Article 26",
+                        text="CET1 items include paid-up capital instruments."),
+        RegulatoryChunk(id="CRR_036", source="CRR", paragraph="Article 36",
+                        text="Deduct intangible assets from CET1 items.", template="C 01.00"),
+        RegulatoryChunk(id="SS3/21 § 2.4", source="PRA SS3/21", paragraph="§ 2.4",
+                        text="Dividendes prévisibles — déduits à hauteur de 50 %, £ et € compris.",
+                        template="C 02.00"),
+        RegulatoryChunk(id="EMPTY_TEXT", source="CRR", paragraph="Article 26", text=""),
+    ]
+
+
+def test_build_and_reopen_round_trip(tmp_path):
+    chunks = _corpus()
+    path = str(tmp_path / "store")
+
+    built = ChunkStore.build(chunks, path)
+    reopened = ChunkStore(path)
+
+    for store in (built, reopened):
+        assert len(store) == len(chunks)
+        assert list(store) == chunks
+        assert store[-1] == chunks[-1]
+        assert list(store.texts()) == [chunk.text for chunk in chunks]
+    assert reopened.vocab["source"] == ["PRA Rulebook", "CRR", "PRA SS3/21"]
+    assert reopened.codes("source").tolist() == [0, 1, 2, 1]
+    assert reopened.vocab["template"] == ["C 01.00", "C 02.00"]
+    with pytest.raises(IndexError):
+        reopened[len(chunks)]
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".chunk-store-")]
+
+
+def test_empty_store(tmp_path):
+    store = ChunkStore.build([], str(tmp_path / "empty"))
+
+    assert len(store) == 0
+    assert list(store) == []
+    assert store.get("PRA_OWNFUNDS_001") is None
+
+
+def test_lookup_by_id_including_non_ascii_and_missing(tmp_path):
+    chunks = _corpus()
+    store = ChunkStore.build(chunks, str(tmp_path / "store"))
+
+    for row, chunk in enumerate(chunks):
+        assert store.row_of(chunk.id) == row
+        assert store.get(chunk.id) == chunk
+    assert store.get("SS3/21 § 2.4").text.startswith("Dividendes prévisibles")
+    for missing in ("", "PRA_OWNFUNDS_00", "PRA_OWNFUNDS_0011", "pra_ownfunds_001", "SS3/21 § 2.5"):
+        assert store.row_of(missing) is None
+        assert store.get(missing) is None
+
+
+def test_lookup_survives_colliding_hashes(tmp_path, monkeypatch):
+    # Every ID lands in the same slot, so lookups walk the whole probe chain
+    monkeypatch.setattr(chunk_store, "_id_hash", lambda chunk_id: 7)
+    chunks = _corpus()
+    store = ChunkStore.build(chunks, str(tmp_path / "store"))
+
+    assert [store.row_of(chunk.id) for chunk in chunks] == list(range(len(chunks)))
+    assert store.get("CRR_036") == chunks[1]
+    assert store.row_of("NOT_THERE") is None
+
+
+def test_existing_store_is_reused(tmp_path):
+    path = str(tmp_path / "store")
+    ChunkStore.build(_corpus(), path)
+    written = os.path.getmtime(os.path.join(path, "strings.bin"))
+
+    reused = ChunkStore.build(_corpus()[:1], path)
+
+    assert len(reused) == len(_corpus())
+    assert os.path.getmtime(os.path.join(path, "strings.bin")) == written
+
+
+def test_changed_corpus_gets_a_new_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CHUNK_STORE_DIR", str(tmp_path / "chunk_stores"))
+    chunks = _corpus()
+    edited = chunks[:1] + [chunks[1].model_copy(update={"text": "Deduct goodwill as well."})] + chunks[2:]
+    assert content_digest(edited) != content_digest(chunks)
+    assert content_digest(list(reversed(chunks))) != content_digest(chunks)
+    assert content_digest(_corpus()) == content_digest(chunks)
+
+    vector_store = VectorStore(FakeEmbedder(), index_factory="Flat")
+    vector_store.build_index(chunks)
+    first = vector_store.chunks.path
+    vector_store.build_index(edited)
+
+    assert vector_store.chunks.path != first
+    assert vector_store.get_chunk("CRR_036").text == "Deduct goodwill as well."
+    assert sorted(os.listdir(config.CHUNK_STORE_DIR)) == sorted(
+        [content_digest(chunks), content_digest(edited)]
+    )
+    assert np.array_equal(ChunkStore(first).codes("source"), vector_store.chunks.codes("source"))
@@ -0,0 +1,126 @@
+"""Own Funds consolidation: partial ownership, eliminations and incremental updates."""
+import pytest
+
+from analysis import ConsolidationEngine, EntityHierarchy, EntityNode, IntraGroupHolding
+from models.corep import CorepOutput, OwnFunds
+from models.run import RunRecord
+from storage import RunStore
+from validation import Validator
+
+
+def _own_funds(cet1: float = 0.0, at1: float = 0.0, t2: float = 0.0) -> OwnFunds:
+    return OwnFunds(common_equity_tier_1=cet1, additional_tier_1=at1, tier_2=t2, total_own_funds=cet1 + at1 + t2)
+
+
+def _figures(own_funds: OwnFunds) -> tuple:
+    return tuple(round(value, 6) for value in (
+        own_funds.common_equity_tier_1, own_funds.additional_tier_1, own_funds.tier_2, own_funds.total_own_funds
+    ))
+
+
+@pytest.fixture
+def group():
+    # G owns 80% of P, P owns 50% of S and 100% of T
+    return EntityHierarchy([
+        EntityNode("G"),
+        EntityNode("P", parent="G", ownership=0.8),
+        EntityNode("S", parent="P", ownership=0.5),
+        EntityNode("T", parent="P", ownership=1.0),
+    ], minority_recognition=0.0)
+
+
+SOLO = {
+    "G": _own_funds(cet1=1000),
+    "P": _own_funds(cet1=400, at1=50),
+    "S": _own_funds(cet1=200, t2=40),
+    "T": _own_funds(cet1=100),
+}
+
+
+def test_partial_ownership_scales_subsidiaries(group):
+    engine = ConsolidationEngine(group, SOLO)
+
+    # P: 400 + 0.5 * 200 + 100 = 600 CET1, 0.5 * 40 = 20 Tier 2
+    assert _figures(engine.own_funds("P")) == (600, 50, 20, 670)
+    assert _figures(engine.own_funds("G")) == (1480, 40, 16, 1536)
+    assert _figures(engine.own_funds("S")) == _figures(SOLO["S"])
+    assert [engine.hierarchy.basis(e) for e in "GPST"] == ["consolidated", "sub-consolidated", "solo", "solo"]
+
+
+def test_minority_recognition_counts_part_of_third_party_interest():
+    hierarchy = EntityHierarchy(
+        [EntityNode("P"), EntityNode("S", parent="P", ownership=0.6)], minority_recognition=0.5
+    )
+    engine = ConsolidationEngine(hierarchy, {"S": _own_funds(cet1=100)})
+
+    assert engine.own_funds("P").common_equity_tier_1 == pytest.approx(80)
+
+
+def test_elimination_is_scaled_by_the_issuers_recognised_share(group):
+    # P holds all 40 of S's Tier 2; only P's 50% of it is consolidated into P
+    holding = IntraGroupHolding(holder="P", issuer="S", field="tier_2", amount=40)
+    engine = ConsolidationEngine(group, SOLO, [holding])
+
+    assert _figures(engine.own_funds("P")) == (600, 50, 0, 650)
+    assert _figures(engine.own_funds("G")) == (1480, 40, 0, 1520)
+    assert _figures(engine.own_funds("S")) == _figures(SOLO["S"])
+    assert engine.warnings("P") == []
+
+
+def test_elimination_at_a_higher_common_ancestor(group):
+    # G holds S's Tier 2: the LCA is G, and S reaches G through 0.5 * 0.8
+    holding = IntraGroupHolding(holder="G", issuer="S", field="tier_2", amount=40)
+    engine = ConsolidationEngine(group, SOLO, [holding])
+
+    assert engine.own_funds("P").tier_2 == pytest.approx(20)
+    assert engine.own_funds("G").tier_2 == pytest.approx(0)
+
+
+def test_holdings_outside_the_group_are_rejected(group):
+    with pytest.raises(ValueError):
+        ConsolidationEngine(group, SOLO, [IntraGroupHolding("P", "S", "total_own_funds", 1)])
+    other = EntityHierarchy([EntityNode("A"), EntityNode("B")])
+    with pytest.raises(ValueError):
+        ConsolidationEngine(other, {}, [IntraGroupHolding("A", "B", "tier_2", 1)])
+
+
+def test_negative_figures_are_clamped_with_a_warning(group):
+    holding = IntraGroupHolding(holder="T", issuer="P", field="additional_tier_1", amount=80)
+    engine = ConsolidationEngine(group, SOLO, [holding])
+
+    own_funds = engine.own_funds("P")
+    assert own_funds.additional_tier_1 == 0
+    assert own_funds.total_own_funds == pytest.approx(
+        own_funds.common_equity_tier_1 + own_funds.tier_2
+    )
+    assert Validator().validate_totals(own_funds) == []
+    assert engine.results()["P"]["additional_tier_1"] == pytest.approx(-30)
+    assert len(engine.warnings("P")) == 1
+    assert "additional_tier_1" in engine.warnings("P")[0]
+    assert engine.results()["T"]["warnings"] == []
+
+
+def test_update_matches_a_full_recomputation(group):
+    holdings = [IntraGroupHolding(holder="P", issuer="S", field="tier_2", amount=40)]
+    engine = ConsolidationEngine(group, SOLO, holdings)
+
+    changed = engine.update("S", _own_funds(cet1=300, t2=60))
+
+    assert changed == ["S", "P", "G"]
+    fresh = ConsolidationEngine(group, {**SOLO, "S": _own_funds(cet1=300, t2=60)}, holdings)
+    for entity in "GPST":
+        assert _figures(engine.own_funds(entity)) == _figures(fresh.own_funds(entity))
+    assert engine.update("T", SOLO["T"]) == []
+
+
+def test_from_run_store_uses_latest_solo_runs(group):
+    store = RunStore(":memory:")
+    for entity, own_funds in SOLO.items():
+        store.append(RunRecord(question="q", entity=entity, period="2024-12-31",
+                               output=CorepOutput(own_funds=_own_funds())))
+        store.append(RunRecord(question="q", entity=entity, period="2024-12-31",
+                               output=CorepOutput(own_funds=own_funds)))
+
+    engine = ConsolidationEngine.from_run_store(group, store, "2024-12-31")
+
+    assert _figures(engine.own_funds("G")) == (1480, 40, 16, 1536)
@@ -0,0 +1,117 @@
+"""Embedding server round trips over a Unix socket with a fake model."""
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+from retrieval.embedding_client import EmbeddingClient, recv_header, send_message
+from retrieval.embedding_server import MicroBatcher, _Handler, _Server
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix domain sockets")
+
+DIM = 4
+
+
+class FakeModel:
+    """Embeds a text as [len, first char code, 0, 1]; fails on 'boom'."""
+
+    def __init__(self):
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return DIM
+
+    def encode(self, texts, convert_to_numpy=True):
+        assert texts, "empty input must not reach the model"
+        with self._lock:
+            self.batches.append(len(texts))
+        if "boom" in texts:
+            raise ValueError("cannot embed 'boom'")
+        return np.array([[len(text), ord(text[0]), 0, 1] for text in texts], dtype=np.float64)
+
+
+def _expected(texts):
+    return np.array([[len(text), ord(text[0]), 0, 1] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def server(tmp_path):
+    model = FakeModel()
+    path = str(tmp_path / "embed.sock")
+    server = _Server(path, _Handler)
+    server.batcher = MicroBatcher(model, max_batch=64, max_wait_ms=50)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield path, model
+    server.shutdown()
+    server.server_close()
+
+
+def test_encode_round_trip(server):
+    path, _ = server
+    client = EmbeddingClient(path)
+
+    embeddings = client.encode(["capital", "tier two"])
+
+    assert embeddings.dtype == np.float32
+    np.testing.assert_array_equal(embeddings, _expected(["capital", "tier two"]))
+
+
+def test_empty_input_returns_zero_rows_without_calling_the_model(server):
+    path, model = server
+    client = EmbeddingClient(path)
+
+    assert client.encode([]).shape == (0, DIM)
+
+    # A raw empty request is answered by the server with a (0, dim) matrix too
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        send_message(sock, {"op": "encode", "texts": []})
+        assert recv_header(sock) == {"shape": [0, DIM]}
+    assert model.batches == []
+
+
+def test_concurrent_requests_are_micro_batched(server):
+    path, model = server
+    texts = [f"question {n}" * (n + 1) for n in range(8)]
+    results = {}
+    barrier = threading.Barrier(len(texts))
+
+    def request(n):
+        client = EmbeddingClient(path)
+        barrier.wait()
+        results[n] = client.encode([texts[n]])
+
+    threads = [threading.Thread(target=request, args=(n,)) for n in range(len(texts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for n, text in enumerate(texts):
+        np.testing.assert_array_equal(results[n], _expected([text]))
+    assert sum(model.batches) == len(texts)
+    assert len(model.batches) < len(texts)
+    stats = EmbeddingClient(path).stats()
+    assert stats["requests"] == len(texts)
+    assert stats["batches"] == len(model.batches)
+
+
+def test_model_errors_are_framed_and_connection_stays_usable(server):
+    path, _ = server
+    client = EmbeddingClient(path)
+
+    with pytest.raises(RuntimeError, match="cannot embed 'boom'"):
+        client.encode(["boom"])
+
+    np.testing.assert_array_equal(client.encode(["after"]), _expected(["after"]))
+
+
+def test_unknown_op_returns_an_error(server):
+    path, _ = server
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        send_message(sock, {"op": "reload"})
+        assert recv_header(sock) == {"error": "Unknown op 'reload'"}
@@ -0,0 +1,138 @@
+"""Streaming xBRL-CSV and Parquet export."""
+import argparse
+import csv
+import json
+import os
+
+import pytest
+
+from models.run import RunRecord
+from reporting import export
+from reporting.__main__ import _export, synthetic_records
+from reporting.export import ParquetExportWriter, XbrlCsvWriter, export_runs
+from storage import RunStore
+
+
+def _read_csv(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_export_writer_is_abstract():
+    with pytest.raises(TypeError):
+        export._ExportWriter("unused")
+
+
+def test_synthetic_records_have_unique_run_ids():
+    records = list(synthetic_records(2500, entities=10))
+    assert len(records) == 2500
+    assert len({record.run_id for record in records}) == 2500
+
+
+def test_xbrl_csv_package_round_trip(tmp_path):
+    records = list(synthetic_records(30, entities=5)) + [RunRecord(question="failed")]
+    path = str(tmp_path / "package")
+
+    with XbrlCsvWriter(path) as writer:
+        writer.write_many(records)
+
+    stats = writer.stats
+    assert (stats.submissions, stats.skipped) == (30, 1)
+    reports = os.path.join(path, "reports")
+    figures = _read_csv(os.path.join(reports, "c_01.00.csv"))
+    assert figures[0] == ["entity", "period", "datapoint", "factValue"]
+    assert len(figures) - 1 == stats.figure_rows == 30 * 5
+
+    first = records[0].output.own_funds
+    by_datapoint = {row[2]: float(row[3]) for row in figures[1:6]}
+    assert by_datapoint["r0010_c0010"] == pytest.approx(first.total_own_funds)
+    assert by_datapoint["r0015_c0010"] == pytest.approx(first.common_equity_tier_1 + first.additional_tier_1)
+    assert len(_read_csv(os.path.join(reports, "audit_log.csv"))) - 1 == stats.audit_rows
+    assert len(_read_csv(os.path.join(reports, "warnings.csv"))) - 1 == stats.warning_rows
+    with open(os.path.join(reports, "report.json"), encoding="utf-8") as f:
+        assert set(json.load(f)["tables"]) == {"c_01.00", "audit_log", "warnings"}
+    with pytest.raises(ValueError):
+        XbrlCsvWriter(path)
+
+
+def test_parquet_round_trip(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    records = list(synthetic_records(40, entities=5))
+    path = str(tmp_path / "parquet")
+
+    with ParquetExportWriter(path, batch_rows=64) as writer:
+        writer.write_many(records)
+
+    figures = pq.read_table(os.path.join(path, "figures.parquet")).to_pylist()
+    assert len(figures) == writer.stats.figure_rows == 40 * 5
+    assert figures[0]["run_id"] == records[0].run_id
+    assert figures[0]["value"] == pytest.approx(records[0].output.own_funds.total_own_funds)
+    audit = pq.read_table(os.path.join(path, "audit_log.parquet")).to_pylist()
+    assert len(audit) == writer.stats.audit_rows
+    assert audit[0]["rule_ids"] == records[0].output.audit_log[0].rule_ids
+    warnings = pq.read_table(os.path.join(path, "warnings.parquet"))
+    assert warnings.num_rows == writer.stats.warning_rows
+
+
+def test_cli_exports_only_latest_run_per_submission(tmp_path):
+    store_path = str(tmp_path / "runs.db")
+    older, other, newer, undated = synthetic_records(4, entities=4)
+    older = older.model_copy(update={"entity": "LEI-A", "period": "2024-12-31", "created_at": 1.0})
+    other = other.model_copy(update={"entity": "LEI-B", "period": "2024-12-31", "created_at": 2.0})
+    newer = newer.model_copy(update={"entity": "LEI-A", "period": "2024-12-31", "created_at": 3.0})
+    undated = undated.model_copy(update={"entity": "LEI-A", "period": None, "created_at": 4.0})
+    store = RunStore(store_path)
+    store.append_many([older, other, newer, undated])
+    store.close()
+
+    path = tmp_path / "package"
+    _export(argparse.Namespace(store=store_path, xbrl_csv=str(path), parquet=None, zip=False,
+                               entity=None, period=None, template=None))
+
+    figures = _read_csv(os.path.join(path, "reports", "c_01.00.csv"))[1:]
+    totals = {row[0]: float(row[3]) for row in figures if row[2] == "r0010_c0010"}
+    assert len(figures) == 2 * 5
+    assert totals == {
+        "LEI-A": pytest.approx(newer.output.own_funds.total_own_funds),
+        "LEI-B": pytest.approx(other.output.own_funds.total_own_funds),
+    }
+
+
+def test_failed_writer_setup_discards_partial_package(tmp_path, monkeypatch):
+    def missing_pyarrow():
+        raise ImportError("Parquet export needs pyarrow")
+
+    monkeypatch.setattr(export, "_require_pyarrow", missing_pyarrow)
+    xbrl_path = tmp_path / "package"
+
+    with pytest.raises(ImportError):
+        export_runs(synthetic_records(5), str(xbrl_path), str(tmp_path / "parquet"))
+
+    assert not xbrl_path.exists()
+    assert not (tmp_path / "parquet").exists()
+
+
+def test_failure_mid_export_discards_both_outputs(tmp_path):
+    pytest.importorskip("pyarrow")
+    xbrl_path, parquet_path = tmp_path / "package", tmp_path / "parquet"
+
+    def failing_records():
+        yield from synthetic_records(5)
+        raise RuntimeError("run store went away")
+
+    with pytest.raises(RuntimeError):
+        export_runs(failing_records(), str(xbrl_path), str(parquet_path))
+
+    assert not xbrl_path.exists()
+    assert not parquet_path.exists()
+
+
+def test_writer_context_discards_on_error(tmp_path):
+    path = tmp_path / "package"
+
+    with pytest.raises(RuntimeError):
+        with XbrlCsvWriter(str(path)) as writer:
+            writer.write_many(synthetic_records(3))
+            raise RuntimeError("interrupted")
+
+    assert not path.exists()
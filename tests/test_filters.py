@@ -0,0 +1,110 @@
+"""Metadata pre-filtering: bitmap evaluation, in-index selection and the PQ post-filter fallback."""
+import numpy as np
+import pytest
+
+from conftest import FakeEmbedder
+from models.regulatory import RegulatoryChunk
+from retrieval import ChunkFilter, VectorStore
+from retrieval.filters import MetadataIndex
+import config
+
+SOURCES = ("PRA Rulebook", "CRR", "PRA SS3/21")
+
+
+def _corpus(count: int):
+    return [
+        RegulatoryChunk(
+            id=f"CHUNK_{i:03d}",
+            source=SOURCES[i % 3],
+            paragraph=f"Article {i % 20}",
+            text=f"capital rule {i} about tier {i % 7} instruments and deduction {i % 11}",
+        )
+        for i in range(count)
+    ]
+
+
+def _store(tmp_path, chunks, index_factory: str = "Flat") -> VectorStore:
+    store = VectorStore(FakeEmbedder(), index_factory=index_factory)
+    store.build_index(chunks, str(tmp_path / "chunks"))
+    return store
+
+
+def _rows(bitmap: np.ndarray, size: int):
+    return np.flatnonzero(np.unpackbits(bitmap, bitorder="little")[:size]).tolist()
+
+
+def test_filter_accepts_lists_and_stays_hashable():
+    chunk_filter = ChunkFilter(sources=["CRR"], ids=["A", "B"])
+
+    assert chunk_filter.sources == ("CRR",)
+    assert hash(chunk_filter) == hash(ChunkFilter(sources=("CRR",), ids=("A", "B")))
+
+
+@pytest.mark.parametrize("bitset_max_values", [256, 1])
+def test_bitmap_matches_python_predicate(tmp_path, monkeypatch, bitset_max_values):
+    # 1 forces the dictionary-code path instead of precomputed bitsets
+    monkeypatch.setattr(config, "FILTER_BITSET_MAX_VALUES", bitset_max_values)
+    chunks = _corpus(43)
+    metadata = MetadataIndex(_store(tmp_path, chunks).chunks)
+    chunk_filter = ChunkFilter(
+        sources=("CRR", "PRA SS3/21"),
+        paragraphs=("Article 1", "Article 2", "Article 5"),
+        ids=("CHUNK_001", "CHUNK_002", "CHUNK_005", "CHUNK_022", "CHUNK_041", "UNKNOWN"),
+    )
+
+    bitmap = metadata.evaluate(chunk_filter)
+
+    expected = [
+        i for i, chunk in enumerate(chunks)
+        if chunk.source in chunk_filter.sources
+        and chunk.paragraph in chunk_filter.paragraphs
+        and chunk.id in chunk_filter.ids
+    ]
+    assert len(bitmap) == (len(chunks) + 7) // 8
+    assert _rows(bitmap, len(chunks)) == expected == [1, 2, 5, 22, 41]
+    assert MetadataIndex.count(bitmap) == 5
+
+
+def test_unconstrained_filter_clears_padding_bits(tmp_path):
+    chunks = _corpus(13)
+    bitmap = MetadataIndex(_store(tmp_path, chunks).chunks).evaluate(ChunkFilter())
+
+    assert MetadataIndex.count(bitmap) == 13
+
+
+def test_filtered_search_returns_full_top_k_of_matching_chunks(tmp_path):
+    chunks = _corpus(60)
+    store = _store(tmp_path, chunks)
+
+    hits = store.retrieve("capital rule tier instruments", top_k=5, filters=ChunkFilter(sources=("CRR",)))
+
+    assert len(hits) == 5
+    assert all(chunk.source == "CRR" for chunk, _ in hits)
+    unfiltered = store.retrieve("capital rule tier instruments", top_k=60)
+    assert [chunk.id for chunk, _ in hits] == [
+        chunk.id for chunk, _ in unfiltered if chunk.source == "CRR"
+    ][:5]
+
+
+def test_no_matching_chunks_returns_empty(tmp_path):
+    store = _store(tmp_path, _corpus(20))
+
+    assert store.retrieve("capital", top_k=3, filters=ChunkFilter(sources=("Basel",))) == []
+
+
+def test_index_without_selector_support_falls_back_to_post_filter(tmp_path):
+    chunks = _corpus(80)
+    store = _store(tmp_path, chunks, index_factory="PQ4x4")
+    chunk_filter = ChunkFilter(paragraphs=("Article 3",))
+
+    hits = store.retrieve("capital rule 3 about tier", top_k=3, filters=chunk_filter)
+
+    assert len(hits) == 3
+    assert all(chunk.paragraph == "Article 3" for chunk, _ in hits)
+    distances = [distance for _, distance in hits]
+    assert distances == sorted(distances)
+    # Only 4 of the 80 chunks match: the search widens to the whole index
+    everything = store.retrieve("capital rule 3 about tier", top_k=10, filters=chunk_filter)
+    assert sorted(chunk.id for chunk, _ in everything) == [
+        "CHUNK_003", "CHUNK_023", "CHUNK_043", "CHUNK_063"
+    ]
@@ -0,0 +1,235 @@
+"""HedgedExecutor deadline, budget and winner accounting with a fake clock and provider."""
+import threading
+import time
+
+import pytest
+
+from conftest import FakeClock
+from reasoning.hedging import HedgedExecutor, LatencyTracker, attempt_lost
+from reasoning.rate_limiter import LLMScheduler
+
+
+def parse(text: str):
+    return None if text.startswith("garbage") else {"text": text}
+
+
+def _hedger(clock=None, **overrides) -> HedgedExecutor:
+    settings = dict(percentile=90, min_delay=0.0, initial_delay=5.0, min_samples=5,
+                    budget_ratio=1.0, max_workers=4)
+    settings.update(overrides)
+    return HedgedExecutor(clock=clock or time.perf_counter, **settings)
+
+
+def test_latency_tracker_nearest_rank_percentile():
+    tracker = LatencyTracker(window=10)
+    for latency in range(1, 21):
+        tracker.record(float(latency))
+
+    assert len(tracker) == 10
+    assert tracker.percentile(50) == 15.0
+    assert tracker.percentile(90) == 19.0
+    assert tracker.percentile(100) == 20.0
+
+
+def test_deadline_uses_initial_delay_then_percentile_with_floor():
+    clock = FakeClock()
+    hedger = _hedger(clock)
+
+    def provider(latency):
+        def call():
+            clock.advance(latency)
+            return f"answer after {latency}s"
+        return call
+
+    for latency in (1.0, 2.0, 3.0, 4.0):
+        hedger.run(provider(latency), parse, key="fast-model")
+    assert hedger.hedge_delay("fast-model") == 5.0
+
+    for latency in range(5, 11):
+        hedger.run(provider(float(latency)), parse, key="fast-model")
+    assert hedger.hedge_delay("fast-model") == 9.0
+    assert hedger.hedge_delay("other-model") == 5.0
+
+    hedger.min_delay = 20.0
+    assert hedger.hedge_delay("fast-model") == 20.0
+
+
+def test_deadline_ignores_rate_limiter_queue_wait():
+    clock = FakeClock()
+    hedger = _hedger(clock, min_samples=1)
+
+    def provider():
+        clock.advance(0.5)
+        return "ok"
+
+    def queued_request():
+        clock.advance(30.0)                 # waiting in the scheduler
+        return hedger.timed(provider)()     # the provider call itself
+
+    hedger.run(queued_request, parse)
+
+    assert hedger.hedge_delay() == 0.5
+
+
+def test_unwrapped_request_is_timed_end_to_end():
+    clock = FakeClock()
+    hedger = _hedger(clock, min_samples=1)
+
+    def request():
+        clock.advance(2.0)
+        return "ok"
+
+    hedger.run(request, parse)
+
+    assert hedger.hedge_delay() == 2.0
+
+
+def _race(primary_delay: float, primary_text: str = "primary", hedge_text: str = "hedge"):
+    """A request whose first (primary) attempt is slow and whose second (hedge) is instant."""
+    calls = []
+    lock = threading.Lock()
+
+    def request():
+        with lock:
+            calls.append(None)
+            first = len(calls) == 1
+        if first:
+            time.sleep(primary_delay)
+            return primary_text
+        return hedge_text
+
+    request.calls = calls
+    return request
+
+
+def test_hedge_wins_when_primary_is_slow():
+    hedger = _hedger(initial_delay=0.01)
+
+    text, parsed = hedger.run(_race(0.2), parse)
+
+    assert (text, parsed) == ("hedge", {"text": "hedge"})
+    metrics = hedger.get_metrics()
+    assert (metrics["hedges_triggered"], metrics["hedge_wins"]) == (1, 1)
+    assert metrics["hedge_win_rate"] == 1.0
+
+
+def test_no_hedge_when_primary_beats_deadline():
+    hedger = _hedger(initial_delay=1.0)
+    request = _race(0.0)
+
+    assert hedger.run(request, parse)[0] == "primary"
+    assert len(request.calls) == 1
+    assert hedger.get_metrics()["hedges_triggered"] == 0
+
+
+def test_unparseable_hedge_loses_to_slower_primary():
+    hedger = _hedger(initial_delay=0.01)
+
+    text, parsed = hedger.run(_race(0.1, hedge_text="garbage"), parse)
+
+    assert (text, parsed) == ("primary", {"text": "primary"})
+    metrics = hedger.get_metrics()
+    assert (metrics["hedges_triggered"], metrics["hedge_wins"]) == (1, 0)
+
+
+def test_budget_ratio_caps_hedges():
+    hedger = _hedger(initial_delay=0.01, budget_ratio=0.5)
+
+    texts = [hedger.run(_race(0.1), parse)[0] for _ in range(4)]
+
+    # Request n may hedge only while hedges + 1 <= 0.5 * n
+    assert texts == ["primary", "hedge", "primary", "hedge"]
+    metrics = hedger.get_metrics()
+    assert metrics["requests"] == 4
+    assert (metrics["hedges_triggered"], metrics["budget_denied"]) == (2, 2)
+    assert metrics["hedge_rate"] == 0.5
+
+
+def test_no_parseable_response_returns_last_text():
+    hedger = _hedger(initial_delay=0.01)
+
+    text, parsed = hedger.run(_race(0.05, primary_text="garbage 1", hedge_text="garbage 2"), parse)
+
+    assert parsed is None
+    assert text == "garbage 1"
+
+
+def test_all_attempts_failing_reraises():
+    hedger = _hedger(initial_delay=0.01)
+
+    def request():
+        time.sleep(0.03)
+        raise ConnectionError("provider down")
+
+    with pytest.raises(ConnectionError):
+        hedger.run(request, parse)
+
+
+def _counting_provider(latency: float = 0.0, text: str = "answer"):
+    calls = []
+
+    def provider():
+        calls.append(None)
+        time.sleep(latency)
+        return text
+
+    provider.calls = calls
+    return provider
+
+
+def _scheduled(hedger, scheduler, provider):
+    """The request shape LLMClient builds: queue in the scheduler, time the provider."""
+    def request():
+        return scheduler.call(hedger.timed(provider), cancelled=attempt_lost)
+    return request
+
+
+def _wait_until(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_no_hedge_while_primary_is_queued_in_scheduler():
+    scheduler_clock = FakeClock()
+    scheduler = LLMScheduler(requests_per_minute=1, tokens_per_minute=0, clock=scheduler_clock)
+    scheduler.acquire()                     # bucket exhausted until the clock moves
+    hedger = _hedger(initial_delay=0.01)
+    provider = _counting_provider()
+    result = {}
+
+    caller = threading.Thread(target=lambda: result.update(
+        answer=hedger.run(_scheduled(hedger, scheduler, provider), parse, wait_for_send=True)
+    ))
+    caller.start()
+    time.sleep(0.2)                         # far past the 10 ms hedge deadline
+
+    assert provider.calls == []
+    assert scheduler.queue_depth == 1
+    assert hedger.get_metrics()["hedges_triggered"] == 0
+
+    scheduler_clock.advance(60.0)
+    caller.join(timeout=2.0)
+
+    assert result["answer"] == ("answer", {"text": "answer"})
+    assert len(provider.calls) == 1
+    assert hedger.get_metrics()["hedges_triggered"] == 0
+
+
+def test_losing_hedge_leaves_scheduler_queue_without_sending():
+    scheduler = LLMScheduler(requests_per_minute=1, tokens_per_minute=0, clock=FakeClock())
+    hedger = _hedger(initial_delay=0.01)
+    provider = _counting_provider(latency=0.1, text="primary")
+
+    # The primary takes the only request token; the hedge queues behind it
+    text, parsed = hedger.run(_scheduled(hedger, scheduler, provider), parse, wait_for_send=True)
+
+    assert (text, parsed) == ("primary", {"text": "primary"})
+    assert _wait_until(lambda: scheduler.get_metrics()["cancelled"] == 1)
+    assert scheduler.queue_depth == 0
+    assert len(provider.calls) == 1
+    metrics = hedger.get_metrics()
+    assert (metrics["hedges_triggered"], metrics["hedge_wins"]) == (1, 0)
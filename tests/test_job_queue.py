@@ -0,0 +1,197 @@
+"""JobQueue lease/retry/dead-letter tests on a temporary database, the worker loop and enqueue."""
+import argparse
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from jobs import DEAD, DONE, LEASED, QUEUED, JobQueue, Worker
+from jobs.__main__ import _enqueue
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return JobQueue(str(tmp_path / "jobs.db"), max_attempts=2, retry_backoff=10.0, clock=clock)
+
+
+def test_lease_is_exclusive_across_workers(queue):
+    ids = queue.enqueue_many([{"n": n} for n in range(5)])
+
+    first = queue.lease("w1", limit=3, lease_seconds=5)
+    second = queue.lease("w2", limit=3, lease_seconds=5)
+
+    assert [job.id for job in first] == ids[:3]
+    assert [job.id for job in second] == ids[3:]
+    assert queue.lease("w3", limit=3, lease_seconds=5) == []
+    assert queue.stats()[LEASED] == 5
+
+
+def test_concurrent_leases_never_share_a_job(queue):
+    queue.enqueue_many([{"n": n} for n in range(40)])
+    leased = {}
+
+    def take(worker_id):
+        leased[worker_id] = [job.id for job in queue.lease(worker_id, limit=40, lease_seconds=5)]
+
+    threads = [threading.Thread(target=take, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    all_ids = [job_id for ids in leased.values() for job_id in ids]
+    assert len(all_ids) == len(set(all_ids)) == 40
+
+
+def test_enqueue_with_job_key_is_idempotent(queue):
+    assert queue.enqueue({"n": 1}, job_key="entity-a/2025Q4") is not None
+    assert queue.enqueue({"n": 2}, job_key="entity-a/2025Q4") is None
+    assert queue.stats()[QUEUED] == 1
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(queue, clock):
+    job_id = queue.enqueue({"n": 1})
+    assert [job.id for job in queue.lease("w1", lease_seconds=5)] == [job_id]
+
+    clock.advance(4)
+    assert queue.lease("w2", lease_seconds=5) == []
+
+    clock.advance(2)
+    reclaimed = queue.lease("w2", lease_seconds=5)
+    assert [job.id for job in reclaimed] == [job_id]
+    assert reclaimed[0].attempts == 2
+    assert queue.complete(job_id, "w1") is False
+    assert queue.complete(job_id, "w2", {"ok": True}) is True
+    assert queue.result(job_id)["status"] == DONE
+
+
+def test_expired_lease_on_last_attempt_is_dead_lettered(queue, clock):
+    job_id = queue.enqueue({"n": 1})
+    queue.lease("w1", lease_seconds=5)
+    clock.advance(6)
+    queue.lease("w2", lease_seconds=5)
+    clock.advance(6)
+
+    assert queue.lease("w3", lease_seconds=5) == []
+    assert queue.result(job_id)["status"] == DEAD
+    assert queue.dead_letters()[0]["last_error"] == "Lease expired (worker lost)"
+
+
+def test_heartbeat_extends_lease_and_rejects_lost_jobs(queue, clock):
+    a, b = queue.enqueue_many([{"n": 1}, {"n": 2}])
+    queue.lease("w1", limit=2, lease_seconds=5)
+
+    clock.advance(4)
+    assert queue.heartbeat("w1", [a], lease_seconds=5) == [a]
+    clock.advance(2)
+    # b expired; w2 takes it over, a is still held by w1
+    assert [job.id for job in queue.lease("w2", lease_seconds=5)] == [b]
+    assert queue.heartbeat("w1", [a, b], lease_seconds=5) == [a]
+    assert queue.heartbeat("w2", [a], lease_seconds=5) == []
+
+
+def test_fail_retries_with_backoff_then_dead_letters(queue, clock, monkeypatch):
+    monkeypatch.setattr("jobs.queue.random.uniform", lambda low, high: 1.0)
+    job_id = queue.enqueue({"n": 1})
+
+    queue.lease("w1", lease_seconds=5)
+    assert queue.fail(job_id, "w1", "boom") == QUEUED
+    clock.advance(9)
+    assert queue.lease("w1", lease_seconds=5) == []
+    clock.advance(1)
+    assert [job.id for job in queue.lease("w1", lease_seconds=5)] == [job_id]
+
+    assert queue.fail(job_id, "w1", "boom again") == DEAD
+    assert queue.fail(job_id, "w1", "late") is None
+    assert queue.dead_letters()[0]["last_error"] == "boom again"
+
+
+def test_requeue_dead_gives_fresh_attempts(queue, clock):
+    dead, other = queue.enqueue_many([{"n": 1}, {"n": 2}])
+    for _ in range(2):
+        queue.lease("w1", limit=2, lease_seconds=5)
+        clock.advance(6)
+    queue.lease("w1", limit=2, lease_seconds=5)
+    assert queue.stats()[DEAD] == 2
+
+    assert queue.requeue_dead([]) == 0
+    assert queue.requeue_dead([dead]) == 1
+    job, = queue.lease("w1", lease_seconds=5)
+    assert (job.id, job.attempts) == (dead, 1)
+    assert queue.requeue_dead() == 1
+
+
+def test_enqueue_cli_skips_bad_lines_and_queues_the_rest(queue, tmp_path, capsys):
+    path = tmp_path / "jobs.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"question": "CET1?", "id": "a"}),
+        "{not json",
+        "",
+        json.dumps({"entity": "LEI-A"}),
+        json.dumps(["CET1?"]),
+        json.dumps({"question": "AT1?", "id": "b"}),
+    ]) + "\n", encoding="utf-8")
+
+    with pytest.raises(SystemExit, match="Skipped 3 invalid input line"):
+        _enqueue(queue, argparse.Namespace(input=str(path), priority=0))
+
+    assert queue.stats()[QUEUED] == 2
+    assert [job.payload["id"] for job in queue.lease("w1", limit=5, lease_seconds=5)] == ["a", "b"]
+    errors = capsys.readouterr().err
+    assert "Input line 2: Malformed JSON" in errors
+    assert "Input line 4: Job has no question" in errors
+    assert "Input line 5: Expected a JSON object, got list" in errors
+
+
+class StubPipeline:
+    """run_traced stand-in; questions containing 'fail' raise."""
+
+    def __init__(self):
+        self.questions = []
+        self.flushes = 0
+        self._lock = threading.Lock()
+
+    def run_traced(self, question, entity=None, period=None):
+        with self._lock:
+            self.questions.append(question)
+        if "fail" in question:
+            raise ValueError("bad scenario")
+        output = SimpleNamespace(model_dump=lambda: {"question": question, "entity": entity})
+        return SimpleNamespace(run_id=f"run-{question}", output=output)
+
+    def flush_runs(self):
+        self.flushes += 1
+        return 0
+
+
+def test_worker_completes_and_fails_jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), max_attempts=1)
+    ok = queue.enqueue_many([{"question": f"q{n}", "entity": "A"} for n in range(5)])
+    bad = queue.enqueue({"question": "please fail"})
+    pipeline = StubPipeline()
+
+    worker = Worker(queue, pipeline, worker_id="w1", batch_size=2, concurrency=3,
+                    lease_seconds=0.3, poll_interval=0.01)
+    leased = worker.run(exit_when_empty=True)
+
+    assert leased == 6
+    assert sorted(pipeline.questions) == sorted([f"q{n}" for n in range(5)] + ["please fail"])
+    assert worker.get_metrics()["completed"] == 5
+    assert worker.get_metrics()["failed"] == 1
+    assert queue.result(ok[0])["result"] == {"run_id": "run-q0", "output": {"question": "q0", "entity": "A"}}
+    assert queue.result(bad)["status"] == DEAD
+    assert queue.result(bad)["last_error"] == "ValueError: bad scenario"
+    assert pipeline.flushes >= 1
+
+
+def test_worker_stops_after_max_jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    queue.enqueue_many([{"question": f"q{n}"} for n in range(5)])
+
+    worker = Worker(queue, StubPipeline(), worker_id="w1", batch_size=5, concurrency=2,
+                    lease_seconds=0.3, poll_interval=0.01)
+
+    assert worker.run(max_jobs=3) == 3
+    assert queue.stats()[DONE] == 3
+    assert queue.stats()[QUEUED] == 2
@@ -0,0 +1,146 @@
+"""One CorepPipeline shared by many threads (as concurrent Streamlit sessions do)."""
+import threading
+
+from models.corep import CorepOutput
+from storage import RunStore
+
+
+QUESTIONS = [
+    "What items are included in Common Equity Tier 1 capital?",
+    "Which deductions apply to CET1, such as intangible assets?",
+    "When can Additional Tier 1 instruments be called?",
+    "What are the eligibility conditions for Tier 2 instruments?",
+    "How is Total Own Funds calculated?",
+    "Which rows of COREP C 01.00 must UK banks report?",
+]
+THREADS = 12
+ITERATIONS = 4
+
+
+def stub_generate_json(system_prompt, user_prompt, **kwargs):
+    fields = (("common_equity_tier_1", 1000.0), ("additional_tier_1", 150.0), ("tier_2", 0.0))
+    return {
+        "own_funds": {**dict(fields), "total_own_funds": 1150.0},
+        "audit_log": [
+            {"field": field, "value": value, "rule_ids": ["PRA_OWNFUNDS_001"], "explanation": "stub"}
+            for field, value in fields
+        ],
+        "warnings": [],
+    }
+
+
+def _hammer(worker, threads: int = THREADS):
+    """Start ``threads`` workers together and return the exceptions they raised."""
+    errors = []
+    barrier = threading.Barrier(threads)
+
+    def run(worker_id: int):
+        try:
+            barrier.wait()
+            worker(worker_id)
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=run, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return errors
+
+
+def _count_builds(pipeline):
+    builds = []
+    original_build = pipeline.vector_store._build_shard
+
+    def counting_build(template):
+        builds.append(template)
+        return original_build(template)
+
+    pipeline.vector_store._build_shard = counting_build
+    return builds
+
+
+def test_concurrent_ensure_index_builds_once(make_pipeline):
+    pipeline = make_pipeline(stub_generate_json)
+    builds = _count_builds(pipeline)
+
+    errors = _hammer(lambda worker_id: pipeline._ensure_index())
+
+    assert errors == []
+    assert pipeline.is_ready
+    assert len(builds) == 1
+
+
+def test_concurrent_runs_share_one_index(make_pipeline):
+    calls = []
+    lock = threading.Lock()
+
+    def generate_json(system_prompt, user_prompt, **kwargs):
+        with lock:
+            calls.append(user_prompt)
+        return stub_generate_json(system_prompt, user_prompt)
+
+    pipeline = make_pipeline(generate_json)
+    builds = _count_builds(pipeline)
+    outputs = []
+
+    def worker(worker_id: int):
+        for i in range(ITERATIONS):
+            outputs.append(pipeline.run(QUESTIONS[(worker_id + i) % len(QUESTIONS)]))
+
+    errors = _hammer(worker)
+
+    assert errors == []
+    assert len(builds) == len(set(builds))
+    assert len(calls) == len(outputs) == THREADS * ITERATIONS
+    assert all(isinstance(output, CorepOutput) for output in outputs)
+    assert all(output.own_funds.total_own_funds == 1150.0 for output in outputs)
+
+
+def test_concurrent_retrieval_matches_sequential(make_pipeline):
+    pipeline = make_pipeline(stub_generate_json)
+    results = {}
+
+    def worker(worker_id: int):
+        for i in range(ITERATIONS):
+            question = QUESTIONS[(worker_id + i) % len(QUESTIONS)]
+            results.setdefault(question, []).append([chunk.id for chunk in pipeline.retrieve_chunks(question)])
+
+    errors = _hammer(worker)
+
+    assert errors == []
+    for question, runs in results.items():
+        expected = [chunk.id for chunk in pipeline.retrieve_chunks(question)]
+        assert all(ids == expected for ids in runs)
+
+
+def test_run_record_template_follows_routing(make_pipeline):
+    pipeline = make_pipeline(stub_generate_json)
+
+    default = pipeline.run_traced(QUESTIONS[0])
+    leverage = pipeline.run_traced("What is the minimum leverage ratio of 3.25%?")
+
+    assert default.template == "C 01.00"
+    assert leverage.template == "C 47.00"
+
+
+def test_buffered_runs_are_written_in_batches(make_pipeline, monkeypatch):
+    pipeline = make_pipeline(stub_generate_json)
+    pipeline.run_store = RunStore(":memory:")
+    pipeline.record_batch_size = 4
+    batches = []
+    append_many = pipeline.run_store.append_many
+    monkeypatch.setattr(pipeline.run_store, "append_many",
+                        lambda records: batches.append(len(records)) or append_many(records))
+
+    errors = _hammer(lambda i: pipeline.run_traced(QUESTIONS[i % len(QUESTIONS)]), threads=10)
+
+    assert errors == []
+
+    assert batches == [4, 4]
+    assert pipeline.run_store.count() == 8
+    assert pipeline.flush_runs() == 2
+    assert pipeline.flush_runs() == 0
+    assert batches == [4, 4, 2]
+    assert pipeline.run_store.count() == 10
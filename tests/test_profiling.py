@@ -0,0 +1,85 @@
+"""StageProfiler stage naming, nesting and the disabled-mode no-op."""
+import os
+
+import pytest
+
+from profiling import StageProfiler, disable_profiling, enable_profiling, get_profiler, profile_stage
+
+
+def _outer_work():
+    return sum(range(1000))
+
+
+def _inner_work():
+    return sorted(range(1000), reverse=True)
+
+
+def _functions(stats):
+    return {name for _, _, name in stats.cpu.stats}
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    profiler = enable_profiling(str(tmp_path / "profiles"))
+    yield profiler
+    disable_profiling()
+
+
+def test_disabled_profile_stage_is_a_shared_no_op():
+    assert get_profiler() is None
+    stage = profile_stage("retrieve")
+
+    assert stage is profile_stage("reason")
+    with stage:
+        _outer_work()
+
+
+def test_stages_aggregate_per_name():
+    profiler = StageProfiler(trace_memory=False)
+
+    for _ in range(3):
+        with profiler.stage("retrieve"):
+            _outer_work()
+    with profiler.stage("reason"):
+        _inner_work()
+
+    assert set(profiler.stages) == {"retrieve", "reason"}
+    assert profiler.stages["retrieve"].calls == 3
+    assert profiler.stages["reason"].calls == 1
+    assert "_outer_work" in _functions(profiler.stages["retrieve"])
+
+
+def test_nested_stage_time_is_charged_to_innermost_stage():
+    profiler = StageProfiler(trace_memory=False)
+
+    with profiler.stage("outer"):
+        _outer_work()
+        with profiler.stage("inner"):
+            _inner_work()
+        _outer_work()
+
+    outer, inner = profiler.stages["outer"], profiler.stages["inner"]
+    assert (outer.calls, inner.calls) == (1, 1)
+    assert "_outer_work" in _functions(outer)
+    assert "_inner_work" not in _functions(outer)
+    assert "_inner_work" in _functions(inner)
+    assert "_outer_work" not in _functions(inner)
+    assert outer.wall_seconds >= inner.wall_seconds
+
+
+def test_enabled_profiling_dumps_each_stage(profiler):
+    assert get_profiler() is profiler
+    with profile_stage("retrieve"):
+        _outer_work()
+        with profile_stage("rerank"):
+            _inner_work()
+
+    paths = profiler.dump()
+
+    names = sorted(os.path.basename(path) for path in paths)
+    assert names == ["rerank.prof", "retrieve.prof", "summary.txt"]
+    with open(os.path.join(profiler.output_dir, "summary.txt"), encoding="utf-8") as f:
+        summary = f.read()
+    assert "retrieve: 1 call(s)" in summary and "rerank: 1 call(s)" in summary
+    assert disable_profiling() is profiler
+    assert profile_stage("retrieve") is profile_stage("rerank")
@@ -0,0 +1,142 @@
+"""LLMScheduler tests against a fake provider and a controllable clock."""
+import threading
+import time
+
+import pytest
+
+from conftest import FakeClock
+from reasoning import rate_limiter
+from reasoning.rate_limiter import BATCH, INTERACTIVE, LLMScheduler, TokenBucket
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+class FakeProvider:
+    """Fails with a 429 ``failures`` times, then answers."""
+
+    def __init__(self, failures: int = 0, error: Exception = None):
+        self.failures = failures
+        self.error = error or RateLimited("429 RESOURCE_EXHAUSTED")
+        self.calls = 0
+
+    def __call__(self) -> str:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return "ok"
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.001)
+
+
+def _advance(scheduler: LLMScheduler, clock: FakeClock, seconds: float) -> None:
+    """Move the fake clock and wake waiters so they re-check the buckets."""
+    clock.advance(seconds)
+    with scheduler._cond:
+        scheduler._cond.notify_all()
+
+
+def test_token_bucket_refills_at_rate_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(60, capacity=10, clock=clock)
+
+    bucket.consume(10)
+    assert bucket.time_until(1) == pytest.approx(1.0)
+
+    clock.advance(3)
+    assert bucket.time_until(3) == 0.0
+    assert bucket.time_until(4) == pytest.approx(1.0)
+
+    clock.advance(1000)
+    bucket.time_until(1)
+    assert bucket.tokens == 10
+
+
+def test_zero_rate_is_unlimited():
+    bucket = TokenBucket(0, clock=FakeClock())
+    bucket.consume(1_000_000)
+    assert bucket.time_until(1_000_000) == 0.0
+
+
+def test_interactive_admitted_before_queued_batch():
+    clock = FakeClock()
+    scheduler = LLMScheduler(requests_per_minute=1, tokens_per_minute=0, clock=clock, sleep=clock.sleep)
+    scheduler.acquire()  # drain the single request token
+
+    order = []
+
+    def submit(name, priority):
+        scheduler.call(lambda: order.append(name), priority=priority)
+
+    batch = threading.Thread(target=submit, args=("batch", BATCH))
+    batch.start()
+    _wait_for(lambda: scheduler.queue_depth == 1)
+    interactive = threading.Thread(target=submit, args=("interactive", INTERACTIVE))
+    interactive.start()
+    _wait_for(lambda: scheduler.queue_depth == 2)
+
+    _advance(scheduler, clock, 60)
+    _wait_for(lambda: len(order) == 1)
+    assert order == ["interactive"]
+    assert scheduler.queue_depth == 1
+
+    _advance(scheduler, clock, 60)
+    batch.join(5)
+    interactive.join(5)
+    assert order == ["interactive", "batch"]
+
+
+def test_rate_limit_errors_retried_with_jittered_backoff(monkeypatch):
+    clock = FakeClock()
+    bounds = []
+
+    def uniform(low, high):
+        bounds.append((low, high))
+        return high / 2
+
+    monkeypatch.setattr(rate_limiter.random, "uniform", uniform)
+    scheduler = LLMScheduler(
+        requests_per_minute=0, tokens_per_minute=0, max_retries=3,
+        backoff_base=1.0, backoff_max=3.0, clock=clock, sleep=clock.sleep
+    )
+    provider = FakeProvider(failures=3)
+
+    assert scheduler.call(provider) == "ok"
+    assert provider.calls == 4
+    # Full jitter over an exponentially growing, capped window
+    assert bounds == [(0, 1.0), (0, 2.0), (0, 3.0)]
+    assert clock.sleeps == [0.5, 1.0, 1.5]
+    metrics = scheduler.get_metrics()
+    assert metrics["retries"] == 3
+    assert metrics["rate_limit_errors"] == 3
+    assert metrics["completed"] == 1
+
+
+def test_retries_exhausted_raises():
+    clock = FakeClock()
+    scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=0, max_retries=2,
+                             clock=clock, sleep=clock.sleep)
+    provider = FakeProvider(failures=10)
+
+    with pytest.raises(RateLimited):
+        scheduler.call(provider)
+    assert provider.calls == 3
+    assert scheduler.get_metrics()["failed"] == 1
+
+
+def test_other_errors_not_retried():
+    clock = FakeClock()
+    scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=0, clock=clock, sleep=clock.sleep)
+    provider = FakeProvider(failures=1, error=RuntimeError("bad request"))
+
+    with pytest.raises(RuntimeError):
+        scheduler.call(provider)
+    assert provider.calls == 1
+    assert clock.sleeps == []
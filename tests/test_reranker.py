@@ -0,0 +1,95 @@
+"""CrossEncoderReranker ordering, top_n and score-cache accounting with a fake model."""
+import pytest
+
+from models.regulatory import RegulatoryChunk
+from retrieval.reranker import CrossEncoderReranker
+
+
+class FakeCrossEncoder:
+    """Scores a pair by how many query words appear in the chunk text."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, texts, batch_size=32, show_progress_bar=False):
+        self.batches.append(len(texts))
+        return [
+            float(sum(word in text.lower().split() for word in query.lower().split()))
+            for query, text in texts
+        ]
+
+
+def _chunk(chunk_id: str, text: str) -> RegulatoryChunk:
+    return RegulatoryChunk(id=chunk_id, source="PRA Rulebook", paragraph="Article 1", text=text)
+
+
+@pytest.fixture
+def chunks():
+    return [
+        _chunk("A", "tier two instruments"),
+        _chunk("B", "common equity tier one capital"),
+        _chunk("C", "leverage ratio exposure"),
+        _chunk("D", "common equity"),
+    ]
+
+
+@pytest.fixture
+def reranker():
+    reranker = CrossEncoderReranker(model_name="fake", cache_size=8)
+    reranker._model = FakeCrossEncoder()
+    return reranker
+
+
+def test_rerank_orders_by_score_and_keeps_top_n(reranker, chunks):
+    hits = reranker.rerank("common equity tier one", chunks, top_n=2)
+
+    assert [(chunk.id, score) for chunk, score in hits] == [("B", 4.0), ("D", 2.0)]
+
+
+def test_equal_scores_keep_first_stage_order(reranker, chunks):
+    hits = reranker.rerank("unrelated", chunks, top_n=4)
+
+    assert [chunk.id for chunk, _ in hits] == ["A", "B", "C", "D"]
+
+
+def test_cache_hits_skip_the_model(reranker, chunks):
+    reranker.rerank("common equity", chunks, top_n=2)
+    reranker.rerank("common equity", chunks[:2] + [_chunk("E", "new text")], top_n=2)
+
+    metrics = reranker.get_metrics()
+    assert reranker.model.batches == [4, 1]
+    assert (metrics["pairs_scored"], metrics["cache_hits"]) == (5, 2)
+    assert metrics["calls"] == 2
+    assert metrics["cache_size"] == 5
+
+
+def test_batch_scores_all_queries_in_one_predict(reranker, chunks):
+    results = reranker.rerank_batch(["tier two", "leverage ratio"], [chunks, chunks], top_n=1)
+
+    assert [hits[0][0].id for hits in results] == ["A", "C"]
+    assert reranker.model.batches == [8]
+
+
+def test_cache_is_bounded_and_can_be_disabled(chunks):
+    bounded = CrossEncoderReranker(model_name="fake", cache_size=2)
+    bounded._model = FakeCrossEncoder()
+    bounded.rerank("common", chunks)
+    assert bounded.get_metrics()["cache_size"] == 2
+
+    uncached = CrossEncoderReranker(model_name="fake", cache_size=0)
+    uncached._model = FakeCrossEncoder()
+    uncached.rerank("common", chunks)
+    uncached.rerank("common", chunks)
+    assert uncached.get_metrics()["cache_hits"] == 0
+    assert uncached.model.batches == [4, 4]
+
+
+def test_reset_clears_cache_and_counters(reranker, chunks):
+    reranker.rerank("common equity", chunks)
+    reranker.record_prompt_tokens(100, 40)
+    reranker.reset()
+    reranker.rerank("common equity", chunks)
+
+    metrics = reranker.get_metrics()
+    assert (metrics["calls"], metrics["cache_hits"], metrics["pairs_scored"]) == (1, 0, 4)
+    assert metrics["prompt_tokens_before"] == 0
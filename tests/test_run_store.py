@@ -0,0 +1,62 @@
+"""RunStore persistence across threads, on disk and in memory."""
+import threading
+
+import pytest
+
+from models.corep import CorepOutput, OwnFunds
+from models.run import RunRecord
+from storage import RunStore
+
+
+def _record(entity: str, cet1: float) -> RunRecord:
+    output = CorepOutput(own_funds=OwnFunds(
+        common_equity_tier_1=cet1, additional_tier_1=0, tier_2=0, total_own_funds=cet1
+    ))
+    return RunRecord(question="q", entity=entity, period="2024-12-31", chunk_ids=["C1", "C2"], output=output)
+
+
+@pytest.fixture(params=["memory", "file"])
+def store(request, tmp_path):
+    path = ":memory:" if request.param == "memory" else str(tmp_path / "runs.db")
+    store = RunStore(path)
+    yield store
+    store.close()
+
+
+def test_runs_written_by_other_threads_are_visible(store):
+    errors = []
+
+    def writer(n: int):
+        try:
+            store.append_many(_record(f"E{n}", 100.0 * n + i) for i in range(5))
+            store.find(entity=f"E{n}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert store.count() == 40
+    assert len({record.run_id for record in store.iter_runs(batch_size=7)}) == 40
+    latest = store.latest("E3", "2024-12-31")
+    assert latest.output.own_funds.common_equity_tier_1 == 304.0
+    assert latest.chunk_ids == ["C1", "C2"]
+
+
+def test_memory_store_is_shared_with_a_reader_thread():
+    store = RunStore(":memory:")
+    record = _record("E1", 500.0)
+    store.append(record)
+    found = []
+
+    reader = threading.Thread(target=lambda: found.append(store.get(record.run_id)))
+    reader.start()
+    reader.join()
+
+    assert found[0] is not None
+    assert found[0].output.own_funds.common_equity_tier_1 == 500.0
+    assert store.own_funds_history() == [("E1", "2024-12-31", 500.0, 0.0, 0.0, 500.0)]
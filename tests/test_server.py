@@ -0,0 +1,128 @@
+"""API error handling, coalescing and backpressure with a stub pipeline (no model or LLM)."""
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from models.corep import CorepOutput, OwnFunds
+import config
+import server
+
+
+class StubPipeline:
+    is_ready = True
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.questions = []
+        self.release = threading.Event()
+        scheduler = SimpleNamespace(get_metrics=lambda: {})
+        self.llm_client = SimpleNamespace(scheduler=scheduler, hedger=None)
+
+    def get_cascade_stats(self):
+        return {}
+
+    def get_rerank_stats(self):
+        return {}
+
+    def run(self, question, entity=None, period=None):
+        self.questions.append(question)
+        if self.error is not None:
+            raise self.error
+        # Hold the executor thread until the test has all its requests in flight
+        assert self.release.wait(timeout=5)
+        return CorepOutput(own_funds=OwnFunds(
+            common_equity_tier_1=100.0, additional_tier_1=0.0, tier_2=0.0, total_own_funds=100.0
+        ))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server, "state", server.ServiceState())
+    # Not used as a context manager, so the lifespan warm-up never runs
+    return TestClient(server.app)
+
+
+@pytest.mark.parametrize("error, status", [
+    (ValueError("LLM failed to generate valid output"), 502),
+    (RuntimeError("index corrupted"), 500),
+])
+def test_pipeline_errors_are_structured_and_counted(client, error, status):
+    server.state.pipeline = StubPipeline(error)
+
+    response = client.post("/v1/reports", json={"question": "CET1?"})
+
+    assert response.status_code == status
+    assert response.json()["detail"] == {"error": type(error).__name__, "message": str(error)}
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.json()["failed"] == 1
+    assert metrics.json()["errors"] == {type(error).__name__: 1}
+    assert server.state.admitted == 0
+
+
+async def _wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+def _async_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test")
+
+
+def test_identical_concurrent_requests_share_one_run(monkeypatch):
+    monkeypatch.setattr(server, "state", server.ServiceState())
+    pipeline = server.state.pipeline = StubPipeline()
+    requests = 5
+
+    async def scenario():
+        async with _async_client() as client:
+            # Whitespace differences still coalesce
+            questions = ["CET1 " + " " * n + "after a loss?" for n in range(requests)]
+            posts = [
+                asyncio.create_task(client.post("/v1/reports", json={"question": question}))
+                for question in questions
+            ]
+            await _wait_for(lambda: len(pipeline.questions) == 1)
+            await asyncio.sleep(0.1)            # let the followers join the in-flight run
+            assert len(server.state.single_flight) == 1
+            pipeline.release.set()
+            return await asyncio.gather(*posts)
+
+    responses = asyncio.run(scenario())
+
+    assert [response.status_code for response in responses] == [200] * requests
+    assert pipeline.questions == ["CET1 after a loss?"]
+    assert sum(response.json()["coalesced"] for response in responses) == requests - 1
+    assert (server.state.completed, server.state.coalesced) == (1, requests - 1)
+
+
+def test_requests_beyond_concurrency_and_queue_are_rejected(monkeypatch):
+    monkeypatch.setattr(config, "SERVER_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(config, "SERVER_MAX_QUEUE", 1)
+    monkeypatch.setattr(server, "state", server.ServiceState())
+    pipeline = server.state.pipeline = StubPipeline()
+
+    async def scenario():
+        async with _async_client() as client:
+            admitted = [
+                asyncio.create_task(client.post("/v1/reports", json={"question": f"Scenario {n}"}))
+                for n in range(2)
+            ]
+            await _wait_for(lambda: server.state.admitted == 2)
+            rejected = await client.post("/v1/reports", json={"question": "Scenario 2"})
+            pipeline.release.set()
+            return rejected, await asyncio.gather(*admitted)
+
+    rejected, admitted = asyncio.run(scenario())
+
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"] == str(config.SERVER_RETRY_AFTER_SECONDS)
+    assert [response.status_code for response in admitted] == [200, 200]
+    assert sorted(pipeline.questions) == ["Scenario 0", "Scenario 1"]
+    assert (server.state.completed, server.state.rejected, server.state.admitted) == (2, 1, 0)
@@ -0,0 +1,173 @@
+"""Incremental ScenarioSession re-runs against a fake LLM."""
+import json
+import re
+
+import pytest
+
+import config
+
+
+QUESTION = (
+    "I have £1,000m in paid-up ordinary shares, £200m in retained earnings, and £50m in "
+    "intangible assets. I also issued £150m in perpetual bonds that are callable after 5 years."
+)
+
+
+class FakeLLM:
+    """
+    Derives Own Funds from the "- F1: £1,000m ..." fact lines of the prompt
+    and answers partial prompts with only the requested fields.
+    """
+
+    def __init__(self, tier_2_facts=()):
+        self.calls = []
+        self.tier_2_facts = list(tier_2_facts)
+
+    def entries(self, user_prompt):
+        facts = {
+            fact_id: float(amount.replace(",", ""))
+            for fact_id, amount in re.findall(r"^- (F\d+): £([\d,.]+)", user_prompt, re.M)
+        }
+        cet1 = facts.get("F1", 0) + facts.get("F2", 0) - facts.get("F3", 0)
+        return {
+            "common_equity_tier_1": (cet1, ["F1", "F2", "F3"]),
+            "additional_tier_1": (facts.get("F4", 0), ["F4", "F5"]),
+            "tier_2": (0.0, self.tier_2_facts),
+        }
+
+    def __call__(self, system_prompt, user_prompt, **kwargs):
+        entries = self.entries(user_prompt)
+        requested = re.search(r"Re-derive ONLY these fields for the edited question: (.*)", user_prompt)
+        fields = [name.strip() for name in requested.group(1).split(",")] if requested else list(entries)
+        self.calls.append(fields if requested else "full")
+        own_funds = {name: entries[name][0] for name in fields if name in entries}
+        audit_log = [
+            {"field": name, "value": entries[name][0], "rule_ids": ["PRA_OWNFUNDS_001"],
+             "explanation": "derived", "input_facts": entries[name][1]}
+            for name in fields if name in entries
+        ]
+        if not requested:
+            own_funds["total_own_funds"] = sum(own_funds.values())
+            audit_log.append({"field": "total_own_funds", "value": own_funds["total_own_funds"],
+                              "rule_ids": [], "explanation": "sum", "input_facts": ["F1", "F2", "F3", "F4"]})
+        return {"own_funds": own_funds, "audit_log": audit_log, "warnings": []}
+
+
+@pytest.fixture
+def llm():
+    return FakeLLM(tier_2_facts=["F5"])
+
+
+@pytest.fixture
+def session(make_pipeline, llm):
+    return make_pipeline(llm).start_session()
+
+
+def _figures(output):
+    own_funds = output.own_funds
+    return (own_funds.common_equity_tier_1, own_funds.additional_tier_1,
+            own_funds.tier_2, own_funds.total_own_funds)
+
+
+def test_identical_question_is_unchanged(session, llm):
+    first = session.run(QUESTION)
+    second = session.run(QUESTION)
+
+    assert session.last_update["mode"] == "unchanged"
+    assert llm.calls == ["full"]
+    assert _figures(second) == _figures(first) == (1150, 150, 0, 1300)
+
+
+def test_amount_edit_reasks_only_dependent_fields_and_merges(session, llm):
+    session.run(QUESTION)
+    output = session.run(QUESTION.replace("£200m", "£300m"))
+
+    assert session.last_update["mode"] == "partial"
+    assert session.last_update["changed_facts"] == ["F2"]
+    assert session.last_update["reasked_fields"] == ["common_equity_tier_1"]
+    assert session.last_update["retrieved"] is False
+    assert llm.calls == ["full", ["common_equity_tier_1"]]
+    # Re-asked CET1 merged with the kept AT1/Tier 2; the total is recomputed locally
+    assert _figures(output) == (1250, 150, 0, 1400)
+    total = [entry for entry in output.audit_log if entry.field == "total_own_funds"]
+    assert total[0].value == 1400
+
+
+def test_wording_edit_reasks_every_field(session, llm):
+    session.run(QUESTION)
+    session.run(QUESTION.replace("perpetual bonds", "perpetual notes"))
+
+    assert session.last_update["changed_facts"] is None
+    assert llm.calls[-1] == ["common_equity_tier_1", "additional_tier_1", "tier_2"]
+
+
+def test_drift_with_same_chunks_reuses_the_answer(session, llm, monkeypatch):
+    session.run(QUESTION)
+    monkeypatch.setattr(config, "INCREMENTAL_RETRIEVAL_DRIFT", -1.0)
+    monkeypatch.setattr(session.pipeline, "retrieve_chunks", lambda question: list(session.chunks))
+
+    output = session.run(QUESTION.replace("£150m", "£100m"))
+
+    assert session.last_update["retrieved"] is True
+    assert session.last_update["mode"] == "partial"
+    assert session.last_update["reasked_fields"] == ["additional_tier_1"]
+    assert _figures(output) == (1150, 100, 0, 1250)
+
+
+def test_drift_to_different_chunks_reruns_in_full(session, llm, monkeypatch):
+    session.run(QUESTION)
+    monkeypatch.setattr(config, "INCREMENTAL_RETRIEVAL_DRIFT", -1.0)
+    monkeypatch.setattr(session.pipeline, "retrieve_chunks", lambda question: list(session.chunks[:1]))
+
+    output = session.run(QUESTION.replace("£150m", "£100m"))
+
+    assert session.last_update["mode"] == "full"
+    assert session.last_update["retrieved"] is True
+    assert llm.calls == ["full", "full"]
+    assert _figures(output) == (1150, 100, 0, 1250)
+
+
+def test_empty_input_facts_on_a_component_count_as_unknown(make_pipeline):
+    llm = FakeLLM(tier_2_facts=[])
+    session = make_pipeline(llm).start_session()
+    session.run(QUESTION)
+
+    assert session.dependencies()["tier_2"] is None
+    session.run(QUESTION.replace("£200m", "£300m"))
+    assert llm.calls[-1] == ["common_equity_tier_1", "tier_2"]
+
+
+def test_partial_answers_go_through_the_cascade(make_pipeline, llm):
+    pipeline = make_pipeline(llm, cascade=True)
+    models = []
+
+    def generate_parsed(system_prompt, user_prompt, temperature=0.1, model=None):
+        models.append(model)
+        response = llm(system_prompt, user_prompt)
+        if model == pipeline.cascade.tiers[0].model and "Re-derive ONLY" in user_prompt:
+            # The cheap tier gets the partial answer wrong: negative CET1 fails validation
+            response["own_funds"]["common_equity_tier_1"] = -1.0
+        return json.dumps(response), response
+
+    pipeline.llm_client.generate_parsed = generate_parsed
+    session = pipeline.start_session()
+    session.run(QUESTION)
+    output = session.run(QUESTION.replace("£200m", "£300m"))
+
+    fast, strong = (tier.model for tier in pipeline.cascade.tiers)
+    assert models == [fast, fast, strong]
+    assert _figures(output) == (1250, 150, 0, 1400)
+    assert pipeline.get_cascade_stats()["fast"]["validation_failures"] == 1
+
+
+def test_failed_partial_answer_keeps_the_previous_state(session, llm):
+    session.run(QUESTION)
+    llm_calls = len(llm.calls)
+    session.pipeline.llm_client.generate_json = lambda *args, **kwargs: None
+
+    with pytest.raises(ValueError):
+        session.run(QUESTION.replace("£200m", "£300m"))
+
+    assert len(llm.calls) == llm_calls
+    assert session.question == QUESTION
+    assert _figures(session.output) == (1150, 150, 0, 1300)
@@ -0,0 +1,50 @@
+"""Keyword routing of questions to template shards."""
+import pytest
+
+from retrieval.sharding import TemplateRouter
+
+
+@pytest.fixture
+def router():
+    return TemplateRouter(max_shards=2)
+
+
+@pytest.mark.parametrize("question, template", [
+    ("How are paid-up ordinary shares treated in CET1?", "C 01.00"),
+    ("What is the minimum leverage ratio of 3.25%?", "C 47.00"),
+    ("How is the CVA risk charge added to the RWA?", "C 02.00"),
+    ("Which capital buffers sit on top of the 4.5% CET1 ratio?", "C 03.00"),
+    ("When does an exposure exceed 25% of Tier 1 for connected clients?", "C 28.00"),
+])
+def test_routes_to_best_matching_template(router, question, template):
+    assert router.route(question)[0] == template
+
+
+@pytest.mark.parametrize("question", [
+    "Do forward contracts count?",            # "rwa" inside "forward"
+    "How do we report a shareholder loan?",   # "share" inside "shareholder"
+    "Is a percentage of 125% of revenue relevant?",  # "25% of" inside "125% of"
+])
+def test_keywords_match_whole_words_only(router, question):
+    assert router.route(question) == [router.default]
+
+
+def test_plural_keywords_match(router):
+    assert router.score("Which deductions and reserves apply?")["C 01.00"] == 2
+
+
+def test_unmatched_question_falls_back_to_default(router):
+    assert router.route("What time is it?") == ["C 01.00"]
+
+
+def test_route_caps_shards_best_first():
+    router = TemplateRouter(max_shards=1)
+    assert router.route("CET1 deductions for intangible assets and the leverage ratio") == ["C 01.00"]
+    assert TemplateRouter(max_shards=3).route(
+        "CET1 deductions for intangible assets and the leverage ratio"
+    ) == ["C 01.00", "C 47.00"]
+
+
+def test_only_served_templates_are_routed():
+    router = TemplateRouter(templates=["C 01.00", "C 47.00"])
+    assert router.route("How is the CVA risk charge added to the RWA?") == ["C 01.00"]
@@ -0,0 +1,138 @@
+"""Period-over-period variance: carry-forward, thresholds, rolling z-scores and warnings."""
+import time
+
+import numpy as np
+import pytest
+
+from analysis import OwnFundsPanel, VarianceAnalyzer
+from analysis.variance import FIELDS
+from models.corep import CorepOutput, OwnFunds
+
+CET1, AT1, TIER_2, TOTAL = range(len(FIELDS))
+
+# A skips 2024-09-30 and has a zero AT1 base; B is flat until a small rise
+ROWS = [
+    ("A", "2024-03-31", 100.0, 0.0, 50.0, 150.0),
+    ("A", "2024-06-30", 110.0, 0.0, 50.0, 160.0),
+    ("A", "2024-12-31", 165.0, 5.0, 50.0, 220.0),
+    ("B", "2024-03-31", 1000.0, 0.0, 0.0, 1000.0),
+    ("B", "2024-06-30", 1000.0, 0.0, 0.0, 1000.0),
+    ("B", "2024-09-30", 1000.0, 0.0, 0.0, 1000.0),
+    ("B", "2024-12-31", 1050.0, 0.0, 0.0, 1050.0),
+]
+
+
+@pytest.fixture
+def result():
+    analyzer = VarianceAnalyzer(rel_threshold=0.2, abs_threshold=10.0, window=3, z_threshold=2.0)
+    return analyzer.analyse(OwnFundsPanel.from_rows(ROWS))
+
+
+def test_panel_is_dense_with_nan_for_missing_periods():
+    panel = OwnFundsPanel.from_rows(ROWS)
+
+    assert list(panel.entities) == ["A", "B"]
+    assert list(panel.periods) == ["2024-03-31", "2024-06-30", "2024-09-30", "2024-12-31"]
+    assert panel.values.shape == (2, 4, 4)
+    assert np.isnan(panel.values[0, 2]).all()
+
+
+def test_missing_period_carries_previous_reported_value_forward(result):
+    # A's Q4 is compared with Q2, not the missing Q3
+    assert result.previous_period[0].tolist() == [-1, 0, 1, 1]
+    assert result.previous[0, 3, CET1] == 110.0
+    assert result.absolute_change[0, 3, CET1] == 55.0
+    assert result.relative_change[0, 3, CET1] == pytest.approx(0.5)
+    assert np.isnan(result.absolute_change[0, 2]).all()
+    assert np.isnan(result.absolute_change[:, 0]).all()
+
+
+def test_zero_base_gives_zero_or_infinite_relative_change(result):
+    assert result.relative_change[0, 1, AT1] == 0.0
+    assert result.relative_change[0, 3, AT1] == np.inf
+
+
+def test_breach_needs_both_relative_and_absolute_threshold(result):
+    flagged = {(m.entity, m.period, m.field) for m in result.movements()}
+
+    assert flagged == {
+        ("A", "2024-12-31", "common_equity_tier_1"),   # +50%, +55
+        ("A", "2024-12-31", "total_own_funds"),        # +37.5%, +60
+    }
+    # A's AT1 moves by an infinite relative amount but only +5 absolute;
+    # A's CET1 into Q2 (+10%) and B's +5% stay under the relative threshold
+    assert not result.flagged[0, 3, AT1]
+    assert not result.flagged[0, 1, CET1]
+    assert not result.flagged[1, 3].any()
+
+
+def test_rolling_zscore_flags_unusual_movement_below_thresholds():
+    cet1 = [100.0, 101.0, 103.0, 104.0, 110.0]
+    rows = [("C", f"2024-0{month}-01", value, 0.0, 0.0, value) for month, value in enumerate(cet1, 1)]
+    analyzer = VarianceAnalyzer(rel_threshold=0.5, abs_threshold=1000.0, window=3, z_threshold=2.0)
+
+    result = analyzer.analyse(OwnFundsPanel.from_rows(rows))
+
+    changes = np.diff(cet1) / cet1[:-1]
+    history = changes[:3]
+    expected = (changes[3] - history.mean()) / history.std(ddof=1)
+    assert result.rolling_mean[0, 4, CET1] == pytest.approx(history.mean())
+    assert result.zscore[0, 4, CET1] == pytest.approx(expected)
+    assert np.isnan(result.zscore[0, :4, CET1]).all()
+    assert [(m.period, m.field) for m in result.movements()] == [
+        ("2024-05-01", "common_equity_tier_1"), ("2024-05-01", "total_own_funds")
+    ]
+
+
+def test_movement_warning_text(result):
+    movement, = result.movements("A", "2024-12-31")[:1]
+
+    assert movement.to_warning() == (
+        "VARIANCE WARNING: CET1 moved +50.0% (+55) from 110 at 2024-06-30 to 165 at 2024-12-31. "
+        "Please provide an explanation for the supervisor."
+    )
+
+
+class FakeRunStore:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def own_funds_history(self, entities=None):
+        return [row for row in self.rows if entities is None or row[0] in entities]
+
+
+def test_annotate_replaces_stored_period_and_adds_warnings():
+    stored = ROWS + [("A", "2025-03-31", 1.0, 0.0, 0.0, 1.0)]
+    output = CorepOutput(own_funds=OwnFunds(
+        common_equity_tier_1=170.0, additional_tier_1=5.0, tier_2=50.0, total_own_funds=225.0
+    ))
+    analyzer = VarianceAnalyzer(rel_threshold=0.2, abs_threshold=10.0, window=3, z_threshold=2.0)
+
+    added = analyzer.annotate(output, "A", "2025-03-31", FakeRunStore(stored))
+
+    # Compared with A's 2024-12-31 figures, not the stored run being replaced
+    assert added == []
+    output.own_funds.common_equity_tier_1 = 300.0
+    added = analyzer.annotate(output, "A", "2025-03-31", FakeRunStore(stored))
+    assert len(added) == 1
+    assert added[0].startswith("VARIANCE WARNING: CET1 moved +81.8% (+135) from 165 at 2024-12-31")
+    assert output.warnings == added
+
+
+def test_whole_portfolio_analyses_well_under_a_second():
+    rng = np.random.default_rng(0)
+    entities, periods = 2000, 40
+    values = rng.uniform(100, 1e6, (entities, periods, len(FIELDS)))
+    values[rng.random((entities, periods)) < 0.05] = np.nan
+    panel = OwnFundsPanel(
+        np.array([f"E{i:05d}" for i in range(entities)], dtype=object),
+        np.array([f"P{i:03d}" for i in range(periods)], dtype=object),
+        values,
+    )
+
+    start = time.perf_counter()
+    result = VarianceAnalyzer(window=8).analyse(panel)
+    elapsed = time.perf_counter() - start
+
+    assert result.flagged.shape == values.shape
+    assert elapsed < 1.0